@@ -0,0 +1,31 @@
+import json
+
+
+def load_results(path: str) -> dict[str, dict[str, float]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results: dict[str, dict[str, object]], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def find_regressions(
+    results: dict[str, dict[str, object]],
+    baseline: dict[str, dict[str, object]],
+    metric: str,
+    tolerance: float,
+) -> list[str]:
+    # 只比较两边都有的项目, 新增或删除的基准不算回退
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        limit = baseline[name][metric] * (1 + tolerance)
+        if result[metric] > limit:
+            regressions.append(
+                f"{name}: {metric} {result[metric]:.2f} > {limit:.2f} "
+                f"(基线 {baseline[name][metric]:.2f})"
+            )
+    return regressions
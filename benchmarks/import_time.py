@@ -0,0 +1,97 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from common import find_regressions, load_results, save_results
+
+# 在全新的解释器进程中测量冷启动导入耗时, 并检查重量级依赖没有被提前导入
+MODULES = [
+    "chick_agent",
+    "chick_agent.core",
+    "chick_agent.tools",
+    "chick_agent.agent",
+    "chick_agent.cli",
+]
+HEAVY_MODULES = ["openai", "fastmcp", "mcp", "httpx"]
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+CLI_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+from chick_agent.cli import main
+try:
+    main(["--help"])
+except SystemExit:
+    pass
+print(json.dumps({"seconds": time.perf_counter() - start, "heavy": []}))
+"""
+
+
+def _measure(code: str) -> dict[str, object]:
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(repeat: int) -> dict[str, dict[str, object]]:
+    probes = {m: PROBE.format(module=m, heavy=HEAVY_MODULES) for m in MODULES}
+    probes["cli --help"] = CLI_PROBE
+    results = {}
+    for name, code in probes.items():
+        samples = [_measure(code) for _ in range(repeat)]
+        seconds = [s["seconds"] for s in samples]
+        results[name] = {
+            "median_ms": statistics.median(seconds) * 1000,
+            "min_ms": min(seconds) * 1000,
+            "heavy_imports": samples[0]["heavy"],
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="chick_agent 导入耗时基准")
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    parser.add_argument("--baseline", help="与之前保存的 JSON 结果比较")
+    parser.add_argument("--save", help="将结果保存为 JSON, 可作为之后的基线")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="允许的中位数回退比例"
+    )
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for name, result in results.items():
+            heavy = ", ".join(result["heavy_imports"]) or "-"
+            print(
+                f"{name:<20} median {result['median_ms']:7.1f}ms  "
+                f"min {result['min_ms']:7.1f}ms  heavy: {heavy}"
+            )
+    if args.save:
+        save_results(results, args.save)
+
+    failed = any(result["heavy_imports"] for result in results.values())
+    if args.baseline:
+        regressions = find_regressions(
+            results, load_results(args.baseline), "median_ms", args.tolerance
+        )
+        for regression in regressions:
+            print(f"回退: {regression}", file=sys.stderr)
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
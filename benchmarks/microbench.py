@@ -0,0 +1,250 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import timeit
+
+from collections.abc import Callable
+from types import SimpleNamespace
+
+from common import find_regressions, load_results, save_results
+
+from chick_agent.agent import SimpleAgent
+from chick_agent.agent.tool_call_parser import parse_tool_calls
+from chick_agent.core import ChickAgentLLM, Config, Message
+from chick_agent.tools import MCPTool, Tool, ToolParameter
+
+# 离线运行的热路径基准: LLM 由返回固定数据块的桩客户端代替, MCP 使用进程内的 FastMCP 服务
+
+
+class _StubStream:
+    def __init__(self, chunks: list[object]):
+        self._chunks = chunks
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+
+class _StubCompletions:
+    def __init__(self, chunks: list[object], completion: object):
+        self.chunks = chunks
+        self.completion = completion
+
+    def create(self, stream: bool = False, **request):
+        return _StubStream(self.chunks) if stream else self.completion
+
+
+def stub_llm(
+    text: str = "好的, 这是回答。 " * 100, chunk_size: int = 4
+) -> ChickAgentLLM:
+    from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+    chunks = [
+        ChatCompletionChunk.model_validate(
+            {
+                "id": "bench",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": "stub",
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"content": text[i : i + chunk_size]},
+                        "finish_reason": None,
+                    }
+                ],
+            }
+        )
+        for i in range(0, len(text), chunk_size)
+    ]
+    completion = ChatCompletion.model_validate(
+        {
+            "id": "bench",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "stub",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }
+            ],
+        }
+    )
+    llm = ChickAgentLLM(
+        model="stub",
+        api_key="stub",
+        base_url="http://stub.invalid/v1",
+        provider="custom",
+    )
+    llm._openai_client = SimpleNamespace(
+        chat=SimpleNamespace(completions=_StubCompletions(chunks, completion))
+    )
+    return llm
+
+
+class StubTool(Tool):
+    def __init__(self, name: str):
+        super().__init__(name=name, description=f"{name} 的测试工具, 用于基准测试")
+
+    def get_parameters(self) -> list[ToolParameter]:
+        return [
+            ToolParameter(name="a", type="integer", description="整数参数"),
+            ToolParameter(name="b", type="number", description="浮点参数"),
+            ToolParameter(name="flag", type="boolean", description="布尔参数"),
+            ToolParameter(name="path", type="string", description="路径"),
+        ]
+
+    def run(self, parameters: dict[str, object]) -> str:
+        return "ok"
+
+
+def _stub_mcp_server():
+    from fastmcp import FastMCP
+
+    server = FastMCP("bench")
+
+    @server.tool
+    def echo(text: str) -> str:
+        return text
+
+    @server.tool(annotations={"readOnlyHint": True})
+    def lookup(key: str) -> str:
+        return f"value of {key}"
+
+    return server
+
+
+def build_benchmarks() -> dict[str, Callable[[], object]]:
+    benchmarks = {}
+
+    text = ("一些普通的回答文本。 " * 40 + "[TOOL_CALL:search:query=python] ") * 10
+    benchmarks["parse_tool_calls"] = lambda: parse_tool_calls(text)
+    benchmarks["message_create"] = lambda: Message("新的问题", "user")
+
+    agent = SimpleAgent("bench", llm=stub_llm())
+    for i in range(300):
+        agent.add_tool(StubTool(f"tool_{i}"), auto_expand=False)
+    benchmarks["parse_tool_parameters"] = lambda: agent._parse_tool_parameters(
+        "tool_0", "a=12,b=3.5,flag=true,path=README.md"
+    )
+
+    def cold_prompt():
+        agent.tool_registry.version += 1
+        return agent._get_system_tool_prompt()
+
+    benchmarks["system_tool_prompt_300_tools_cold"] = cold_prompt
+    benchmarks["system_tool_prompt_300_tools_warm"] = agent._get_system_tool_prompt
+    benchmarks["select_tools_300_tools"] = lambda: agent.tool_registry.select_tools(
+        "读取 README.md 的路径 path", 8
+    )
+
+    history_agent = SimpleAgent(
+        "bench",
+        llm=stub_llm(),
+        config=Config(max_history_length=5000, max_history_tokens=8000),
+    )
+    for i in range(2000):
+        role = "user" if i % 2 == 0 else "assistant"
+        history_agent.add_message(Message(f"第 {i} 条消息, " * 8, role))
+    benchmarks["build_messages_2000_history"] = lambda: history_agent._build_messages(
+        "新的问题"
+    )
+    benchmarks["simple_agent_run_2000_history"] = lambda: _run_and_forget(history_agent)
+
+    llm = stub_llm()
+    messages = [{"role": "user", "content": "hi"}]
+    benchmarks["think_chunks_500"] = lambda: list(llm.think(messages))
+
+    mcp = MCPTool("bench", server=_stub_mcp_server())
+    mcp_agent = SimpleAgent("bench", llm=stub_llm())
+    mcp_agent.add_tool(mcp)
+    echo = mcp_agent.tool_registry.get_tool("echo")
+    lookup = mcp_agent.tool_registry.get_tool("lookup")
+    benchmarks["mcp_tool_run"] = lambda: echo.run({"text": "hi"})
+    benchmarks["mcp_tool_run_cached"] = lambda: lookup.run({"key": "k"})
+    return benchmarks
+
+
+def _run_and_forget(agent: SimpleAgent) -> str:
+    # 保持历史长度不变, 每次测量的输入规模一致
+    result = agent.run("新的问题")
+    agent.history.messages.pop()
+    agent.history.messages.pop()
+    return result
+
+
+def measure(fn: Callable[[], object], repeat: int) -> dict[str, float]:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    timings = [t / number for t in timer.repeat(repeat, number)]
+    return {
+        "median_us": statistics.median(timings) * 1e6,
+        "min_us": min(timings) * 1e6,
+        "number": number,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="chick_agent 热路径微基准")
+    parser.add_argument("-k", "--filter", help="只运行名称包含该字符串的基准")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    parser.add_argument("--baseline", help="与之前保存的 JSON 结果比较")
+    parser.add_argument("--save", help="将结果保存为 JSON, 可作为之后的基线")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="允许的中位数回退比例"
+    )
+    args = parser.parse_args()
+
+    results = {}
+    # 被测代码会向标准输出打印流式内容, 测量期间丢弃
+    with contextlib.redirect_stdout(io.StringIO()):
+        benchmarks = build_benchmarks()
+    for name, fn in benchmarks.items():
+        if args.filter and args.filter not in name:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = measure(fn, args.repeat)
+        if not args.json:
+            result = results[name]
+            print(
+                f"{name:<36} median {result['median_us']:10.2f}us  "
+                f"min {result['min_us']:10.2f}us  x{result['number']}",
+                flush=True,
+            )
+    if args.json:
+        print(
+            json.dumps(
+                {"python": platform.python_version(), "results": results},
+                indent=2,
+                ensure_ascii=False,
+            )
+        )
+    if args.save:
+        save_results(results, args.save)
+    if args.baseline:
+        regressions = find_regressions(
+            results, load_results(args.baseline), "median_us", args.tolerance
+        )
+        for regression in regressions:
+            print(f"回退: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from chick_agent.agent import SimpleAgent
+from chick_agent.agent import ConsoleSink, SimpleAgent
 from chick_agent.core import ChickAgentLLM
 from chick_agent.tools import MCPTool
 from chick_agent.core import Config
@@ -39,7 +39,7 @@ def repr():
             if not user_input:
                 continue
             print(f"{agent.name}: ", end="", flush=True)
-            agent.run(user_input, stream=True)
+            agent.run(user_input, stream=True, sink=ConsoleSink())
         except KeyboardInterrupt:
             print("\n退出")
             break
@@ -1,6 +1,6 @@
 import sys
 
-from chick_agent.agent import SimpleAgent
+from chick_agent.agent import ConsoleSink, SimpleAgent
 from chick_agent.core import ChickAgentLLM
 from chick_agent.core import Config
 
@@ -39,7 +39,7 @@ def git_diff_commiter():
         print("no stdin content")
         return
     print(f"{agent.name}: ", end="", flush=True)
-    agent.run(content, stream=True)
+    agent.run(content, stream=True, sink=ConsoleSink())
 
 
 if __name__ == "__main__":
@@ -1,4 +1,25 @@
 from chick_agent.agent.simple_agent import SimpleAgent
 from chick_agent.agent.basic_agent import BasicAgent
+from chick_agent.agent.events import (
+    AgentEvent,
+    ConsoleSink,
+    ContentDelta,
+    DoneEvent,
+    EventSink,
+    ReasoningDelta,
+    ToolCallEvent,
+    ToolResultEvent,
+)
 
-__all__ = ["SimpleAgent", "BasicAgent"]
+__all__ = [
+    "SimpleAgent",
+    "BasicAgent",
+    "AgentEvent",
+    "ConsoleSink",
+    "ContentDelta",
+    "DoneEvent",
+    "EventSink",
+    "ReasoningDelta",
+    "ToolCallEvent",
+    "ToolResultEvent",
+]
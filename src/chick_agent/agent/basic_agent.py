@@ -1,12 +1,31 @@
-import re
+import asyncio
+import contextvars
+import json
 
-from typing import override
+from collections.abc import AsyncIterator, Iterator
+from concurrent import futures
+from typing import TYPE_CHECKING, override
 from chick_agent.core.agent import Agent
 from chick_agent.core.config import Config
-from chick_agent.core.llm import ChickAgentLLM
+from chick_agent.core.llm import AsyncChickAgentLLM, ChickAgentLLM
+from chick_agent.core.message import ToolCall
+from chick_agent.core.store import SessionStore
+from chick_agent.core.tracing import Tracer, get_tracer
+from chick_agent.core.usage import UsageReporter
+from chick_agent.agent.events import (
+    AgentEvent,
+    ContentDelta,
+    EventSink,
+    ReasoningDelta,
+    ThinkSplitter,
+    ToolCallEvent,
+    ToolResultEvent,
+)
+from chick_agent.agent.tool_call_parser import ToolCallStreamParser, parse_tool_calls
 from chick_agent.tools import ToolRegistry, Tool
 
-import httpx
+if TYPE_CHECKING:
+    import httpx
 
 TOOL_USAGE_PROMPT = """
 {basic_prompt}
@@ -42,145 +61,518 @@ class BasicAgent(Agent):
         system_prompt: str | None = None,
         tool_registry: ToolRegistry | None = None,
         config: Config | None = None,
-        client: httpx.Client | None = None,
+        client: "httpx.Client | None" = None,
+        tracer: Tracer | None = None,
+        session_store: SessionStore | None = None,
+        session_id: str | None = None,
     ):
         if not llm and config:
-            llm = ChickAgentLLM(
-                model=config.model,
-                api_key=config.api_key,
-                base_url=config.base_url,
-                provider=config.provider,
-                temperature=config.temperature,
-                max_tokens=config.max_tokens,
-                timeout=config.timeout,
-                client=client,
-            )
-        self.enable_tool_calling = False
+            llm = ChickAgentLLM.from_config(config, http_client=client, tracer=tracer)
+        elif llm is not None and llm.tracer is None:
+            # 未单独配置 tracer 的 LLM 跟随 agent
+            llm.tracer = tracer
+        # 未指定时使用全局 tracer (默认不记录)
+        self.tracer = tracer
+        # None 表示跟随注册表: 有已注册的工具时启用(共享注册表中的工具可能稍后才就绪)
+        self._enable_tool_calling: bool | None = False
+        self._async_llm: AsyncChickAgentLLM | None = None
+        self._async_llm_loop: asyncio.AbstractEventLoop | None = None
+        self._tool_executor: futures.ThreadPoolExecutor | None = None
+        self._system_prompt_cache: (
+            tuple[tuple[object, ...], dict[str, str], int] | None
+        ) = None
+        # run/arun 的默认事件输出, 为 None 时不输出; 终端交互可设为 ConsoleSink()
+        self.sink: EventSink | None = None
         if tool_registry is None:
             self.tool_registry = ToolRegistry()
         else:
             self.tool_registry = tool_registry
-        super().__init__(name, llm, system_prompt, config)
+        super().__init__(name, llm, system_prompt, config, session_store, session_id)
+        self._usage_reporter: UsageReporter | None = None
+        if self.config.usage_report_interval:
+            self._usage_reporter = UsageReporter(
+                self.usage, self.config.usage_report_interval
+            ).start()
+
+    @property
+    def enable_tool_calling(self) -> bool:
+        if self._enable_tool_calling is None:
+            return len(self.tool_registry) > 0
+        return self._enable_tool_calling
+
+    @enable_tool_calling.setter
+    def enable_tool_calling(self, value: bool | None):
+        self._enable_tool_calling = value
+
+    @property
+    def async_llm(self) -> AsyncChickAgentLLM:
+        if isinstance(self.llm, AsyncChickAgentLLM):
+            return self.llm
+        # 异步连接池绑定在事件循环上, 换了循环(如多次 asyncio.run)需要重建
+        loop = asyncio.get_running_loop()
+        if self._async_llm is None or self._async_llm_loop is not loop:
+            self._async_llm = AsyncChickAgentLLM.from_llm(self.llm)
+            self._async_llm_loop = loop
+        return self._async_llm
+
+    def _get_tracer(self) -> Tracer:
+        return self.tracer or get_tracer()
 
-    def _execute_llm(
+    def _llm_events(
         self, messages: list[dict[str, str]], stream: bool = False, **kwargs
-    ) -> str:
-        response = ""
+    ) -> Iterator[ReasoningDelta | ContentDelta]:
+        splitter = ThinkSplitter()
         if stream:
             for chunk in self.llm.think(messages, **kwargs):
-                if chunk == "<think>":
-                    print("思考中:")
-                elif chunk == "</think>":
-                    print("\n\n开始回答:")
-                else:
-                    print(chunk, end="", flush=True)
-                response += chunk
+                yield from splitter.feed(chunk)
         else:
-            response = self.llm.invoke(messages, **kwargs)
-            print(response)
-        clean_response = re.sub(
-            r"<think>.*?</think>", "", response, flags=re.DOTALL
-        ).strip()
-        return clean_response
+            yield from splitter.feed(self.llm.invoke(messages, **kwargs))
+        yield from splitter.flush()
+
+    async def _allm_events(
+        self, messages: list[dict[str, str]], stream: bool = False, **kwargs
+    ) -> AsyncIterator[ReasoningDelta | ContentDelta]:
+        splitter = ThinkSplitter()
+        if stream:
+            async for chunk in self.async_llm.think(messages, **kwargs):
+                for event in splitter.feed(chunk):
+                    yield event
+        else:
+            for event in splitter.feed(await self.async_llm.invoke(messages, **kwargs)):
+                yield event
+        for event in splitter.flush():
+            yield event
 
     @override
     def run(self, input_text: str, **kwargs) -> str:
         return ""
 
-    def _execute_tool_call(self, tool_name: str, tool_parameters: str) -> str:
+    def _execute_tool_call(
+        self, tool_name: str, tool_parameters: str | dict[str, object]
+    ) -> str:
+        with self._get_tracer().span("tool.dispatch", {"tool": tool_name}) as span:
+            try:
+                tool = self.tool_registry.get_tool(tool_name)
+                if not tool:
+                    return f"错误: 未找到工具 {tool_name}"
+                params = self._parse_tool_parameters(tool_name, tool_parameters)
+                result = tool.run(params)
+                return f"工具 {tool_name} 执行结果\n{result}"
+            except Exception as e:
+                span.record_exception(e)
+                return f"调用工具 {tool_name} 失败: {e}"
+
+    async def _aexecute_tool_call(
+        self, tool_name: str, tool_parameters: str | dict[str, object]
+    ) -> str:
+        with self._get_tracer().span("tool.dispatch", {"tool": tool_name}) as span:
+            try:
+                tool = self.tool_registry.get_tool(tool_name)
+                if not tool:
+                    return f"错误: 未找到工具 {tool_name}"
+                params = self._parse_tool_parameters(tool_name, tool_parameters)
+                result = await tool.arun(params)
+                return f"工具 {tool_name} 执行结果\n{result}"
+            except Exception as e:
+                span.record_exception(e)
+                return f"调用工具 {tool_name} 失败: {e}"
+
+    def _tool_call_batches(self, tool_calls: list[dict[str, str]]) -> list[list[int]]:
+        # 相邻的可并行调用合为一批并发执行, 不可并行的工具单独成批, 保持调用先后顺序
+        batches, current = [], []
+        for i, call in enumerate(tool_calls):
+            tool = self.tool_registry.get_tool(call["tool_name"])
+            if tool is None or tool.allow_parallel:
+                current.append(i)
+                continue
+            if current:
+                batches.append(current)
+                current = []
+            batches.append([i])
+        if current:
+            batches.append(current)
+        return batches
+
+    def _get_tool_executor(self) -> futures.ThreadPoolExecutor:
+        # 提交任务时以 contextvars.copy_context().run 包装, 工具线程中的 span 挂在当前 span 下
+        if self._tool_executor is None:
+            self._tool_executor = futures.ThreadPoolExecutor(
+                max_workers=max(1, self.config.max_tool_concurrency),
+                thread_name_prefix="chick-agent-tool",
+            )
+        return self._tool_executor
+
+    def _execute_tool_calls(self, tool_calls: list[dict[str, str]]) -> list[str]:
+        results = [""] * len(tool_calls)
+        for batch in self._tool_call_batches(tool_calls):
+            if len(batch) == 1 or self.config.max_tool_concurrency <= 1:
+                for i in batch:
+                    call = tool_calls[i]
+                    results[i] = self._execute_tool_call(
+                        call["tool_name"], call["parameters"]
+                    )
+                continue
+            pending = {
+                i: self._get_tool_executor().submit(
+                    contextvars.copy_context().run,
+                    self._execute_tool_call,
+                    tool_calls[i]["tool_name"],
+                    tool_calls[i]["parameters"],
+                )
+                for i in batch
+            }
+            for i, future in pending.items():
+                results[i] = future.result()
+        return results
+
+    async def _aexecute_tool_calls(self, tool_calls: list[dict[str, str]]) -> list[str]:
+        results = [""] * len(tool_calls)
+        semaphore = asyncio.Semaphore(max(1, self.config.max_tool_concurrency))
+
+        async def execute(i: int):
+            async with semaphore:
+                call = tool_calls[i]
+                results[i] = await self._aexecute_tool_call(
+                    call["tool_name"], call["parameters"]
+                )
+
+        for batch in self._tool_call_batches(tool_calls):
+            await asyncio.gather(*(execute(i) for i in batch))
+        return results
+
+    @property
+    def native_tool_calling(self) -> bool:
+        return self.enable_tool_calling and self.config.tool_call_mode == "native"
+
+    def _native_call(self, tool_call: ToolCall) -> dict[str, object]:
+        # 函数调用参数为 JSON, 解析失败时退回 key=value 文本解析
         try:
-            tool = self.tool_registry.get_tool(tool_name)
-            if not tool:
-                return f"错误: 未找到工具 {tool_name}"
-            params = self._parse_tool_parameters(tool_name, tool_parameters)
-            result = tool.run(params)
-            return f"工具 {tool_name} 执行结果\n{result}"
-        except Exception as e:
-            return f"调用工具 {tool_name} 失败: {e}"
+            parameters = json.loads(tool_call.arguments) if tool_call.arguments else {}
+        except json.JSONDecodeError:
+            parameters = tool_call.arguments
+        if not isinstance(parameters, (dict, str)):
+            parameters = {}
+        return {
+            "tool_name": tool_call.name,
+            "parameters": parameters,
+            "id": tool_call.id,
+            "arguments": tool_call.arguments,
+        }
+
+    def _can_dispatch_early(self, call: dict[str, str]) -> bool:
+        tool = self.tool_registry.get_tool(call["tool_name"])
+        return tool is None or tool.allow_parallel
+
+    @staticmethod
+    def _tool_call_event(index: int, call: dict[str, object]) -> ToolCallEvent:
+        return ToolCallEvent(
+            index=index,
+            id=call.get("id"),
+            name=call["tool_name"],
+            parameters=call["parameters"],
+        )
+
+    @staticmethod
+    def _tool_result_events(
+        tool_calls: list[dict[str, object]], tool_results: list[str]
+    ) -> list[ToolResultEvent]:
+        return [
+            ToolResultEvent(
+                index=i, id=call.get("id"), name=call["tool_name"], result=result
+            )
+            for i, (call, result) in enumerate(zip(tool_calls, tool_results))
+        ]
+
+    def _llm_with_tools_events(
+        self,
+        messages: list[dict[str, str]],
+        tool_calls: list[dict[str, object]],
+        stream: bool = False,
+        **kwargs,
+    ) -> Iterator[AgentEvent]:
+        # 识别出的工具调用追加到 tool_calls, 执行结果以 ToolResultEvent 按调用顺序产出
+        if stream:
+            yield from self._stream_llm_with_tools_events(
+                messages, tool_calls, **kwargs
+            )
+            return
+        splitter = ThinkSplitter()
+        if self.native_tool_calling:
+            tools = kwargs.pop("tools", None) or self.tool_registry.get_openai_tools()
+            response, native_calls = self.llm.invoke_with_tools(
+                messages, tools, **kwargs
+            )
+            calls = [self._native_call(c) for c in native_calls]
+            yield from splitter.feed(response) + splitter.flush()
+        else:
+            content = []
+            for event in splitter.feed(self.llm.invoke(messages, **kwargs)) + (
+                splitter.flush()
+            ):
+                if isinstance(event, ContentDelta):
+                    content.append(event.text)
+                yield event
+            calls = self._parse_tool_calls("".join(content))
+        for call in calls:
+            yield self._tool_call_event(len(tool_calls), call)
+            tool_calls.append(call)
+        yield from self._tool_result_events(
+            tool_calls, self._execute_tool_calls(tool_calls)
+        )
+
+    def _stream_llm_with_tools_events(
+        self,
+        messages: list[dict[str, str]],
+        tool_calls: list[dict[str, object]],
+        **kwargs,
+    ) -> Iterator[AgentEvent]:
+        # 流式输出中一旦识别出完整的工具调用就提交执行, 不必等模型输出结束;
+        # 遇到不可并行的工具后, 其后的调用留到输出结束再按顺序执行
+        parser = ToolCallStreamParser()
+        splitter = ThinkSplitter()
+        pending: list[futures.Future] = []
+        dispatching = True
+        if self.native_tool_calling and not kwargs.get("tools"):
+            kwargs["tools"] = self.tool_registry.get_openai_tools()
+        stream = self.llm.think(messages, **kwargs)
+        try:
+            for chunk in stream:
+                if isinstance(chunk, ToolCall):
+                    calls = [self._native_call(chunk)]
+                else:
+                    calls = []
+                    for event in splitter.feed(chunk):
+                        yield event
+                        # 只在回答内容中识别工具调用, 思考过程不参与解析
+                        if isinstance(event, ContentDelta):
+                            calls += parser.feed(event.text)
+                for call in calls:
+                    yield self._tool_call_event(len(tool_calls), call)
+                    tool_calls.append(call)
+                    dispatching = dispatching and self._can_dispatch_early(call)
+                    if dispatching:
+                        pending.append(
+                            self._get_tool_executor().submit(
+                                contextvars.copy_context().run,
+                                self._execute_tool_call,
+                                call["tool_name"],
+                                call["parameters"],
+                            )
+                        )
+                if tool_calls and self.config.stop_stream_on_tool_call:
+                    break
+        finally:
+            stream.close()
+        yield from splitter.flush()
+        tool_results = [future.result() for future in pending]
+        tool_results.extend(self._execute_tool_calls(tool_calls[len(pending) :]))
+        yield from self._tool_result_events(tool_calls, tool_results)
+
+    async def _allm_with_tools_events(
+        self,
+        messages: list[dict[str, str]],
+        tool_calls: list[dict[str, object]],
+        stream: bool = False,
+        **kwargs,
+    ) -> AsyncIterator[AgentEvent]:
+        if stream:
+            async for event in self._astream_llm_with_tools_events(
+                messages, tool_calls, **kwargs
+            ):
+                yield event
+            return
+        splitter = ThinkSplitter()
+        if self.native_tool_calling:
+            tools = kwargs.pop("tools", None) or self.tool_registry.get_openai_tools()
+            response, native_calls = await self.async_llm.invoke_with_tools(
+                messages, tools, **kwargs
+            )
+            calls = [self._native_call(c) for c in native_calls]
+            for event in splitter.feed(response) + splitter.flush():
+                yield event
+        else:
+            content = []
+            response = await self.async_llm.invoke(messages, **kwargs)
+            for event in splitter.feed(response) + splitter.flush():
+                if isinstance(event, ContentDelta):
+                    content.append(event.text)
+                yield event
+            calls = self._parse_tool_calls("".join(content))
+        for call in calls:
+            yield self._tool_call_event(len(tool_calls), call)
+            tool_calls.append(call)
+        for event in self._tool_result_events(
+            tool_calls, await self._aexecute_tool_calls(tool_calls)
+        ):
+            yield event
+
+    async def _astream_llm_with_tools_events(
+        self,
+        messages: list[dict[str, str]],
+        tool_calls: list[dict[str, object]],
+        **kwargs,
+    ) -> AsyncIterator[AgentEvent]:
+        parser = ToolCallStreamParser()
+        splitter = ThinkSplitter()
+        semaphore = asyncio.Semaphore(max(1, self.config.max_tool_concurrency))
+        pending: list[asyncio.Task] = []
+        dispatching = True
+
+        async def execute(call: dict[str, str]) -> str:
+            async with semaphore:
+                return await self._aexecute_tool_call(
+                    call["tool_name"], call["parameters"]
+                )
+
+        if self.native_tool_calling and not kwargs.get("tools"):
+            kwargs["tools"] = self.tool_registry.get_openai_tools()
+        stream = self.async_llm.think(messages, **kwargs)
+        try:
+            async for chunk in stream:
+                if isinstance(chunk, ToolCall):
+                    calls = [self._native_call(chunk)]
+                else:
+                    calls = []
+                    for event in splitter.feed(chunk):
+                        yield event
+                        if isinstance(event, ContentDelta):
+                            calls += parser.feed(event.text)
+                for call in calls:
+                    yield self._tool_call_event(len(tool_calls), call)
+                    tool_calls.append(call)
+                    dispatching = dispatching and self._can_dispatch_early(call)
+                    if dispatching:
+                        pending.append(asyncio.ensure_future(execute(call)))
+                if tool_calls and self.config.stop_stream_on_tool_call:
+                    break
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+        finally:
+            await stream.aclose()
+        for event in splitter.flush():
+            yield event
+        tool_results = list(await asyncio.gather(*pending))
+        tool_results.extend(await self._aexecute_tool_calls(tool_calls[len(pending) :]))
+        for event in self._tool_result_events(tool_calls, tool_results):
+            yield event
 
     def _parse_tool_parameters(
-        self, tool_name: str, parameters: str
+        self, tool_name: str, parameters: str | dict[str, object]
     ) -> dict[str, object]:
-        params = {}
-        if "=" in parameters:
-            if "," in parameters:
-                parameters_pairs = parameters.split(",")
-                for pair in parameters_pairs:
-                    n, v = pair.split("=", maxsplit=1)
-                    params[n.strip()] = v.strip()
-            else:
-                n, v = parameters.split("=", maxsplit=1)
-                params[n.strip()] = v.strip()
-            params = self._convert_parameter_types(tool_name, params)
-        return params
-
-    def _convert_parameter_types(
-        self, tool_name: str, params: dict[str, object]
-    ) -> dict[str, object]:
-        tool = self.tool_registry.get_tool(tool_name)
-        if not tool:
-            return params
-
-        tool_parameters = tool.get_parameters()
-        if not tool_parameters:
-            return params
-
-        param_types = {}
-        for param in tool_parameters:
-            param_types[param.name] = param.type
-
-        converted_params = {}
-        for k, v in params.items():
-            if k in param_types.keys():
-                ty = param_types[k]
-                try:
-                    if ty == "number" or ty == "integer":
-                        # 转换为数字
-                        if isinstance(v, str):
-                            converted_params[k] = float(v) if ty == "number" else int(v)
-                        else:
-                            converted_params[k] = v
-                    elif ty == "boolean":
-                        # 转换为布尔值
-                        if isinstance(v, str):
-                            converted_params[k] = v.lower() in (
-                                "true",
-                                "1",
-                                "yes",
-                                "是",
-                            )
-                        else:
-                            converted_params[k] = bool(v)
-                    else:
-                        converted_params[k] = v
-                except (ValueError, TypeError):
-                    # 转换失败，保持原值
-                    converted_params[k] = v
-            else:
-                converted_params[k] = v
-        return converted_params
+        return self.tool_registry.parse_arguments(tool_name, parameters)
 
     def _parse_tool_calls(self, text: str) -> list[dict[str, str]]:
-        pattern = r"\[TOOL_CALL:([^:]+):([^\]]+)\]"
-        matches = re.findall(pattern, text)
-        tool_calls = []
-        for tool_name, parameters in matches:
-            tool_calls.append(
-                {
-                    "tool_name": tool_name.strip(),
-                    "parameters": parameters.strip(),
-                    "original": f"[TOOL_CALL:{tool_name}:{parameters}]",
-                }
-            )
-        return tool_calls
+        with self._get_tracer().span("agent.parse_tool_calls") as span:
+            tool_calls = parse_tool_calls(text)
+            span.set_attribute("tool_calls", len(tool_calls))
+            return tool_calls
+
+    def add_tool(self, tool: Tool, auto_expand: bool = True, pinned: bool = False):
+        # pinned 的工具在按相关性选择工具时始终提供
+        self.enable_tool_calling = True
+        self.tool_registry.register_tool(tool, auto_expand=auto_expand, pinned=pinned)
 
-    def add_tool(self, tool: Tool, auto_expand: bool = True):
+    def add_tools(
+        self,
+        tools: list[Tool],
+        auto_expand: bool = True,
+        pinned: bool = False,
+        timeout: float | None = None,
+    ):
+        # 并发连接各 MCP 服务, timeout 默认取 config.mcp_discovery_timeout
         self.enable_tool_calling = True
-        self.tool_registry.register_tool(tool, auto_expand=auto_expand)
+        self.tool_registry.register_tools(
+            tools,
+            auto_expand=auto_expand,
+            pinned=pinned,
+            timeout=self.config.mcp_discovery_timeout if timeout is None else timeout,
+        )
+
+    def _stop_usage_reporter(self):
+        if self._usage_reporter is not None:
+            self._usage_reporter.stop()
+            self._usage_reporter = None
+
+    def close(self):
+        self._stop_usage_reporter()
+        if self._tool_executor is not None:
+            self._tool_executor.shutdown()
+            self._tool_executor = None
+        self._close_history()
+        self.tool_registry.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    async def aclose(self):
+        self._stop_usage_reporter()
+        if self._tool_executor is not None:
+            self._tool_executor.shutdown(wait=False)
+            self._tool_executor = None
+        self._close_history()
+        await self.tool_registry.aclose()
 
-    def _get_system_tool_prompt(self) -> str:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    def _select_tools(
+        self, input_text: str, use_history: bool = True
+    ) -> list[Tool] | None:
+        # 按配置选出本轮提供给模型的工具, None 表示全部工具
+        k = self.config.tool_selection_top_k
+        if k is None or not self.enable_tool_calling:
+            return None
+        query = input_text
+        context = self.config.tool_selection_context
+        if use_history and context > 0:
+            recent = self.get_history()[-context:]
+            query = " ".join([*(m.content for m in recent), input_text])
+        return self.tool_registry.select_tools(query, k, self.config.pinned_tools)
+
+    def _tool_kwargs(self, tools: list[Tool] | None) -> dict[str, object]:
+        # 原生调用模式下选出的工具随请求的 tools 参数下发
+        if tools is None or not self.native_tool_calling:
+            return {}
+        return {"tools": self.tool_registry.get_openai_tools(tools)}
+
+    def _get_system_tool_prompt(self, tools: list[Tool] | None = None) -> str:
+        return self._system_message(tools)[0]["content"]
+
+    def _system_message(
+        self, tools: list[Tool] | None = None
+    ) -> tuple[dict[str, str], int]:
+        # 仅在系统提示词、工具注册表、调用模式或选出的工具变化时重新渲染
+        key = (
+            self.system_prompt,
+            self.tool_registry.version,
+            self.native_tool_calling,
+            None if tools is None else tuple(tool.name for tool in tools),
+        )
+        cache = self._system_prompt_cache
+        if cache is None or cache[0] != key:
+            prompt = self._render_system_tool_prompt(tools)
+            cache = (
+                key,
+                {"role": "system", "content": prompt},
+                self.history.count_tokens(prompt),
+            )
+            self._system_prompt_cache = cache
+        return cache[1], cache[2]
+
+    def _render_system_tool_prompt(self, tools: list[Tool] | None = None) -> str:
         basic_prompt = self.system_prompt or "你是一名有用的AI助手"
-        tools_description = self.tool_registry.get_tool_descriptions()
+        if self.native_tool_calling:
+            # 工具通过请求的 tools 参数下发, 无需在提示词中描述
+            return basic_prompt
+        tools_description = self.tool_registry.get_tool_descriptions(tools)
         if not tools_description or tools_description == "无可用工具":
             return basic_prompt
 
@@ -0,0 +1,162 @@
+import sys
+import time
+
+from typing import IO, Literal
+
+from pydantic import BaseModel
+
+from chick_agent.core.usage import TokenUsage
+
+
+class ReasoningDelta(BaseModel):
+    type: Literal["reasoning_delta"] = "reasoning_delta"
+    text: str
+
+
+class ContentDelta(BaseModel):
+    type: Literal["content_delta"] = "content_delta"
+    text: str
+
+
+class ToolCallEvent(BaseModel):
+    type: Literal["tool_call"] = "tool_call"
+    # 同一轮迭代中的调用序号; 文本协议的调用没有 id
+    index: int
+    id: str | None = None
+    name: str
+    parameters: str | dict[str, object]
+
+
+class ToolResultEvent(BaseModel):
+    type: Literal["tool_result"] = "tool_result"
+    index: int
+    id: str | None = None
+    name: str
+    result: str
+
+
+class DoneEvent(BaseModel):
+    type: Literal["done"] = "done"
+    # 去掉思考过程后的最终回答
+    response: str
+    iterations: int = 1
+    usage: TokenUsage | None = None
+
+
+AgentEvent = ReasoningDelta | ContentDelta | ToolCallEvent | ToolResultEvent | DoneEvent
+
+_OPEN_TAG = "<think>"
+_CLOSE_TAG = "</think>"
+
+
+def _partial_tag(text: str, tag: str) -> int:
+    # 文本末尾可能是被截断的标签开头, 返回需要留到下一块再判断的长度
+    tail = text[-(len(tag) - 1) :]
+    start = tail.find("<")
+    while start >= 0:
+        if tag.startswith(tail[start:]):
+            return len(tail) - start
+        start = tail.find("<", start + 1)
+    return 0
+
+
+class ThinkSplitter:
+    # 按 <think>...</think> 将流式文本切分为思考和回答增量, 标签可以跨数据块
+    def __init__(self):
+        self.reasoning = False
+        self._pending = ""
+
+    def _delta(self, text: str) -> ReasoningDelta | ContentDelta:
+        return ReasoningDelta(text=text) if self.reasoning else ContentDelta(text=text)
+
+    def feed(self, text: str) -> list[ReasoningDelta | ContentDelta]:
+        if self._pending:
+            text = self._pending + text
+            self._pending = ""
+        events = []
+        while text:
+            tag = _CLOSE_TAG if self.reasoning else _OPEN_TAG
+            i = text.find(tag)
+            if i < 0:
+                keep = _partial_tag(text, tag)
+                if keep:
+                    self._pending = text[-keep:]
+                    text = text[:-keep]
+                if text:
+                    events.append(self._delta(text))
+                break
+            if i:
+                events.append(self._delta(text[:i]))
+            self.reasoning = not self.reasoning
+            text = text[i + len(tag) :]
+        return events
+
+    def flush(self) -> list[ReasoningDelta | ContentDelta]:
+        text, self._pending = self._pending, ""
+        return [self._delta(text)] if text else []
+
+
+class EventSink:
+    def emit(self, event: AgentEvent):
+        pass
+
+    def flush(self):
+        pass
+
+
+class ConsoleSink(EventSink):
+    # 终端输出: 写入先进入缓冲区, 超过 flush_interval 秒或遇到工具调用、结束事件时才真正写出
+    def __init__(
+        self,
+        file: IO[str] | None = None,
+        show_reasoning: bool = True,
+        show_tools: bool = False,
+        flush_interval: float = 0.05,
+    ):
+        self.file = file
+        self.show_reasoning = show_reasoning
+        self.show_tools = show_tools
+        self.flush_interval = flush_interval
+        self._buffer: list[str] = []
+        self._last_flush = time.monotonic()
+        self._in_reasoning = False
+
+    def emit(self, event: AgentEvent):
+        if isinstance(event, ReasoningDelta):
+            if not self.show_reasoning:
+                return
+            if not self._in_reasoning:
+                self._buffer.append("思考中:\n")
+                self._in_reasoning = True
+            self._buffer.append(event.text)
+        elif isinstance(event, ContentDelta):
+            if self._in_reasoning:
+                self._buffer.append("\n\n开始回答:\n")
+                self._in_reasoning = False
+            self._buffer.append(event.text)
+        elif isinstance(event, ToolCallEvent):
+            if self.show_tools:
+                self._buffer.append(f"\n[调用工具 {event.name}: {event.parameters}]\n")
+            self.flush()
+            return
+        elif isinstance(event, ToolResultEvent):
+            if self.show_tools:
+                self._buffer.append(f"\n[{event.result}]\n")
+            self.flush()
+            return
+        elif isinstance(event, DoneEvent):
+            self._in_reasoning = False
+            self._buffer.append("\n")
+            self.flush()
+            return
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        file = self.file or sys.stdout
+        file.write("".join(self._buffer))
+        file.flush()
+        self._buffer.clear()
@@ -1,10 +1,27 @@
-from typing import override
+import asyncio
+import contextvars
+import itertools
+
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, override
 from chick_agent.agent.basic_agent import BasicAgent
+from chick_agent.agent.events import (
+    AgentEvent,
+    ContentDelta,
+    DoneEvent,
+    EventSink,
+    ToolResultEvent,
+)
 from chick_agent.core.config import Config
+from chick_agent.core.loop import run_sync
 from chick_agent.core.llm import ChickAgentLLM
-from chick_agent.core.message import Message
-from chick_agent.tools import ToolRegistry
-import httpx
+from chick_agent.core.message import Message, now_ms
+from chick_agent.core.store import SessionStore
+from chick_agent.core.tracing import Span, Tracer
+from chick_agent.tools import Tool, ToolRegistry
+
+if TYPE_CHECKING:
+    import httpx
 
 
 class SimpleAgent(BasicAgent):
@@ -15,9 +32,84 @@ class SimpleAgent(BasicAgent):
         system_prompt: str | None = None,
         tool_registry: ToolRegistry | None = None,
         config: Config | None = None,
-        client: httpx.Client | None = None,
+        client: "httpx.Client | None" = None,
+        tracer: Tracer | None = None,
+        session_store: SessionStore | None = None,
+        session_id: str | None = None,
     ):
-        super().__init__(name, llm, system_prompt, tool_registry, config, client)
+        super().__init__(
+            name,
+            llm,
+            system_prompt,
+            tool_registry,
+            config,
+            client,
+            tracer,
+            session_store,
+            session_id,
+        )
+
+    def _build_messages(
+        self, input_text: str, tools: list[Tool] | None = None
+    ) -> list[dict[str, str]]:
+        system_message, system_tokens = self._system_message(tools)
+        reserved_tokens = system_tokens + self.history.count_tokens(input_text)
+        messages = [system_message]
+        messages += self.history.prompt_messages(reserved_tokens)
+        messages.append({"role": "user", "content": input_text})
+        return messages
+
+    def _append_tool_results(
+        self,
+        messages: list[dict[str, str]],
+        response: str,
+        tool_calls: list[dict[str, str]],
+        tool_results: list[str],
+    ):
+        if self.native_tool_calling:
+            messages.append(
+                {
+                    "role": "assistant",
+                    "content": response or None,
+                    "tool_calls": [
+                        {
+                            "id": call["id"],
+                            "type": "function",
+                            "function": {
+                                "name": call["tool_name"],
+                                "arguments": call["arguments"],
+                            },
+                        }
+                        for call in tool_calls
+                    ],
+                }
+            )
+            for call, result in zip(tool_calls, tool_results):
+                messages.append(
+                    {"role": "tool", "tool_call_id": call["id"], "content": result}
+                )
+            return
+        prev_response = response
+        for call in tool_calls:
+            # 删除此次工具调用
+            prev_response = prev_response.replace(call["original"], "")
+        messages.append({"role": "assistant", "content": prev_response})
+        tool_results_text = "\n\n".join(tool_results)
+        messages.append(
+            {
+                "role": "user",
+                "content": f"工具执行结果: \n{tool_results_text}\n\n请基于这些结果给出完整的答复",
+            }
+        )
+
+    def _finish_turn(self, input_text: str, response: str):
+        timestamp = now_ms()
+        self.add_messages(
+            [
+                Message(input_text, "user", timestamp),
+                Message(response, "assistant", timestamp),
+            ]
+        )
 
     @override
     def run(
@@ -25,54 +117,324 @@ class SimpleAgent(BasicAgent):
         input_text: str,
         stream: bool = False,
         max_tool_iterations: int = 3,
+        sink: EventSink | None = None,
         **kwargs,
     ) -> str:
-        messages = []
-        enhanced_prompt = self._get_system_tool_prompt()
-        messages.append({"role": "system", "content": enhanced_prompt})
+        # 事件交给 sink (缺省为 self.sink) 处理, 都未设置时不产生任何输出
+        sink = sink or self.sink
+        response = ""
+        try:
+            for event in self._turn_events(
+                input_text, stream, max_tool_iterations, **kwargs
+            ):
+                if sink is not None:
+                    sink.emit(event)
+                if isinstance(event, DoneEvent):
+                    response = event.response
+        finally:
+            if sink is not None:
+                sink.flush()
+        return response
 
-        for msg in self._history:
-            messages.append({"role": msg.role, "content": msg.content})
+    def stream_events(
+        self,
+        input_text: str,
+        stream: bool = True,
+        max_tool_iterations: int = 3,
+        **kwargs,
+    ) -> Iterator[AgentEvent]:
+        # 逐个产出本轮对话的事件, 以 DoneEvent 结束
+        return _isolated(
+            self._turn_events(input_text, stream, max_tool_iterations, **kwargs)
+        )
 
-        messages.append({"role": "user", "content": input_text})
+    def _turn_events(
+        self, input_text: str, stream: bool, max_tool_iterations: int, **kwargs
+    ) -> Iterator[AgentEvent]:
+        with self._turn_usage() as usage:
+            tools = self._select_tools(input_text)
+            messages = self._build_messages(input_text, tools)
+            for event in self._run_events(
+                messages,
+                stream,
+                max_tool_iterations,
+                **self._tool_kwargs(tools),
+                **kwargs,
+            ):
+                if isinstance(event, DoneEvent):
+                    event.usage = usage
+                    self._finish_turn(input_text, event.response)
+                yield event
 
-        if not self.enable_tool_calling:
-            response = self._execute_llm(messages, stream, **kwargs)
-            self.add_message(Message(input_text, "user"))
-            self.add_message(Message(response, "assistant"))
-            return response
-
-        current_iteration = 0
-        full_response = ""
-
-        while current_iteration < max_tool_iterations:
-            current_iteration += 1
-            response = self._execute_llm(messages, stream, **kwargs)
-            tool_calls = self._parse_tool_calls(response)
-            if tool_calls:
-                tool_results = []
-                prev_response = response
-                for call in tool_calls:
-                    result = self._execute_tool_call(
-                        call["tool_name"], call["parameters"]
+    def _run_events(
+        self,
+        messages: list[dict[str, str]],
+        stream: bool = False,
+        max_tool_iterations: int = 3,
+        **kwargs,
+    ) -> Iterator[AgentEvent]:
+        with self._get_tracer().span(
+            "agent.run", {"agent": self.name, "stream": stream}
+        ) as span:
+            iterations = 0
+            response = ""
+            if self.enable_tool_calling:
+                while iterations < max_tool_iterations:
+                    iterations += 1
+                    content, tool_calls, tool_results = [], [], []
+                    with self._iteration_span(iterations) as iteration:
+                        for event in self._llm_with_tools_events(
+                            messages, tool_calls, stream, **kwargs
+                        ):
+                            if isinstance(event, ContentDelta):
+                                content.append(event.text)
+                            elif isinstance(event, ToolResultEvent):
+                                tool_results.append(event.result)
+                            yield event
+                        iteration.set_attribute("tool_calls", len(tool_calls))
+                    response = "".join(content).strip()
+                    if not tool_calls:
+                        break
+                    self._append_tool_results(
+                        messages, response, tool_calls, tool_results
                     )
-                    tool_results.append(result)
-                    # 删除此次工具调用
-                    prev_response = prev_response.replace(call["original"], "")
-                messages.append({"role": "assistant", "content": prev_response})
-                tool_results_text = "\n\n".join(tool_results)
-                messages.append(
-                    {
-                        "role": "user",
-                        "content": f"工具执行结果: \n{tool_results_text}\n\n请基于这些结果给出完整的答复",
-                    }
+                    response = ""
+            if not self.enable_tool_calling or (
+                iterations >= max_tool_iterations and not response
+            ):
+                iterations = max(iterations, 1)
+                content = []
+                for event in self._llm_events(messages, stream, **kwargs):
+                    if isinstance(event, ContentDelta):
+                        content.append(event.text)
+                    yield event
+                response = "".join(content).strip()
+            span.set_attribute("iterations", iterations)
+            yield DoneEvent(response=response, iterations=iterations)
+
+    def _iteration_span(self, iteration: int) -> Span:
+        return self._get_tracer().span("agent.iteration", {"iteration": iteration})
+
+    async def arun(
+        self,
+        input_text: str,
+        stream: bool = False,
+        max_tool_iterations: int = 3,
+        on_chunk: Callable[[str], None] | None = None,
+        sink: EventSink | None = None,
+        **kwargs,
+    ) -> str:
+        # on_chunk 接收回答内容的增量文本, 完整的事件流见 astream_events
+        sink = sink or self.sink
+        response = ""
+        try:
+            async for event in self._aturn_events(
+                input_text, stream, max_tool_iterations, **kwargs
+            ):
+                if on_chunk is not None and isinstance(event, ContentDelta):
+                    on_chunk(event.text)
+                if sink is not None:
+                    sink.emit(event)
+                if isinstance(event, DoneEvent):
+                    response = event.response
+        finally:
+            if sink is not None:
+                sink.flush()
+        return response
+
+    async def astream_events(
+        self,
+        input_text: str,
+        stream: bool = True,
+        max_tool_iterations: int = 3,
+        **kwargs,
+    ) -> AsyncIterator[AgentEvent]:
+        # 对话在独立的任务中运行, tracing span 和用量统计不会泄漏到调用方的上下文
+        queue: asyncio.Queue[AgentEvent | None] = asyncio.Queue()
+
+        async def produce():
+            try:
+                async for event in self._aturn_events(
+                    input_text, stream, max_tool_iterations, **kwargs
+                ):
+                    queue.put_nowait(event)
+            finally:
+                queue.put_nowait(None)
+
+        task = asyncio.ensure_future(produce())
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+
+    async def _aturn_events(
+        self, input_text: str, stream: bool, max_tool_iterations: int, **kwargs
+    ) -> AsyncIterator[AgentEvent]:
+        with self._turn_usage() as usage:
+            tools = self._select_tools(input_text)
+            messages = self._build_messages(input_text, tools)
+            async for event in self._arun_events(
+                messages,
+                stream,
+                max_tool_iterations,
+                **self._tool_kwargs(tools),
+                **kwargs,
+            ):
+                if isinstance(event, DoneEvent):
+                    event.usage = usage
+                    self._finish_turn(input_text, event.response)
+                yield event
+
+    async def _arun_events(
+        self,
+        messages: list[dict[str, str]],
+        stream: bool = False,
+        max_tool_iterations: int = 3,
+        **kwargs,
+    ) -> AsyncIterator[AgentEvent]:
+        with self._get_tracer().span(
+            "agent.run", {"agent": self.name, "stream": stream}
+        ) as span:
+            iterations = 0
+            response = ""
+            if self.enable_tool_calling:
+                while iterations < max_tool_iterations:
+                    iterations += 1
+                    content, tool_calls, tool_results = [], [], []
+                    with self._iteration_span(iterations) as iteration:
+                        async for event in self._allm_with_tools_events(
+                            messages, tool_calls, stream, **kwargs
+                        ):
+                            if isinstance(event, ContentDelta):
+                                content.append(event.text)
+                            elif isinstance(event, ToolResultEvent):
+                                tool_results.append(event.result)
+                            yield event
+                        iteration.set_attribute("tool_calls", len(tool_calls))
+                    response = "".join(content).strip()
+                    if not tool_calls:
+                        break
+                    self._append_tool_results(
+                        messages, response, tool_calls, tool_results
+                    )
+                    response = ""
+            if not self.enable_tool_calling or (
+                iterations >= max_tool_iterations and not response
+            ):
+                iterations = max(iterations, 1)
+                content = []
+                async for event in self._allm_events(messages, stream, **kwargs):
+                    if isinstance(event, ContentDelta):
+                        content.append(event.text)
+                    yield event
+                response = "".join(content).strip()
+            span.set_attribute("iterations", iterations)
+            yield DoneEvent(response=response, iterations=iterations)
+
+    async def arun_once(
+        self, input_text: str, max_tool_iterations: int = 3, **kwargs
+    ) -> str:
+        # 不读写对话历史的单次调用, 多个调用可以在同一个 agent 上并发执行
+        tools = self._select_tools(input_text, use_history=False)
+        system_message, _ = self._system_message(tools)
+        messages = [system_message, {"role": "user", "content": input_text}]
+        response = ""
+        # 不属于当前对话, 用量只计入 agent 累计
+        with self._turn_usage(session=False):
+            async for event in self._arun_events(
+                messages,
+                max_tool_iterations=max_tool_iterations,
+                **self._tool_kwargs(tools),
+                **kwargs,
+            ):
+                if isinstance(event, DoneEvent):
+                    response = event.response
+        return response
+
+    async def abatch(
+        self,
+        inputs: Iterable[str],
+        concurrency: int = 8,
+        max_tool_iterations: int = 3,
+        **kwargs,
+    ) -> AsyncIterator[tuple[int, str | Exception]]:
+        # 按完成顺序产出 (输入序号, 结果或异常), 同时运行的请求不超过 concurrency 个
+        pending = set()
+        inputs = enumerate(inputs)
+        try:
+            while True:
+                for index, input_text in itertools.islice(
+                    inputs, concurrency - len(pending)
+                ):
+                    pending.add(
+                        asyncio.ensure_future(
+                            self._indexed_run(
+                                index, input_text, max_tool_iterations, **kwargs
+                            )
+                        )
+                    )
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
                 )
-                continue
-            full_response = response
-            break
-        if current_iteration >= max_tool_iterations and not full_response:
-            full_response = self._execute_llm(messages, stream, **kwargs)
-
-        self.add_message(Message(input_text, "user"))
-        self.add_message(Message(full_response, "assistant"))
-        return full_response
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _indexed_run(
+        self, index: int, input_text: str, max_tool_iterations: int, **kwargs
+    ) -> tuple[int, str | Exception]:
+        try:
+            return index, await self.arun_once(
+                input_text, max_tool_iterations, **kwargs
+            )
+        except Exception as e:
+            return index, e
+
+    def batch(
+        self,
+        inputs: Iterable[str],
+        concurrency: int = 8,
+        max_tool_iterations: int = 3,
+        **kwargs,
+    ) -> list[str | Exception]:
+        async def collect() -> list[str | Exception]:
+            results = {}
+            async for index, result in self.abatch(
+                inputs, concurrency, max_tool_iterations, **kwargs
+            ):
+                results[index] = result
+            return [results[i] for i in range(len(results))]
+
+        return run_sync(collect())
+
+    async def astream(
+        self, input_text: str, max_tool_iterations: int = 3, **kwargs
+    ) -> AsyncIterator[str]:
+        # 只产出回答内容的增量文本
+        async for event in self.astream_events(
+            input_text, max_tool_iterations=max_tool_iterations, **kwargs
+        ):
+            if isinstance(event, ContentDelta):
+                yield event.text
+
+
+def _isolated[T](events: Iterator[T]) -> Iterator[T]:
+    # 每一步都在同一个独立的 contextvars 上下文中推进生成器,
+    # 生成器内设置的当前 span 和用量统计范围在 yield 期间不会泄漏到调用方
+    context = contextvars.copy_context()
+    try:
+        while True:
+            try:
+                event = context.run(next, events)
+            except StopIteration:
+                return
+            yield event
+    finally:
+        context.run(events.close)
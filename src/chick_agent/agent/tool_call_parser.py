@@ -0,0 +1,50 @@
+import re
+
+# 参数中允许一层方括号, 如 tags=[a,b]
+TOOL_CALL_PATTERN = re.compile(r"\[TOOL_CALL:([^:]+):((?:[^\[\]]|\[[^\[\]]*\])+)\]")
+TOOL_CALL_MARKER = "[TOOL_CALL:"
+
+
+def _to_call(match: re.Match) -> dict[str, str]:
+    tool_name, parameters = match.groups()
+    return {
+        "tool_name": tool_name.strip(),
+        "parameters": parameters.strip(),
+        "original": match.group(0),
+    }
+
+
+def parse_tool_calls(text: str) -> list[dict[str, str]]:
+    return [_to_call(m) for m in TOOL_CALL_PATTERN.finditer(text)]
+
+
+class ToolCallStreamParser:
+    # 在 think() 的流式输出上增量识别完整的工具调用标记, <think> 内的内容不参与解析
+    def __init__(self):
+        self.calls: list[dict[str, str]] = []
+        self._buffer = ""
+        self._thinking = False
+
+    def feed(self, chunk: str) -> list[dict[str, str]]:
+        if chunk == "<think>":
+            self._thinking = True
+            return []
+        if chunk == "</think>":
+            self._thinking = False
+            return []
+        if self._thinking:
+            return []
+
+        buffer = self._buffer + chunk
+        calls = []
+        pos = 0
+        for match in TOOL_CALL_PATTERN.finditer(buffer):
+            calls.append(_to_call(match))
+            pos = match.end()
+        # 只保留尚未闭合的调用标记, 或可能是标记前缀的结尾部分
+        start = buffer.find(TOOL_CALL_MARKER, pos)
+        if start == -1:
+            start = max(pos, len(buffer) - len(TOOL_CALL_MARKER) + 1)
+        self._buffer = buffer[start:]
+        self.calls.extend(calls)
+        return calls
@@ -0,0 +1,159 @@
+import json
+import os
+import sys
+import time
+
+from collections.abc import Callable, Iterator
+
+from pydantic import BaseModel
+
+from chick_agent.agent import SimpleAgent
+from chick_agent.core.history import estimate_tokens
+from chick_agent.core.loop import run_sync
+
+
+class BatchStats(BaseModel):
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    # 取自服务端返回的用量; 服务端不返回用量时按输出文本估算 output_tokens
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def requests_per_second(self) -> float:
+        return (self.completed + self.failed) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.output_tokens / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"完成 {self.completed}, 失败 {self.failed}, 跳过 {self.skipped}, "
+            f"耗时 {self.elapsed:.1f}s, {self.requests_per_second:.2f} req/s, "
+            f"提示词 {self.prompt_tokens} tokens, 生成 {self.output_tokens} tokens, "
+            f"{self.tokens_per_second:.1f} tokens/s"
+        )
+
+
+def _print_stats(stats: BatchStats):
+    print(stats, file=sys.stderr, flush=True)
+
+
+class BatchRunner:
+    # JSONL 输入逐行读取, 结果按完成顺序追加写入输出文件;
+    # 输出文件同时作为检查点, 重新运行时跳过已成功的记录
+    def __init__(
+        self,
+        agent: SimpleAgent,
+        concurrency: int = 8,
+        input_key: str = "input",
+        id_key: str = "id",
+        max_tool_iterations: int = 3,
+        report_interval: float = 10.0,
+        report: Callable[[BatchStats], None] | None = _print_stats,
+    ):
+        self.agent = agent
+        self.concurrency = concurrency
+        self.input_key = input_key
+        self.id_key = id_key
+        self.max_tool_iterations = max_tool_iterations
+        self.report_interval = report_interval
+        self.report = report
+
+    def run(self, input_path: str, output_path: str) -> BatchStats:
+        return run_sync(self.arun(input_path, output_path))
+
+    async def arun(self, input_path: str, output_path: str) -> BatchStats:
+        stats = BatchStats()
+        finished = self._load_checkpoint(output_path)
+        record_ids: dict[int, object] = {}
+
+        def inputs() -> Iterator[str]:
+            # 序号与 abatch 产出的输入序号一致
+            index = 0
+            for record_id, record in self._read_records(input_path):
+                if str(record_id) in finished:
+                    stats.skipped += 1
+                    continue
+                record_ids[index] = record_id
+                index += 1
+                yield str(record.get(self.input_key, ""))
+
+        start = time.perf_counter()
+        last_report = start
+        usage_start = self.agent.usage.total
+        estimated_tokens = 0
+        with open(output_path, "a", encoding="utf-8") as output:
+            async for index, result in self.agent.abatch(
+                inputs(), self.concurrency, self.max_tool_iterations
+            ):
+                record_id = record_ids.pop(index)
+                line = {"id": record_id, "output": None, "error": None}
+                if isinstance(result, Exception):
+                    line["error"] = str(result)
+                    stats.failed += 1
+                else:
+                    line["output"] = result
+                    stats.completed += 1
+                    estimated_tokens += estimate_tokens(result)
+                usage = self.agent.usage.total - usage_start
+                stats.prompt_tokens = usage.prompt_tokens
+                stats.output_tokens = usage.completion_tokens or estimated_tokens
+                output.write(json.dumps(line, ensure_ascii=False) + "\n")
+                output.flush()
+                now = time.perf_counter()
+                stats.elapsed = now - start
+                if self.report and now - last_report >= self.report_interval:
+                    self.report(stats)
+                    last_report = now
+        stats.elapsed = time.perf_counter() - start
+        if self.report:
+            self.report(stats)
+        return stats
+
+    def _read_records(self, input_path: str) -> Iterator[tuple[object, dict]]:
+        with open(input_path, encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    record = {self.input_key: record}
+                yield record.get(self.id_key, lineno), record
+
+    def _load_checkpoint(self, output_path: str) -> set[str]:
+        # 失败的记录会重新运行并追加新结果, 加载时把旧的失败记录和无法解析的行从文件中移除,
+        # 使输出文件中每个 id 只保留一行
+        if not os.path.exists(output_path):
+            return set()
+        with open(output_path, "rb+") as f:
+            data = f.read()
+            # 中断时可能留下半行, 截断到最后一个完整记录
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                f.truncate(end)
+        finished = set()
+        kept = []
+        rewrite = False
+        for line in data[:end].splitlines(keepends=True):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                entry = None
+            if not isinstance(entry, dict) or entry.get("error") is not None:
+                rewrite = True
+                continue
+            finished.add(str(entry.get("id")))
+            kept.append(line)
+        if rewrite:
+            temp_path = f"{output_path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.writelines(kept)
+            os.replace(temp_path, output_path)
+        return finished
@@ -0,0 +1,164 @@
+import argparse
+import sys
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from chick_agent.agent import SimpleAgent
+    from chick_agent.core.config import Config
+
+# 子命令在执行时才导入 agent 等模块, 使 --help 等短命令保持快速启动
+
+
+def _version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("chick-agent")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def _add_agent_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--config", default="config.toml", help="配置文件路径")
+    parser.add_argument("--config-id", default="deepseek", help="配置文件中的配置节")
+    prompt = parser.add_mutually_exclusive_group()
+    prompt.add_argument("--system-prompt", help="系统提示词")
+    prompt.add_argument("--system-prompt-file", help="从文件读取系统提示词")
+    parser.add_argument(
+        "--trace", help="将各阶段耗时的 tracing span 追加写入该 JSONL 文件"
+    )
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="chick-agent")
+    parser.add_argument("--version", action="version", version=_version())
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="单次对话, 未给出输入时读取标准输入")
+    run.add_argument("input", nargs="?", help="输入文本")
+    _add_agent_arguments(run)
+    run.add_argument(
+        "--session", help="会话 ID, 配置了 history_store 时在多次运行间延续对话"
+    )
+    run.add_argument("--no-stream", action="store_true", help="关闭流式输出")
+    run.add_argument(
+        "--usage", action="store_true", help="结束后向标准错误输出 token 用量"
+    )
+    run.set_defaults(func=_run_once)
+
+    batch = subparsers.add_parser("batch", help="批量处理 JSONL 输入")
+    batch.add_argument("input", help="输入 JSONL 文件, 每行一个记录")
+    batch.add_argument("output", help="输出 JSONL 文件, 已存在时从中断处继续")
+    _add_agent_arguments(batch)
+    batch.add_argument("-j", "--concurrency", type=int, default=8, help="并发请求数")
+    batch.add_argument("--input-key", default="input", help="输入文本字段")
+    batch.add_argument("--id-key", default="id", help="记录 ID 字段, 缺省时使用行号")
+    batch.add_argument("--max-tool-iterations", type=int, default=3)
+    batch.add_argument(
+        "--report-interval", type=float, default=10.0, help="进度汇报间隔(秒)"
+    )
+    batch.set_defaults(func=_run_batch)
+
+    serve = subparsers.add_parser(
+        "serve", help="启动 OpenAI 兼容的 /v1/chat/completions 服务"
+    )
+    _add_agent_arguments(serve)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument(
+        "--max-sessions", type=int, default=1000, help="保留的会话数上限"
+    )
+    serve.add_argument(
+        "--session-ttl", type=float, default=3600.0, help="会话闲置多少秒后淘汰"
+    )
+    serve.add_argument("--max-tool-iterations", type=int, default=3)
+    serve.set_defaults(func=_serve)
+    return parser
+
+
+def _load_settings(args: argparse.Namespace) -> tuple["Config", str | None]:
+    from chick_agent.core.config import Config
+
+    system_prompt = args.system_prompt
+    if args.system_prompt_file:
+        with open(args.system_prompt_file, encoding="utf-8") as f:
+            system_prompt = f.read()
+    config = Config.from_toml(args.config, id=args.config_id)
+    if args.trace:
+        from chick_agent.core.tracing import JSONLinesTracer, set_tracer
+
+        # 设为全局 tracer, MCP 工具等由配置创建的组件也一并记录; 文件按行刷新
+        set_tracer(JSONLinesTracer(args.trace))
+    return config, system_prompt
+
+
+def _build_agent(args: argparse.Namespace, name: str) -> "SimpleAgent":
+    from chick_agent.agent import SimpleAgent
+
+    config, system_prompt = _load_settings(args)
+    session_id = getattr(args, "session", None)
+    if session_id is None:
+        # 未指定会话时每次运行都是新的对话, 不读写持久化历史
+        config = config.model_copy(update={"history_store": None})
+    return SimpleAgent(
+        name, system_prompt=system_prompt, config=config, session_id=session_id
+    )
+
+
+def _run_once(args: argparse.Namespace) -> int:
+    content = args.input
+    if content is None:
+        sys.stdin.reconfigure(encoding="utf-8")
+        content = sys.stdin.read()
+    if not content:
+        print("没有输入内容", file=sys.stderr)
+        return 1
+    from chick_agent.agent import ConsoleSink
+
+    with _build_agent(args, "🤖") as agent:
+        print(f"{agent.name}: ", end="", flush=True)
+        agent.run(content, stream=not args.no_stream, sink=ConsoleSink())
+        if args.usage:
+            print(f"用量: {agent.last_turn_usage}", file=sys.stderr)
+    return 0
+
+
+def _run_batch(args: argparse.Namespace) -> int:
+    from chick_agent.batch import BatchRunner
+
+    with _build_agent(args, "batch") as agent:
+        runner = BatchRunner(
+            agent,
+            concurrency=args.concurrency,
+            input_key=args.input_key,
+            id_key=args.id_key,
+            max_tool_iterations=args.max_tool_iterations,
+            report_interval=args.report_interval,
+        )
+        try:
+            stats = runner.run(args.input, args.output)
+        except KeyboardInterrupt:
+            print(f"\n已中断, 重新运行相同命令可从 {args.output} 继续", file=sys.stderr)
+            return 130
+    return 1 if stats.failed else 0
+
+
+def _serve(args: argparse.Namespace) -> int:
+    from chick_agent.server import AgentServer
+
+    config, system_prompt = _load_settings(args)
+    server = AgentServer(
+        config,
+        system_prompt=system_prompt,
+        max_sessions=args.max_sessions,
+        session_ttl=args.session_ttl,
+        max_tool_iterations=args.max_tool_iterations,
+    )
+    server.serve(args.host, args.port)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    return args.func(args)
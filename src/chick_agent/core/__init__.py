@@ -1,7 +1,39 @@
 from chick_agent.core.agent import Agent
+from chick_agent.core.cache import ResponseCache
 from chick_agent.core.config import Config
-from chick_agent.core.llm import ChickAgentLLM
-from chick_agent.core.message import Message
+from chick_agent.core.llm import AsyncChickAgentLLM, ChickAgentLLM
+from chick_agent.core.message import Message, MessageModel, ToolCall
+from chick_agent.core.store import JSONLSessionStore, SessionStore, SQLiteSessionStore
+from chick_agent.core.usage import TokenUsage, UsageMeter, UsageReporter
+from chick_agent.core.tracing import (
+    InMemoryTracer,
+    JSONLinesTracer,
+    OpenTelemetryTracer,
+    Tracer,
+    get_tracer,
+    set_tracer,
+)
 
 
-__all__ = ["Agent", "Config", "ChickAgentLLM", "Message"]
+__all__ = [
+    "Agent",
+    "Config",
+    "ChickAgentLLM",
+    "AsyncChickAgentLLM",
+    "Message",
+    "MessageModel",
+    "ToolCall",
+    "ResponseCache",
+    "Tracer",
+    "InMemoryTracer",
+    "JSONLinesTracer",
+    "OpenTelemetryTracer",
+    "get_tracer",
+    "set_tracer",
+    "TokenUsage",
+    "UsageMeter",
+    "UsageReporter",
+    "SessionStore",
+    "JSONLSessionStore",
+    "SQLiteSessionStore",
+]
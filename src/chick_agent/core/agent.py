@@ -1,8 +1,14 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+
 from chick_agent.core.exceptions import LLMException
-from chick_agent.core.llm import ChickAgentLLM
+from chick_agent.core.history import SUMMARY_PROMPT, HistoryManager, format_transcript
+from chick_agent.core.llm import AsyncChickAgentLLM, ChickAgentLLM
 from chick_agent.core.config import Config
 from chick_agent.core.message import Message
+from chick_agent.core.store import SessionStore
+from chick_agent.core.usage import TokenUsage, UsageMeter, usage_scope
 
 
 class Agent(ABC):
@@ -12,6 +18,8 @@ class Agent(ABC):
         llm: ChickAgentLLM,
         system_prompt: str | None = None,
         config: Config | None = None,
+        session_store: SessionStore | None = None,
+        session_id: str | None = None,
     ):
         if not llm:
             raise LLMException("llm client should be initialized.")
@@ -19,21 +27,72 @@ class Agent(ABC):
         self.llm = llm
         self.system_prompt = system_prompt
         self.config = config or Config()
-        self._history: list[Message] = []
+        # 未传入存储时按配置创建, 由 agent 负责关闭; 传入的存储可能被多个 agent 共享
+        self._owns_session_store = False
+        if session_store is None and self.config.history_store:
+            session_store = SessionStore.from_config(self.config)
+            self._owns_session_store = True
+        self.session_store = session_store
+        self.history = HistoryManager(
+            max_messages=self.config.max_history_length,
+            max_tokens=self.config.max_history_tokens,
+            summarizer=self._summarize_history
+            if self.config.summarize_history
+            else None,
+            store=session_store,
+            session_id=session_id or name,
+        )
+        self._history: list[Message] = self.history.messages
+        # token 用量: agent 生命周期内累计、当前对话累计(清空历史时归零)和最近一轮
+        self.usage = UsageMeter()
+        self.session_usage = UsageMeter()
+        self.last_turn_usage = TokenUsage()
 
     @abstractmethod
     def run(self, input_text: str, **kwargs) -> str:
         pass
 
     def add_message(self, message: Message):
-        self._history.append(message)
+        self.history.append(message)
+
+    def add_messages(self, messages: list[Message]):
+        self.history.extend(messages)
 
     def clear_history(self):
-        self._history.clear()
+        self.history.clear()
+        self.session_usage.reset()
+
+    @contextmanager
+    def _turn_usage(self, session: bool = True) -> Iterator[TokenUsage]:
+        # 统计一轮对话中全部 LLM 请求(包括工具调用后的后续请求)的用量, 失败的轮次同样计入
+        with usage_scope() as turn:
+            try:
+                yield turn
+            finally:
+                self.last_turn_usage = turn
+                self.usage.record(turn)
+                if session:
+                    self.session_usage.record(turn)
+
+    def _summarize_history(self, summary: str, messages: list[Message]) -> str:
+        # 在后台线程中执行, 异步 LLM 需换用同配置的同步客户端
+        llm = self.llm
+        if isinstance(llm, AsyncChickAgentLLM):
+            llm = ChickAgentLLM.from_llm(llm)
+        prompt = SUMMARY_PROMPT.format(
+            summary=summary or "无", transcript=format_transcript(messages)
+        )
+        return llm.invoke([{"role": "user", "content": prompt}])
 
     def get_history(self) -> list[Message]:
+        self.history.load()
         return self._history
 
+    def _close_history(self):
+        self.history.close()
+        if self._owns_session_store:
+            self.session_store.close()
+
     def __str__(self) -> str:
         return f"Agent(name={self.name}, provider={self.llm.provider})"
 
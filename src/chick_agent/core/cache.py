@@ -0,0 +1,178 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+
+from chick_agent.core.config import Config
+
+
+class ResponseCache:
+    # 两级响应缓存: 进程内 LRU + 可选的 SQLite 持久层, 两层都按 TTL 过期
+    def __init__(
+        self,
+        max_entries: int = 256,
+        path: str | None = None,
+        ttl: float | None = None,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.max_entries = max_entries
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._memory: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._disk_bytes = 0
+        if path:
+            self._open(path)
+
+    @classmethod
+    def from_config(cls, config: Config) -> "ResponseCache":
+        return cls(
+            max_entries=config.response_cache_max_entries,
+            path=config.response_cache_path,
+            ttl=config.response_cache_ttl,
+            max_bytes=config.response_cache_max_bytes,
+        )
+
+    def _open(self, path: str):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        if self.ttl is not None:
+            self._db.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)
+            )
+        self._db.commit()
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        self._disk_bytes = row[0]
+
+    @staticmethod
+    def make_key(kind: str, request: dict[str, object]) -> str:
+        payload = json.dumps(
+            [kind, request], sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and created < time.time() - self.ttl
+
+    def get(self, key: str) -> object | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+            value = self._disk_get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._memory_put(key, value[0], value[1])
+            return value[1]
+
+    def put(self, key: str, value: object):
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, now, value)
+            if self._db is not None:
+                self._disk_put(key, now, value)
+
+    def _memory_put(self, key: str, created: float, value: object):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str) -> tuple[float, object] | None:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT value, created FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if self._expired(row[1]):
+            self._disk_delete(key)
+            return None
+        self._db.execute(
+            "UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key)
+        )
+        self._db.commit()
+        return row[1], json.loads(row[0])
+
+    def _disk_put(self, key: str, created: float, value: object):
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        self._disk_delete(key)
+        self._db.execute(
+            "INSERT INTO responses (key, value, size, created, accessed) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, data, size, created, created),
+        )
+        self._disk_bytes += size
+        # 超出容量时按最近访问时间淘汰
+        while self._disk_bytes > self.max_bytes:
+            row = self._db.execute(
+                "SELECT key FROM responses ORDER BY accessed LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._disk_delete(row[0])
+        self._db.commit()
+
+    def _disk_delete(self, key: str):
+        row = self._db.execute(
+            "SELECT size FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._disk_bytes -= row[0]
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._disk_delete(key)
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+                self._disk_bytes = 0
+
+    def stats(self) -> dict[str, object]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
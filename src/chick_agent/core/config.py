@@ -1,8 +1,7 @@
 import os
 import tomllib
-from openai import api_key
+from typing import Literal
 from pydantic import BaseModel
-import httpx
 
 
 class Config(BaseModel):
@@ -16,6 +15,48 @@ class Config(BaseModel):
     debug: bool = False
     log_level: str = "INFO"
     max_history_length: int = 100
+    max_history_tokens: int | None = None
+    summarize_history: bool = False
+    max_tool_concurrency: int = 4
+    stop_stream_on_tool_call: bool = False
+    # 工具很多时每轮只提供与输入(及最近 tool_selection_context 条历史消息)最相关的
+    # top-k 个工具, None 为全部提供; pinned_tools 中的工具(或 MCP 服务)始终提供
+    tool_selection_top_k: int | None = None
+    tool_selection_context: int = 2
+    pinned_tools: list[str] = []
+    # 批量添加工具时每个 MCP 服务发现工具列表的超时(秒), 超时的服务降级注册, 后台继续连接
+    mcp_discovery_timeout: float | None = 30.0
+    # text: 提示词约定的 [TOOL_CALL:...] 文本协议; native: OpenAI 函数调用
+    tool_call_mode: Literal["text", "native"] = "text"
+    # 响应缓存(默认关闭): 未设置 path 时只使用进程内 LRU
+    response_cache: bool = False
+    response_cache_path: str | None = None
+    response_cache_ttl: float | None = None
+    response_cache_max_entries: int = 256
+    response_cache_max_bytes: int = 256 * 1024 * 1024
+    # 失败重试(指数退避 + 抖动)、对冲请求和按顺序故障转移的备用配置
+    max_retries: int = 2
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 8.0
+    hedge_requests: bool = False
+    hedge_delay: float | None = None
+    fallbacks: list["Config"] = []
+    # 进程内共享 HTTP 连接池的设置, 相同服务地址和设置的实例复用连接
+    http_max_connections: int | None = 100
+    http_max_keepalive_connections: int | None = 20
+    http_keepalive_expiry: float | None = 5.0
+    http2: bool = False
+    http_trust_env: bool = True
+    # 流式请求附带 stream_options.include_usage 以获取用量; 不支持该参数的服务需关闭
+    stream_usage: bool = True
+    # 大于 0 时 agent 按此间隔(秒)向标准错误输出汇报 token 用量
+    usage_report_interval: float | None = None
+    # 会话历史持久化(默认只在内存中): jsonl 在 history_store_path 目录下每个会话一个文件,
+    # sqlite 使用 history_store_path 指定的数据库文件; 追加的消息按间隔或条数批量落盘
+    history_store: Literal["jsonl", "sqlite"] | None = None
+    history_store_path: str = "sessions"
+    history_flush_interval: float = 0.2
+    history_flush_batch: int = 256
 
     @classmethod
     def from_env(cls) -> "Config":
@@ -49,7 +90,56 @@ class Config(BaseModel):
             log_level=sect.get("LOG_LEVEL", "INFO"),
             temperature=float(sect.get("temperature", 0.7)),
             max_tokens=int(sect.get("max_tokens", 4096)),
-            max_history=int(sect.get("max_history", 100)),
+            max_history_length=int(sect.get("max_history", 100)),
+            max_history_tokens=int(sect["max_history_tokens"])
+            if sect.get("max_history_tokens")
+            else None,
+            summarize_history=bool(sect.get("summarize_history", False)),
+            max_tool_concurrency=int(sect.get("max_tool_concurrency", 4)),
+            stop_stream_on_tool_call=bool(sect.get("stop_stream_on_tool_call", False)),
+            tool_call_mode=sect.get("tool_call_mode", "text"),
+            tool_selection_top_k=sect.get("tool_selection_top_k"),
+            tool_selection_context=int(sect.get("tool_selection_context", 2)),
+            pinned_tools=list(sect.get("pinned_tools", [])),
+            mcp_discovery_timeout=sect.get("mcp_discovery_timeout", 30.0),
+            response_cache=bool(sect.get("response_cache", False)),
+            response_cache_path=sect.get("response_cache_path"),
+            response_cache_ttl=sect.get("response_cache_ttl"),
+            response_cache_max_entries=int(
+                sect.get(
+                    "response_cache_max_entries",
+                    cls.model_fields["response_cache_max_entries"].default,
+                )
+            ),
+            response_cache_max_bytes=int(
+                sect.get(
+                    "response_cache_max_bytes",
+                    cls.model_fields["response_cache_max_bytes"].default,
+                )
+            ),
+            max_retries=int(sect.get("max_retries", 2)),
+            retry_base_delay=float(sect.get("retry_base_delay", 0.5)),
+            retry_max_delay=float(sect.get("retry_max_delay", 8.0)),
+            hedge_requests=bool(sect.get("hedge_requests", False)),
+            hedge_delay=sect.get("hedge_delay"),
+            http_max_connections=sect.get("http_max_connections", 100),
+            http_max_keepalive_connections=sect.get(
+                "http_max_keepalive_connections", 20
+            ),
+            http_keepalive_expiry=sect.get("http_keepalive_expiry", 5.0),
+            http2=bool(sect.get("http2", False)),
+            http_trust_env=bool(sect.get("http_trust_env", True)),
+            stream_usage=bool(sect.get("stream_usage", True)),
+            usage_report_interval=sect.get("usage_report_interval"),
+            history_store=sect.get("history_store"),
+            history_store_path=sect.get("history_store_path", "sessions"),
+            history_flush_interval=float(sect.get("history_flush_interval", 0.2)),
+            history_flush_batch=int(sect.get("history_flush_batch", 256)),
+            # fallbacks 为同一文件中其他配置节的名称列表
+            fallbacks=[
+                cls.from_toml(filename, id=fallback)
+                for fallback in sect.get("fallbacks", [])
+            ],
         )
 
     def to_dict(self) -> dict[str, object]:
@@ -8,3 +8,7 @@ class LLMException(ChickAgentException):
 
 class AgentException(ChickAgentException):
     pass
+
+
+class ToolArgumentError(ChickAgentException):
+    pass
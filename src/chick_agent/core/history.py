@@ -0,0 +1,246 @@
+import re
+import threading
+import warnings
+
+from collections.abc import Callable
+from concurrent import futures
+from functools import partial
+from typing import TYPE_CHECKING
+
+from chick_agent.core.message import Message, to_wire
+
+if TYPE_CHECKING:
+    from chick_agent.core.store import SessionStore
+
+_CJK_PATTERN = re.compile(r"[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]")
+# 每条消息在 chat 格式中的固定开销(角色、分隔符等)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """请将已有摘要和下面新增的对话合并为一份简洁的摘要, 保留关键事实、结论和未完成的事项, 只输出摘要内容。
+
+## 已有摘要
+{summary}
+
+## 新增对话
+{transcript}
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    # 不依赖分词器的粗略估算: CJK 字符约 1 token/字, 其余约 4 字符/token
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4 + MESSAGE_OVERHEAD_TOKENS
+
+
+Summarizer = Callable[[str, list[Message]], str]
+
+
+class HistoryManager:
+    def __init__(
+        self,
+        max_messages: int | None = 100,
+        max_tokens: int | None = None,
+        token_counter: Callable[[str], int] = estimate_tokens,
+        summarizer: Summarizer | None = None,
+        store: "SessionStore | None" = None,
+        session_id: str | None = None,
+    ):
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self.token_counter = token_counter
+        self.summarizer = summarizer
+        # 持久化存储: 新消息追加写入, 已有历史在首次使用时只加载提示词窗口所需的尾部
+        self.store = store
+        self.session_id = session_id
+        self._loaded = store is None
+        self.messages: list[Message] = []
+        self.summary = ""
+        # 与 messages 一一对应: 每条消息只计数一次, 发送格式也只构造一次
+        self._tokens: list[int] = []
+        self._wire: list[dict[str, str]] = []
+        # 上一轮窗口的起点(未对齐到用户消息)及其之后消息的 token 总数; 每轮从这里
+        # 按预算的变化前后移动, 开销只与新增消息数和预算变化有关, 与历史长度无关
+        self._window_cursor = 0
+        self._window_tokens = 0
+        self._summary_message: dict[str, str] | None = None
+        self._summary_tokens = 0
+        self._pending: list[Message] = []
+        self._summary_future: futures.Future | None = None
+        self._executor: futures.ThreadPoolExecutor | None = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self.messages)
+
+    def load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        messages = self.store.load_tail(self.session_id, self.max_messages)
+        if self.max_tokens is not None:
+            # 超出 token 预算的更早消息不会进入提示词, 无需保留在内存中
+            total, start = 0, len(messages)
+            while start > 0:
+                total += self.token_counter(messages[start - 1].content)
+                if total > self.max_tokens:
+                    break
+                start -= 1
+            messages = messages[start:]
+        # 与窗口一致, 从一条用户消息开始
+        start = 0
+        while start < len(messages) and messages[start].role != "user":
+            start += 1
+        # 加载的条数不超过 max_messages, 无需逐条检查淘汰, 直接批量构造各列
+        messages = messages[start:]
+        tokens = [self.token_counter(m.content) for m in messages]
+        self.messages[:0] = messages
+        self._tokens[:0] = tokens
+        self._wire[:0] = to_wire(messages)
+        self._window_cursor = 0
+        self._window_tokens = sum(self._tokens)
+
+    def append(self, message: Message):
+        self.extend((message,))
+
+    def extend(self, messages: list[Message] | tuple[Message, ...]):
+        # 一轮对话的消息一次性加入, 持久化存储也只追加一次
+        self.load()
+        for message in messages:
+            self._append(message)
+        if self.store is not None:
+            self.store.append(self.session_id, messages)
+
+    def _append(self, message: Message):
+        tokens = self.token_counter(message.content)
+        self.messages.append(message)
+        self._tokens.append(tokens)
+        self._wire.append(message.to_dict())
+        self._window_tokens += tokens
+        if self.max_messages is not None and len(self.messages) > self.max_messages:
+            self._evict(self._turn_boundary(len(self.messages) - self.max_messages))
+
+    def clear(self):
+        if self.store is not None:
+            self.store.delete(self.session_id)
+            self._loaded = True
+        self.messages.clear()
+        self._tokens.clear()
+        self._wire.clear()
+        self._window_cursor = 0
+        self._window_tokens = 0
+        with self._lock:
+            self._pending.clear()
+            if self._summary_future is not None:
+                self._summary_future.cancel()
+                self._summary_future = None
+            self.summary = ""
+            self._summary_tokens = 0
+            self._summary_message = None
+
+    def count_tokens(self, text: str) -> int:
+        return self.token_counter(text)
+
+    def prompt_messages(self, reserved_tokens: int = 0) -> list[dict[str, str]]:
+        # reserved_tokens 为系统提示词和本轮输入占用的预算
+        self.load()
+        self._schedule_summary()
+        start = self._window_start(reserved_tokens)
+        if start and self.summarizer:
+            # 超出窗口的旧消息移入后台摘要, 不再保留在内存中
+            self._evict(start)
+            start = 0
+        summary_message = self._summary_message
+        if summary_message is None:
+            return self._wire[start:]
+        return [summary_message, *self._wire[start:]]
+
+    def _window_start(self, reserved_tokens: int) -> int:
+        # 每轮按当前预算重新计算, 某一轮预留较多时不会让之后的轮次也丢掉历史;
+        # 只有移入摘要的消息才真正从 messages 中删除
+        if self.max_tokens is None:
+            return 0
+        budget = self.max_tokens - reserved_tokens - self._summary_tokens
+        start, tokens = self._window_cursor, self._window_tokens
+        # 新增消息或预算变小时起点后移, 预算变大时前移, 结果与从头扫描相同
+        while start < len(self._tokens) and tokens > budget:
+            tokens -= self._tokens[start]
+            start += 1
+        while start > 0 and tokens + self._tokens[start - 1] <= budget:
+            start -= 1
+            tokens += self._tokens[start]
+        self._window_cursor, self._window_tokens = start, tokens
+        return self._turn_boundary(start)
+
+    def _turn_boundary(self, start: int) -> int:
+        # 窗口总是从一条用户消息开始, 避免只保留半轮对话
+        while start < len(self.messages) and self.messages[start].role != "user":
+            start += 1
+        return start
+
+    def _evict(self, count: int):
+        if count <= 0:
+            return
+        evicted = self.messages[:count]
+        if count <= self._window_cursor:
+            self._window_cursor -= count
+        else:
+            self._window_tokens -= sum(self._tokens[self._window_cursor : count])
+            self._window_cursor = 0
+        del self.messages[:count]
+        del self._tokens[:count]
+        del self._wire[:count]
+        if self.summarizer:
+            with self._lock:
+                self._pending.extend(evicted)
+            self._schedule_summary()
+
+    def _schedule_summary(self):
+        with self._lock:
+            if not self._pending or self._closed:
+                return
+            if self._summary_future is not None and not self._summary_future.done():
+                return
+            if self._executor is None:
+                self._executor = futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="chick-agent-summary"
+                )
+            batch, self._pending = self._pending, []
+            future = self._executor.submit(self.summarizer, self.summary, batch)
+            self._summary_future = future
+        future.add_done_callback(partial(self._on_summary_done, batch))
+
+    def _on_summary_done(self, batch: list[Message], future: futures.Future):
+        # 期间历史被清空时丢弃过期的摘要
+        if future is not self._summary_future or future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            # 摘要失败时这批消息放回待摘要队列, 下次构造提示词时重试
+            with self._lock:
+                self._pending[:0] = batch
+            warnings.warn(f"历史摘要失败, 将在下一轮重试: {error}")
+            return
+        summary = future.result() or ""
+        with self._lock:
+            self.summary = summary
+            self._summary_tokens = self.token_counter(summary) if summary else 0
+            self._summary_message = (
+                {"role": "system", "content": f"以下是之前对话的摘要:\n{summary}"}
+                if summary
+                else None
+            )
+        # 摘要期间又有消息移出窗口时继续合并
+        self._schedule_summary()
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._closed = True
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def format_transcript(messages: list[Message]) -> str:
+    return "\n".join(f"[{msg.role}] {msg.content}" for msg in messages)
@@ -1,12 +1,29 @@
+import asyncio
 import os
-import httpx
+import threading
+import time
 
-from typing import Literal
-from collections.abc import Iterator
-
-from openai import OpenAI
+from typing import TYPE_CHECKING, Literal, override
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from concurrent import futures
 
+from chick_agent.core.cache import ResponseCache
+from chick_agent.core.config import Config
 from chick_agent.core.exceptions import ChickAgentException, LLMException
+from chick_agent.core.message import ToolCall
+from chick_agent.core.resilience import LatencyTracker, RetryPolicy, is_retryable
+from chick_agent.core.tracing import Span, Tracer, get_tracer
+from chick_agent.core.usage import TokenUsage, UsageMeter, record_usage
+from chick_agent.core.transport import (
+    HTTPSettings,
+    get_async_http_client,
+    get_http_client,
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+    from openai import AsyncOpenAI, OpenAI
 
 SUPPORTED_PROVIDERS = Literal[
     "openai",
@@ -25,7 +42,15 @@ class ChickAgentLLM:
         temperature: float = 0.7,
         max_tokens: int | None = None,
         timeout: int | None = None,
-        http_client: httpx.Client | None = None,
+        http_client: "httpx.Client | None" = None,
+        cache: ResponseCache | None = None,
+        retry_policy: RetryPolicy | None = None,
+        hedge_requests: bool = False,
+        hedge_delay: float | None = None,
+        fallbacks: list["ChickAgentLLM"] | None = None,
+        http_settings: HTTPSettings | None = None,
+        tracer: Tracer | None = None,
+        stream_usage: bool = True,
         **kwargs,
     ):
         # 优先使用传入参数，如果未提供，则从环境变量加载
@@ -34,6 +59,21 @@ class ChickAgentLLM:
         self.max_tokens = max_tokens
         self.timeout = timeout or int(os.getenv("LLM_TIMEOUT", "60"))
         self.kwargs = kwargs
+        self.cache = cache
+        self.retry_policy = retry_policy or RetryPolicy()
+        # 开启后主请求超过 p95 延迟(样本不足时为 hedge_delay)仍无首个结果, 向下一个端点发出对冲请求
+        self.hedge_requests = hedge_requests
+        self.hedge_delay = hedge_delay
+        # 按顺序故障转移的备用端点
+        self.fallbacks = fallbacks or []
+        self.latency = LatencyTracker()
+        # 未传入 http_client 时使用进程内按服务地址共享的连接池
+        self.http_settings = http_settings or HTTPSettings()
+        # 未指定时使用全局 tracer (默认不记录)
+        self.tracer = tracer
+        # 流式请求带上 stream_options.include_usage, 由最后一个数据块返回用量
+        self.stream_usage = stream_usage
+        self.usage = UsageMeter()
 
         self.provider = (
             (provider or os.getenv("LLM_PROVIDER", "")).lower() if provider else None
@@ -45,7 +85,8 @@ class ChickAgentLLM:
         if not all([self.api_key, self.base_url]):
             raise ChickAgentException("未找到合适的api_key或api地址")
             return
-        self._client = self._create_client(http_client)
+        self._http_client = http_client
+        self._openai_client = None
 
     def _resolve_credentials(
         self, api_key: str | None = None, base_url: str | None = None
@@ -77,72 +118,783 @@ class ChickAgentLLM:
         else:
             return "deepseek-chat"
 
-    def _create_client(self, http_client: httpx.Client = None) -> OpenAI:
+    @classmethod
+    def from_config(cls, config: Config, **kwargs) -> "ChickAgentLLM":
+        return cls(
+            model=config.model,
+            api_key=config.api_key,
+            base_url=config.base_url,
+            provider=config.provider,
+            temperature=config.temperature,
+            max_tokens=config.max_tokens,
+            timeout=config.timeout,
+            cache=ResponseCache.from_config(config) if config.response_cache else None,
+            retry_policy=RetryPolicy.from_config(config),
+            hedge_requests=config.hedge_requests,
+            hedge_delay=config.hedge_delay,
+            fallbacks=[
+                cls.from_config(fallback, **kwargs) for fallback in config.fallbacks
+            ],
+            http_settings=HTTPSettings.from_config(config),
+            stream_usage=config.stream_usage,
+            **kwargs,
+        )
+
+    @classmethod
+    def from_llm(
+        cls,
+        llm: "ChickAgentLLM",
+        http_client: "httpx.Client | httpx.AsyncClient | None" = None,
+    ) -> "ChickAgentLLM":
+        new_llm = cls(
+            model=llm.model,
+            api_key=llm.api_key,
+            base_url=llm.base_url,
+            provider=llm.provider,
+            temperature=llm.temperature,
+            max_tokens=llm.max_tokens,
+            timeout=llm.timeout,
+            http_client=http_client,
+            cache=llm.cache,
+            retry_policy=llm.retry_policy,
+            hedge_requests=llm.hedge_requests,
+            hedge_delay=llm.hedge_delay,
+            fallbacks=[cls.from_llm(fallback) for fallback in llm.fallbacks],
+            http_settings=llm.http_settings,
+            tracer=llm.tracer,
+            stream_usage=llm.stream_usage,
+        )
+        new_llm.latency = llm.latency
+        new_llm.usage = llm.usage
+        return new_llm
+
+    @property
+    def _client(self) -> "OpenAI":
+        # openai 包导入较慢, 推迟到首次请求时再创建客户端
+        if self._openai_client is None:
+            self._openai_client = self._create_client(self._http_client)
+        return self._openai_client
+
+    def _create_client(self, http_client: "httpx.Client | None" = None) -> "OpenAI":
+        from openai import OpenAI
+
         return OpenAI(
             api_key=self.api_key,
             base_url=self.base_url,
             timeout=self.timeout,
-            http_client=http_client,
+            # 重试由 _call 统一处理, 避免与 SDK 内置重试叠加并推迟对冲
+            max_retries=0,
+            http_client=http_client
+            or get_http_client(self.base_url, self.http_settings),
         )
 
+    def _build_request(
+        self, messages: list[dict[str, str]], **kwargs
+    ) -> dict[str, object]:
+        temperature = kwargs.pop("temperature", None)
+        max_tokens = kwargs.pop("max_tokens", None)
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature if temperature is None else temperature,
+            "max_tokens": self.max_tokens if max_tokens is None else max_tokens,
+            **kwargs,
+        }
+
+    @staticmethod
+    def _format_message(message: object) -> str:
+        full_response = ""
+        if hasattr(message, "reasoning_content") and message.reasoning_content:
+            full_response = f"<think>{message.reasoning_content}</think>"
+        return f"{full_response}{message.content or ''}"
+
+    @staticmethod
+    def _message_tool_calls(message: object) -> list[ToolCall]:
+        return [
+            ToolCall(
+                id=tool_call.id,
+                name=tool_call.function.name,
+                arguments=tool_call.function.arguments or "",
+            )
+            for tool_call in getattr(message, "tool_calls", None) or []
+        ]
+
+    def _cache_key(self, kind: str, request: dict[str, object]) -> str | None:
+        if self.cache is None:
+            return None
+        return ResponseCache.make_key(kind, request)
+
+    def _cache_get(self, key: str | None) -> object | None:
+        return self.cache.get(key) if key else None
+
+    def _cache_put(self, key: str | None, value: object):
+        if key:
+            self.cache.put(key, value)
+
+    def _span(self, kind: str, cached: bool, parent: Span | None = None) -> Span:
+        return (self.tracer or get_tracer()).span(
+            "llm.request",
+            {"model": self.model, "kind": kind, "cached": cached},
+            parent=parent,
+        )
+
+    def _stream_options(self) -> dict[str, object]:
+        if not self.stream_usage:
+            return {}
+        return {"stream_options": {"include_usage": True}}
+
+    def _record_usage(
+        self, usage: object | None, model: str | None, start: float, span: Span
+    ):
+        # 用量累计到 LLM 自身、当前上下文中的统计范围(如 agent 的本轮对话)和 span 属性;
+        # 服务端未返回用量时不记录
+        if usage is None:
+            return
+        token_usage = TokenUsage.from_openai(usage, time.perf_counter() - start)
+        self.usage.record(token_usage, model or self.model)
+        record_usage(token_usage)
+        span.set_attribute("prompt_tokens", token_usage.prompt_tokens)
+        span.set_attribute("completion_tokens", token_usage.completion_tokens)
+        span.set_attribute("reasoning_tokens", token_usage.reasoning_tokens)
+        span.set_attribute("cached_prompt_tokens", token_usage.cached_prompt_tokens)
+
+    def _hedge_deadline(self, kind: str, endpoint: "ChickAgentLLM") -> float | None:
+        if not self.hedge_requests:
+            return None
+        p95 = endpoint.latency.percentile(kind)
+        return p95 if p95 is not None else self.hedge_delay
+
+    def _call[T](
+        self,
+        kind: str,
+        opener: Callable[["ChickAgentLLM", dict[str, object]], T],
+        messages: list[dict[str, object]],
+        **kwargs,
+    ) -> T:
+        # 依次尝试主端点和备用端点: 可重试的错误在同一端点上退避重试, 其他错误直接切换端点
+        endpoints = [self, *self.fallbacks]
+        error = None
+        for i, endpoint in enumerate(endpoints):
+            backup = endpoints[i + 1] if i + 1 < len(endpoints) else None
+            for attempt in range(self.retry_policy.max_retries + 1):
+                try:
+                    return self._hedged_call(
+                        kind, opener, endpoint, backup, messages, kwargs
+                    )
+                except Exception as e:
+                    error = e
+                    if not is_retryable(e) or attempt == self.retry_policy.max_retries:
+                        break
+                    time.sleep(self.retry_policy.delay(attempt))
+        raise error
+
+    def _hedged_call[T](
+        self,
+        kind: str,
+        opener: Callable[["ChickAgentLLM", dict[str, object]], T],
+        endpoint: "ChickAgentLLM",
+        backup: "ChickAgentLLM | None",
+        messages: list[dict[str, object]],
+        kwargs: dict[str, object],
+    ) -> T:
+        deadline = self._hedge_deadline(kind, endpoint) if backup else None
+        if deadline is None:
+            return _timed_call(kind, opener, endpoint, messages, kwargs)
+        executor = _get_hedge_executor()
+        primary = executor.submit(_timed_call, kind, opener, endpoint, messages, kwargs)
+        try:
+            return primary.result(timeout=deadline)
+        except futures.TimeoutError:
+            pass
+        hedge = executor.submit(_timed_call, kind, opener, backup, messages, kwargs)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            winners = [future for future in done if future.exception() is None]
+            if winners:
+                # 落败的请求完成后关闭其连接
+                for future in [*winners[1:], *pending]:
+                    future.add_done_callback(_discard_result)
+                return winners[0].result()
+            error = next(iter(done)).exception()
+        raise error
+
     def think(
-        self, messages: list[dict[str, str]], temperature: float | None = None
-    ) -> Iterator[str]:
-        is_thinking_start = False
-        is_answering_start = False
+        self,
+        messages: list[dict[str, object]],
+        temperature: float | None = None,
+        tools: list[dict[str, object]] | None = None,
+    ) -> Iterator[str | ToolCall]:
+        # 传入 tools 时, 流中完整的函数调用以 ToolCall 对象产出, 其余为文本块
+        extra = {"tools": tools} if tools else {}
+        request = self._build_request(
+            messages, temperature=temperature, stream=True, **extra
+        )
+        key = self._cache_key("think", request)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._span("think", cached=True).end()
+            yield from _decode_chunks(cached)
+            return
+        tagger = _ReasoningTagger()
+        accumulator = _ToolCallAccumulator()
+        chunks = []
+        # 生成器在 yield 处挂起, span 不设为当前 span, 以免调用方的后续 span 误挂在其下
+        tracer = self.tracer or get_tracer()
+        span = self._span("think", cached=False)
+        stream_span = None
+        usage_chunk = None
+        start = time.perf_counter()
         try:
-            response = self._client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature
-                if temperature is not None
-                else self.temperature,
-                max_tokens=self.max_tokens,
-                stream=True,
-            )
-            for chunk in response:
-                if (not chunk.choices) or len(chunk.choices) == 0:
-                    break
-                delta = chunk.choices[0].delta
-                if hasattr(delta, "reasoning_content"):
-                    reasoning_content = delta.reasoning_content
-                    if reasoning_content:
-                        if not is_thinking_start:
-                            yield "<think>"
-                            is_thinking_start = True
-                        yield reasoning_content
-                if hasattr(delta, "content"):
-                    content = delta.content or ""
-                    if content:
-                        if not is_answering_start and is_thinking_start:
-                            yield f"</think>"
-                            is_answering_start = True
-                        yield content
-            print()
+            with tracer.span("llm.ttft", parent=span):
+                stream = self._call(
+                    "think",
+                    _open_stream,
+                    messages,
+                    temperature=temperature,
+                    **extra,
+                    **self._stream_options(),
+                )
+            stream_span = tracer.span("llm.stream", parent=span)
+            # 调用方提前结束迭代时关闭流, 释放连接
+            with stream.response:
+                for chunk in stream:
+                    # 开启 include_usage 时最后一个数据块没有 choices, 只携带用量
+                    if chunk.usage:
+                        usage_chunk = chunk
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    for piece in tagger.feed(delta) + accumulator.feed(delta):
+                        chunks.append(piece)
+                        yield piece
+                for piece in accumulator.flush():
+                    chunks.append(piece)
+                    yield piece
+            if usage_chunk is not None:
+                self._record_usage(usage_chunk.usage, usage_chunk.model, start, span)
         except Exception as e:
+            span.record_exception(e)
             raise LLMException(f"调用 {self.model} 模型失败: {e}")
+        finally:
+            if stream_span is not None:
+                stream_span.set_attribute("chunks", len(chunks))
+                stream_span.end()
+            span.end()
+        # 只缓存完整读完的流
+        self._cache_put(key, _encode_chunks(chunks))
 
-    def invoke(self, messages: list[dict[str, str]], **kwargs) -> str:
-        full_response = ""
+    def invoke(self, messages: list[dict[str, object]], **kwargs) -> str:
+        request = self._build_request(messages, **kwargs)
+        key = self._cache_key("invoke", request)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._span("invoke", cached=True).end()
+            return cached
         try:
-            response = self._client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=kwargs.get("temperature", self.temperature),
-                max_tokens=kwargs.get("max_tokens", self.max_tokens),
-                **{
-                    k: v
-                    for k, v in kwargs.items()
-                    if k not in ["temperature", "max_tokens"]
-                },
+            with self._span("invoke", cached=False) as span:
+                start = time.perf_counter()
+                response = self._call("invoke", _create_completion, messages, **kwargs)
+                self._record_usage(response.usage, response.model, start, span)
+            result = self._format_message(response.choices[0].message)
+        except Exception as e:
+            raise LLMException(f"调用 {self.model} 模型失败: {e}")
+        self._cache_put(key, result)
+        return result
+
+    def invoke_with_tools(
+        self,
+        messages: list[dict[str, object]],
+        tools: list[dict[str, object]],
+        **kwargs,
+    ) -> tuple[str, list[ToolCall]]:
+        request = self._build_request(messages, tools=tools, **kwargs)
+        key = self._cache_key("invoke_with_tools", request)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._span("invoke_with_tools", cached=True).end()
+            return cached[0], _decode_chunks(cached[1])
+        try:
+            with self._span("invoke_with_tools", cached=False) as span:
+                start = time.perf_counter()
+                response = self._call(
+                    "invoke", _create_completion, messages, tools=tools, **kwargs
+                )
+                self._record_usage(response.usage, response.model, start, span)
+            message = response.choices[0].message
+            result = self._format_message(message), self._message_tool_calls(message)
+        except Exception as e:
+            raise LLMException(f"调用 {self.model} 模型失败: {e}")
+        self._cache_put(key, [result[0], _encode_chunks(result[1])])
+        return result
+
+    def batch(
+        self,
+        requests: Iterable[list[dict[str, object]]],
+        concurrency: int = 8,
+        return_exceptions: bool = False,
+        **kwargs,
+    ) -> list[str | Exception]:
+        # 同步客户端是线程安全的, 用线程池并发执行, 结果与输入顺序一致
+        def call(messages: list[dict[str, object]]) -> str | Exception:
+            try:
+                return self.invoke(messages, **kwargs)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        with futures.ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="chick-agent-batch"
+        ) as executor:
+            return list(executor.map(call, requests))
+
+
+class AsyncChickAgentLLM(ChickAgentLLM):
+    def __init__(
+        self,
+        model: str | None = None,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        provider: SUPPORTED_PROVIDERS | None = None,
+        temperature: float = 0.7,
+        max_tokens: int | None = None,
+        timeout: int | None = None,
+        http_client: "httpx.AsyncClient | None" = None,
+        cache: ResponseCache | None = None,
+        retry_policy: RetryPolicy | None = None,
+        hedge_requests: bool = False,
+        hedge_delay: float | None = None,
+        fallbacks: list["ChickAgentLLM"] | None = None,
+        http_settings: HTTPSettings | None = None,
+        tracer: Tracer | None = None,
+        stream_usage: bool = True,
+        **kwargs,
+    ):
+        super().__init__(
+            model=model,
+            api_key=api_key,
+            base_url=base_url,
+            provider=provider,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            http_client=http_client,
+            cache=cache,
+            retry_policy=retry_policy,
+            hedge_requests=hedge_requests,
+            hedge_delay=hedge_delay,
+            fallbacks=fallbacks,
+            http_settings=http_settings,
+            tracer=tracer,
+            stream_usage=stream_usage,
+            **kwargs,
+        )
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    @override
+    def _client(self) -> "AsyncOpenAI":
+        # 共享的异步连接池绑定在事件循环上, 换了循环(如多次 asyncio.run)时按新循环重建;
+        # 调用方传入的 http_client 由调用方负责其所属的循环
+        if self._http_client is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if self._openai_client is not None and self._client_loop is not loop:
+                self._openai_client = None
+            self._client_loop = loop
+        return super()._client
+
+    @override
+    def _create_client(
+        self, http_client: "httpx.AsyncClient | None" = None
+    ) -> "AsyncOpenAI":
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=self.timeout,
+            # 重试由 _call 统一处理, 避免与 SDK 内置重试叠加并推迟对冲
+            max_retries=0,
+            http_client=http_client
+            or get_async_http_client(self.base_url, self.http_settings),
+        )
+
+    @override
+    async def _call[T](
+        self,
+        kind: str,
+        opener: Callable[["ChickAgentLLM", dict[str, object]], Awaitable[T]],
+        messages: list[dict[str, object]],
+        **kwargs,
+    ) -> T:
+        endpoints = [self, *self.fallbacks]
+        error = None
+        for i, endpoint in enumerate(endpoints):
+            backup = endpoints[i + 1] if i + 1 < len(endpoints) else None
+            for attempt in range(self.retry_policy.max_retries + 1):
+                try:
+                    return await self._hedged_call(
+                        kind, opener, endpoint, backup, messages, kwargs
+                    )
+                except Exception as e:
+                    error = e
+                    if not is_retryable(e) or attempt == self.retry_policy.max_retries:
+                        break
+                    await asyncio.sleep(self.retry_policy.delay(attempt))
+        raise error
+
+    @override
+    async def _hedged_call[T](
+        self,
+        kind: str,
+        opener: Callable[["ChickAgentLLM", dict[str, object]], Awaitable[T]],
+        endpoint: "ChickAgentLLM",
+        backup: "ChickAgentLLM | None",
+        messages: list[dict[str, object]],
+        kwargs: dict[str, object],
+    ) -> T:
+        deadline = self._hedge_deadline(kind, endpoint) if backup else None
+        if deadline is None:
+            return await _atimed_call(kind, opener, endpoint, messages, kwargs)
+        tasks = {
+            asyncio.ensure_future(
+                _atimed_call(kind, opener, endpoint, messages, kwargs)
             )
+        }
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=deadline)
+            if not done:
+                tasks.add(
+                    asyncio.ensure_future(
+                        _atimed_call(kind, opener, backup, messages, kwargs)
+                    )
+                )
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winners = [task for task in done if task.exception() is None]
+                if winners:
+                    for task in winners[1:]:
+                        await _adiscard_result(task.result())
+                    return winners[0].result()
+                error = next(iter(done)).exception()
+            raise error
+        finally:
+            # 异步路径可以直接取消落败的请求
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    @override
+    async def think(
+        self,
+        messages: list[dict[str, object]],
+        temperature: float | None = None,
+        tools: list[dict[str, object]] | None = None,
+    ) -> AsyncIterator[str | ToolCall]:
+        extra = {"tools": tools} if tools else {}
+        request = self._build_request(
+            messages, temperature=temperature, stream=True, **extra
+        )
+        key = self._cache_key("think", request)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._span("think", cached=True).end()
+            for piece in _decode_chunks(cached):
+                yield piece
+            return
+        tagger = _ReasoningTagger()
+        accumulator = _ToolCallAccumulator()
+        chunks = []
+        tracer = self.tracer or get_tracer()
+        span = self._span("think", cached=False)
+        stream_span = None
+        usage_chunk = None
+        start = time.perf_counter()
+        try:
+            with tracer.span("llm.ttft", parent=span):
+                stream = await self._call(
+                    "think",
+                    _aopen_stream,
+                    messages,
+                    temperature=temperature,
+                    **extra,
+                    **self._stream_options(),
+                )
+            stream_span = tracer.span("llm.stream", parent=span)
+            async with stream.response:
+                async for chunk in stream:
+                    if chunk.usage:
+                        usage_chunk = chunk
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    for piece in tagger.feed(delta) + accumulator.feed(delta):
+                        chunks.append(piece)
+                        yield piece
+                for piece in accumulator.flush():
+                    chunks.append(piece)
+                    yield piece
+            if usage_chunk is not None:
+                self._record_usage(usage_chunk.usage, usage_chunk.model, start, span)
+        except Exception as e:
+            span.record_exception(e)
+            raise LLMException(f"调用 {self.model} 模型失败: {e}")
+        finally:
+            if stream_span is not None:
+                stream_span.set_attribute("chunks", len(chunks))
+                stream_span.end()
+            span.end()
+        self._cache_put(key, _encode_chunks(chunks))
+
+    @override
+    async def invoke(self, messages: list[dict[str, object]], **kwargs) -> str:
+        request = self._build_request(messages, **kwargs)
+        key = self._cache_key("invoke", request)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._span("invoke", cached=True).end()
+            return cached
+        try:
+            with self._span("invoke", cached=False) as span:
+                start = time.perf_counter()
+                response = await self._call(
+                    "invoke", _acreate_completion, messages, **kwargs
+                )
+                self._record_usage(response.usage, response.model, start, span)
+            result = self._format_message(response.choices[0].message)
+        except Exception as e:
+            raise LLMException(f"调用 {self.model} 模型失败: {e}")
+        self._cache_put(key, result)
+        return result
+
+    @override
+    async def invoke_with_tools(
+        self,
+        messages: list[dict[str, object]],
+        tools: list[dict[str, object]],
+        **kwargs,
+    ) -> tuple[str, list[ToolCall]]:
+        request = self._build_request(messages, tools=tools, **kwargs)
+        key = self._cache_key("invoke_with_tools", request)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._span("invoke_with_tools", cached=True).end()
+            return cached[0], _decode_chunks(cached[1])
+        try:
+            with self._span("invoke_with_tools", cached=False) as span:
+                start = time.perf_counter()
+                response = await self._call(
+                    "invoke", _acreate_completion, messages, tools=tools, **kwargs
+                )
+                self._record_usage(response.usage, response.model, start, span)
             message = response.choices[0].message
-            if hasattr(message, "reasoning_content") and message.reasoning_content:
-                full_response = f"<think>{message.reasoning_content}</think>"
-            full_response = f"{full_response}{response.choices[0].message.content}"
-            return full_response
+            result = self._format_message(message), self._message_tool_calls(message)
         except Exception as e:
             raise LLMException(f"调用 {self.model} 模型失败: {e}")
+        self._cache_put(key, [result[0], _encode_chunks(result[1])])
+        return result
+
+    @override
+    async def batch(
+        self,
+        requests: Iterable[list[dict[str, object]]],
+        concurrency: int = 8,
+        return_exceptions: bool = False,
+        **kwargs,
+    ) -> list[str | Exception]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(messages: list[dict[str, object]]) -> str:
+            async with semaphore:
+                return await self.invoke(messages, **kwargs)
+
+        return await asyncio.gather(
+            *(call(messages) for messages in requests),
+            return_exceptions=return_exceptions,
+        )
+
+
+class _OpenedStream:
+    # 已收到首个数据块的流式响应, 对冲请求以首个数据块的到达先后决定胜负
+    def __init__(self, response: object, iterator: object, first: object | None):
+        self.response = response
+        self.iterator = iterator
+        self.first = first
+
+    def __iter__(self) -> Iterator[object]:
+        if self.first is not None:
+            yield self.first
+        yield from self.iterator
+
+    async def __aiter__(self) -> AsyncIterator[object]:
+        if self.first is not None:
+            yield self.first
+        async for chunk in self.iterator:
+            yield chunk
+
+
+def _create_completion(llm: ChickAgentLLM, request: dict[str, object]) -> object:
+    return llm._client.chat.completions.create(**request)
+
+
+def _open_stream(llm: ChickAgentLLM, request: dict[str, object]) -> _OpenedStream:
+    response = llm._client.chat.completions.create(**request, stream=True)
+    iterator = iter(response)
+    try:
+        first = next(iterator, None)
+    except BaseException:
+        response.close()
+        raise
+    return _OpenedStream(response, iterator, first)
+
+
+async def _acreate_completion(llm: ChickAgentLLM, request: dict[str, object]) -> object:
+    return await llm._client.chat.completions.create(**request)
+
+
+async def _aopen_stream(
+    llm: ChickAgentLLM, request: dict[str, object]
+) -> _OpenedStream:
+    response = await llm._client.chat.completions.create(**request, stream=True)
+    iterator = response.__aiter__()
+    try:
+        first = await anext(iterator, None)
+    except BaseException:
+        await response.close()
+        raise
+    return _OpenedStream(response, iterator, first)
+
+
+def _timed_call[T](
+    kind: str,
+    opener: Callable[[ChickAgentLLM, dict[str, object]], T],
+    endpoint: ChickAgentLLM,
+    messages: list[dict[str, object]],
+    kwargs: dict[str, object],
+) -> T:
+    # 请求按各端点自己的模型构造, 延迟记在该端点上
+    request = endpoint._build_request(messages, **kwargs)
+    start = time.perf_counter()
+    result = opener(endpoint, request)
+    endpoint.latency.record(kind, time.perf_counter() - start)
+    return result
+
+
+async def _atimed_call[T](
+    kind: str,
+    opener: Callable[[ChickAgentLLM, dict[str, object]], Awaitable[T]],
+    endpoint: ChickAgentLLM,
+    messages: list[dict[str, object]],
+    kwargs: dict[str, object],
+) -> T:
+    request = endpoint._build_request(messages, **kwargs)
+    start = time.perf_counter()
+    result = await opener(endpoint, request)
+    endpoint.latency.record(kind, time.perf_counter() - start)
+    return result
+
+
+def _discard_result(future: futures.Future):
+    if future.cancelled() or future.exception() is not None:
+        return
+    result = future.result()
+    if isinstance(result, _OpenedStream):
+        result.response.close()
+
+
+async def _adiscard_result(result: object):
+    if isinstance(result, _OpenedStream):
+        await result.response.close()
+
+
+_hedge_executor: futures.ThreadPoolExecutor | None = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> futures.ThreadPoolExecutor:
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = futures.ThreadPoolExecutor(
+                max_workers=32, thread_name_prefix="chick-agent-hedge"
+            )
+        return _hedge_executor
+
+
+def _encode_chunks(chunks: list[str | ToolCall]) -> list[object]:
+    return [c.model_dump() if isinstance(c, ToolCall) else c for c in chunks]
+
+
+def _decode_chunks(chunks: list[object]) -> list[str | ToolCall]:
+    return [ToolCall(**c) if isinstance(c, dict) else c for c in chunks]
+
+
+class _ReasoningTagger:
+    # 将流式增量中的 reasoning_content / content 转换为带 <think> 标记的文本块
+    def __init__(self):
+        self.is_thinking_start = False
+        self.is_answering_start = False
+
+    def feed(self, delta: object) -> list[str]:
+        pieces = []
+        reasoning_content = getattr(delta, "reasoning_content", None)
+        if reasoning_content:
+            if not self.is_thinking_start:
+                pieces.append("<think>")
+                self.is_thinking_start = True
+            pieces.append(reasoning_content)
+        content = getattr(delta, "content", None)
+        if content:
+            if not self.is_answering_start and self.is_thinking_start:
+                pieces.append("</think>")
+                self.is_answering_start = True
+            pieces.append(content)
+        return pieces
+
+
+class _ToolCallAccumulator:
+    # 按 index 拼接流式 tool_calls 增量, 出现下一个 index 时前一个调用即已完整
+    def __init__(self):
+        self._pending: dict[int, dict[str, object]] = {}
+
+    def feed(self, delta: object) -> list[ToolCall]:
+        completed = []
+        for tool_call in getattr(delta, "tool_calls", None) or []:
+            if tool_call.index not in self._pending:
+                completed.extend(self.flush())
+            entry = self._pending.setdefault(
+                tool_call.index, {"id": "", "name": "", "arguments": []}
+            )
+            if tool_call.id:
+                entry["id"] = tool_call.id
+            function = tool_call.function
+            if function is not None:
+                if function.name:
+                    entry["name"] += function.name
+                if function.arguments:
+                    entry["arguments"].append(function.arguments)
+        return completed
+
+    def flush(self) -> list[ToolCall]:
+        completed = [
+            ToolCall(
+                id=entry["id"],
+                name=entry["name"],
+                arguments="".join(entry["arguments"]),
+            )
+            for _, entry in sorted(self._pending.items())
+        ]
+        self._pending.clear()
+        return completed
 
 
 if __name__ == "__main__":
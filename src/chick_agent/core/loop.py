@@ -0,0 +1,66 @@
+import asyncio
+import atexit
+import contextvars
+import threading
+
+from collections.abc import Coroutine
+from concurrent import futures
+
+# 进程内共享的后台事件循环, 同步代码通过 run_coroutine_threadsafe 提交协程,
+# 使 MCP 会话等长生命周期的异步资源可以跨调用存活
+_loop: asyncio.AbstractEventLoop | None = None
+_thread: threading.Thread | None = None
+_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_loop.run_forever, name="chick-agent-loop", daemon=True
+            )
+            _thread.start()
+        return _loop
+
+
+def in_background_loop() -> bool:
+    return _thread is not None and threading.current_thread() is _thread
+
+
+def submit[T](
+    coro: Coroutine[object, object, T],
+    loop: asyncio.AbstractEventLoop | None = None,
+) -> futures.Future[T]:
+    # 协程在调用方的 contextvars 副本中运行, 当前 tracing span 等上下文随之传递
+    return asyncio.run_coroutine_threadsafe(
+        _run_in_context(coro, contextvars.copy_context()),
+        loop or get_background_loop(),
+    )
+
+
+async def _run_in_context[T](
+    coro: Coroutine[object, object, T], context: contextvars.Context
+) -> T:
+    return await asyncio.get_running_loop().create_task(coro, context=context)
+
+
+def run_sync[T](coro: Coroutine[object, object, T], timeout: float | None = None) -> T:
+    if in_background_loop():
+        coro.close()
+        raise RuntimeError("run_sync() 不能在后台事件循环线程中调用, 请直接 await")
+    return submit(coro).result(timeout)
+
+
+@atexit.register
+def shutdown_background_loop():
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop = _thread = None
+    if loop is None:
+        return
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
@@ -1,3 +1,6 @@
+import time
+
+from collections.abc import Iterable
 from datetime import datetime
 from pydantic import BaseModel
 from typing import Literal, override
@@ -5,26 +8,101 @@ from typing import Literal, override
 MessageRole = Literal["user", "assistant", "system", "tool"]
 
 
-class Message(BaseModel):
+def now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+class Message:
+    # 对话历史中数量最多的对象: 使用 __slots__ 且不做校验, 时间戳为毫秒整数,
+    # metadata 在首次访问时才创建; 需要 pydantic 模型时使用 to_model()
+    __slots__ = ("content", "role", "timestamp", "_metadata")
+
+    def __init__(
+        self,
+        content: str,
+        role: MessageRole,
+        timestamp: int | None = None,
+        metadata: dict[str, object] | None = None,
+    ):
+        self.content = content
+        self.role = role
+        self.timestamp = now_ms() if timestamp is None else timestamp
+        self._metadata = metadata or None
+
+    @property
+    def metadata(self) -> dict[str, object]:
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @property
+    def has_metadata(self) -> bool:
+        return bool(self._metadata)
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp / 1000)
+
+    def to_dict(self) -> dict[str, object]:
+        return {"role": self.role, "content": self.content}
+
+    def to_model(self) -> "MessageModel":
+        return MessageModel(
+            content=self.content,
+            role=self.role,
+            timestamp=self.created_at,
+            metadata=dict(self._metadata or {}),
+        )
+
+    @classmethod
+    def from_model(cls, model: "MessageModel") -> "Message":
+        return cls(
+            model.content,
+            model.role,
+            int(model.timestamp.timestamp() * 1000) if model.timestamp else None,
+            dict(model.metadata),
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Message):
+            return NotImplemented
+        return (
+            self.role == other.role
+            and self.content == other.content
+            and self.timestamp == other.timestamp
+            and (self._metadata or None) == (other._metadata or None)
+        )
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"Message(content={self.content!r}, role={self.role!r}, "
+            f"timestamp={self.timestamp})"
+        )
+
+    def __str__(self) -> str:
+        return f"[{self.role}] {self.content}"
+
+
+def to_wire(messages: Iterable[Message]) -> list[dict[str, object]]:
+    # 批量转换为 OpenAI chat 消息格式
+    return [{"role": m.role, "content": m.content} for m in messages]
+
+
+class MessageModel(BaseModel):
+    # Message 的 pydantic 视图, 用于需要校验或序列化为 JSON schema 的场景
     content: str
     role: MessageRole
     timestamp: datetime | None = None
-    metadata: dict[str, object] | None = None
-
-    def __init__(self, content: str, role: MessageRole, **kwargs):
-        super().__init__(
-            content=content,
-            role=role,
-            timestamp=kwargs.get("timestamp", datetime.now()),
-            metadata=kwargs.get("metadata", {}),
-        )
-
-    def to_dict(self) -> dict[str, object]:
-        return {
-            "role": self.role,
-            "content": self.content,
-        }
+    metadata: dict[str, object] = {}
 
     @override
     def __str__(self) -> str:
         return f"[{self.role}] {self.content}"
+
+
+class ToolCall(BaseModel):
+    id: str
+    name: str
+    arguments: str
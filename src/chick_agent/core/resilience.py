@@ -0,0 +1,63 @@
+import random
+import sys
+import threading
+
+from collections import deque
+
+from pydantic import BaseModel
+
+from chick_agent.core.config import Config
+
+
+class RetryPolicy(BaseModel):
+    max_retries: int = 2
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    @classmethod
+    def from_config(cls, config: Config) -> "RetryPolicy":
+        return cls(
+            max_retries=config.max_retries,
+            base_delay=config.retry_base_delay,
+            max_delay=config.retry_max_delay,
+        )
+
+    def delay(self, attempt: int) -> float:
+        # 指数退避 + 全抖动, 避免大量客户端同时重试
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+def is_retryable(error: BaseException) -> bool:
+    # 未导入的模块不可能抛出对应的异常, 无需为判断类型而导入
+    openai = sys.modules.get("openai")
+    if openai is not None:
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in (408, 409, 429) or error.status_code >= 500
+    httpx = sys.modules.get("httpx")
+    return httpx is not None and isinstance(error, httpx.TransportError)
+
+
+class LatencyTracker:
+    # 按请求类型记录最近的延迟样本, 样本足够时给出分位数作为对冲请求的触发时间
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(kind)
+            if samples is None:
+                samples = self._samples[kind] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, kind: str, q: float = 0.95) -> float | None:
+        with self._lock:
+            samples = self._samples.get(kind)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
@@ -0,0 +1,388 @@
+import json
+import os
+import sqlite3
+import threading
+import warnings
+
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator
+from typing import IO
+from urllib.parse import quote, unquote
+
+from chick_agent.core.config import Config
+from chick_agent.core.message import Message
+
+
+def _to_record(message: Message) -> dict[str, object]:
+    record = {
+        "role": message.role,
+        "content": message.content,
+        "timestamp": message.timestamp,
+    }
+    if message.has_metadata:
+        record["metadata"] = message.metadata
+    return record
+
+
+def _from_record(record: dict[str, object]) -> Message:
+    return Message(
+        record["content"],
+        record["role"],
+        record.get("timestamp", 0),
+        record.get("metadata"),
+    )
+
+
+class SessionStore(ABC):
+    # 持久化的会话历史: append 只写入内存缓冲, 后台线程每 flush_interval 秒或缓冲达到
+    # batch_size 条时批量写出并 fsync; flush_interval 为 0 时每次 append 同步落盘
+    def __init__(self, flush_interval: float = 0.2, batch_size: int = 256):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: list[tuple[str, dict[str, object]]] = []
+        self._lock = threading.Lock()
+        # 串行化后端读写, 同时保证读取前的 flush 与后台写出不交错
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    @classmethod
+    def from_config(cls, config: Config) -> "SessionStore | None":
+        kwargs = {
+            "flush_interval": config.history_flush_interval,
+            "batch_size": config.history_flush_batch,
+        }
+        if config.history_store == "jsonl":
+            return JSONLSessionStore(config.history_store_path, **kwargs)
+        if config.history_store == "sqlite":
+            return SQLiteSessionStore(config.history_store_path, **kwargs)
+        return None
+
+    def append(self, session_id: str, messages: Iterable[Message]):
+        records = [(session_id, _to_record(m)) for m in messages]
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("会话存储已关闭")
+            self._pending.extend(records)
+            full = len(self._pending) >= self.batch_size
+        if not self.flush_interval:
+            self.flush()
+            return
+        if self._thread is None:
+            self._start_flusher()
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            grouped: dict[str, list[dict[str, object]]] = {}
+            for session_id, record in batch:
+                grouped.setdefault(session_id, []).append(record)
+            try:
+                self._write(grouped)
+            except BaseException:
+                # 写入失败的记录放回缓冲区, 下次 flush 时重试
+                with self._lock:
+                    self._pending[:0] = batch
+                raise
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="chick-agent-history", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                warnings.warn(f"会话历史写入失败, 将在下次刷新时重试: {e}")
+
+    def load_tail(self, session_id: str, limit: int | None = None) -> list[Message]:
+        # 只读取最近的 limit 条消息, limit 为 None 时读取全部
+        if limit is not None and limit <= 0:
+            return []
+        self.flush()
+        with self._io_lock:
+            records = self._read_tail(session_id, limit)
+        return [_from_record(record) for record in records]
+
+    def iter_messages(self, session_id: str) -> Iterator[Message]:
+        for record in self.iter_records(session_id):
+            yield _from_record(record)
+
+    def iter_records(self, session_id: str) -> Iterator[dict[str, object]]:
+        # 按写入顺序逐条产出, 导出大会话时不会整体读入内存
+        self.flush()
+        yield from self._iter_records(session_id)
+
+    def export(self, session_id: str, file: IO[str]) -> int:
+        count = 0
+        for record in self.iter_records(session_id):
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+
+    def delete(self, session_id: str) -> bool:
+        with self._io_lock:
+            with self._lock:
+                self._pending = [p for p in self._pending if p[0] != session_id]
+            return self._delete(session_id)
+
+    def sessions(self) -> list[str]:
+        self.flush()
+        with self._io_lock:
+            return self._sessions()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread, self._thread = self._thread, None
+        self._wakeup.set()
+        if thread is not None:
+            thread.join()
+        self.flush()
+        with self._io_lock:
+            self._close()
+
+    def __enter__(self) -> "SessionStore":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # 以下由具体后端实现; 除 _iter_records 外调用时均已持有 _io_lock
+
+    @abstractmethod
+    def _write(self, records: dict[str, list[dict[str, object]]]):
+        pass
+
+    @abstractmethod
+    def _read_tail(self, session_id: str, limit: int | None) -> list[dict[str, object]]:
+        pass
+
+    @abstractmethod
+    def _iter_records(self, session_id: str) -> Iterator[dict[str, object]]:
+        pass
+
+    @abstractmethod
+    def _delete(self, session_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    def _sessions(self) -> list[str]:
+        pass
+
+    def _close(self):
+        pass
+
+
+class JSONLSessionStore(SessionStore):
+    # 目录下每个会话一个只追加的 JSONL 文件, 读取尾部时从文件末尾向前按块扫描
+    _BLOCK_SIZE = 64 * 1024
+
+    def __init__(
+        self, directory: str, flush_interval: float = 0.2, batch_size: int = 256
+    ):
+        super().__init__(flush_interval, batch_size)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # 本进程中已确认以完整行结尾的会话文件
+        self._intact: set[str] = set()
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, quote(session_id, safe="") + ".jsonl")
+
+    def _write(self, records: dict[str, list[dict[str, object]]]):
+        created = False
+        for session_id, session_records in records.items():
+            path = self._path(session_id)
+            created = created or not os.path.exists(path)
+            data = "".join(
+                json.dumps(record, ensure_ascii=False) + "\n"
+                for record in session_records
+            )
+            with open(path, "a+b") as f:
+                if session_id not in self._intact:
+                    self._repair_tail(f)
+                    self._intact.add(session_id)
+                f.write(data.encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+        if created:
+            _fsync_directory(self.directory)
+
+    def _repair_tail(self, f: IO[bytes]):
+        # 上次写入中途退出时文件以半行结尾, 截断到最后一个换行符, 避免新记录接在半行之后
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        while end > 0:
+            start = max(0, end - self._BLOCK_SIZE)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        f.truncate(end)
+
+    def _read_tail(self, session_id: str, limit: int | None) -> list[dict[str, object]]:
+        if limit is None:
+            return list(self._iter_records(session_id))
+        try:
+            f = open(self._path(session_id), "rb")
+        except FileNotFoundError:
+            return []
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            data = b""
+            # 多读一行: 第一行可能不完整
+            while end > 0 and data.count(b"\n") <= limit:
+                start = max(0, end - self._BLOCK_SIZE)
+                f.seek(start)
+                data = f.read(end - start) + data
+                end = start
+        lines = data.splitlines()
+        if end > 0:
+            lines = lines[1:]
+        records = [r for r in map(_parse_line, lines) if r is not None]
+        return records[-limit:]
+
+    def _iter_records(self, session_id: str) -> Iterator[dict[str, object]]:
+        try:
+            f = open(self._path(session_id), "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                record = _parse_line(line)
+                if record is not None:
+                    yield record
+
+    def _delete(self, session_id: str) -> bool:
+        self._intact.discard(session_id)
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _sessions(self) -> list[str]:
+        return sorted(
+            unquote(name[: -len(".jsonl")])
+            for name in os.listdir(self.directory)
+            if name.endswith(".jsonl")
+        )
+
+
+def _parse_line(line: bytes) -> dict[str, object] | None:
+    # 进程在写入中途退出时最后一行可能不完整, 跳过无法解析的行
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+
+def _fsync_directory(directory: str):
+    # 新建文件后同步目录项, 保证文件本身在掉电后仍然存在; 部分平台不支持
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class SQLiteSessionStore(SessionStore):
+    # 单个 SQLite 数据库保存所有会话; 每批写入一个事务, synchronous=FULL 保证提交即落盘
+    _PAGE_SIZE = 500
+
+    def __init__(self, path: str, flush_interval: float = 0.2, batch_size: int = 256):
+        super().__init__(flush_interval, batch_size)
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "session_id TEXT NOT NULL, record TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id)"
+        )
+        self._db.commit()
+
+    def _write(self, records: dict[str, list[dict[str, object]]]):
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO messages (session_id, record) VALUES (?, ?)",
+                [
+                    (session_id, json.dumps(record, ensure_ascii=False))
+                    for session_id, session_records in records.items()
+                    for record in session_records
+                ],
+            )
+
+    def _read_tail(self, session_id: str, limit: int | None) -> list[dict[str, object]]:
+        rows = self._db.execute(
+            "SELECT record FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, -1 if limit is None else limit),
+        ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def _iter_records(self, session_id: str) -> Iterator[dict[str, object]]:
+        # 分页读取, 两页之间释放锁, 导出期间不阻塞其他会话的写入
+        last_id = 0
+        while True:
+            with self._io_lock:
+                rows = self._db.execute(
+                    "SELECT id, record FROM messages WHERE session_id = ? AND id > ? "
+                    "ORDER BY id LIMIT ?",
+                    (session_id, last_id, self._PAGE_SIZE),
+                ).fetchall()
+            for row in rows:
+                yield json.loads(row[1])
+            if len(rows) < self._PAGE_SIZE:
+                return
+            last_id = rows[-1][0]
+
+    def _delete(self, session_id: str) -> bool:
+        with self._db:
+            cursor = self._db.execute(
+                "DELETE FROM messages WHERE session_id = ?", (session_id,)
+            )
+        return cursor.rowcount > 0
+
+    def _sessions(self) -> list[str]:
+        rows = self._db.execute(
+            "SELECT DISTINCT session_id FROM messages ORDER BY session_id"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _close(self):
+        self._db.close()
@@ -0,0 +1,265 @@
+import contextvars
+import json
+import random
+import threading
+import time
+
+from typing import IO
+
+# 当前活动的 span, 随 contextvars 在协程、工具线程和后台事件循环间传递
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar(
+    "chick_agent_current_span", default=None
+)
+
+
+class Span:
+    # 默认实现不做任何记录, 未配置 tracing 时所有埋点共用同一个实例
+    def set_attribute(self, key: str, value: object):
+        pass
+
+    def add_event(self, name: str, attributes: dict[str, object] | None = None):
+        pass
+
+    def record_exception(self, error: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_val is not None:
+            self.record_exception(exc_val)
+        self.end()
+
+
+_NOOP_SPAN = Span()
+
+
+class Tracer:
+    # span(...) 创建即开始计时; 在 with 块中使用时同时成为当前 span, 块内新建的 span 以它为父节点.
+    # 生成器等跨越 yield 的代码不应进入 with 块, 应显式传入 parent 并调用 end()
+    def span(
+        self,
+        name: str,
+        attributes: dict[str, object] | None = None,
+        parent: Span | None = None,
+    ) -> Span:
+        return _NOOP_SPAN
+
+    def close(self):
+        pass
+
+
+class RecordingSpan(Span):
+    def __init__(
+        self,
+        tracer: "RecordingTracer",
+        name: str,
+        attributes: dict[str, object] | None,
+        parent: "RecordingSpan | None",
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = dict(attributes) if attributes else {}
+        self.events: list[dict[str, object]] = []
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.start_time = time.time()
+        self.duration: float | None = None
+        self.error: str | None = None
+        self._start = time.perf_counter()
+        self._token: contextvars.Token | None = None
+
+    def set_attribute(self, key: str, value: object):
+        self.attributes[key] = value
+
+    def add_event(self, name: str, attributes: dict[str, object] | None = None):
+        self.events.append(
+            {
+                "name": name,
+                "offset_ms": (time.perf_counter() - self._start) * 1000,
+                "attributes": attributes or {},
+            }
+        )
+
+    def record_exception(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._start
+        self.tracer.export(self)
+
+    def __enter__(self) -> "RecordingSpan":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        super().__exit__(exc_type, exc_val, exc_tb)
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": None if self.duration is None else self.duration * 1000,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+class RecordingTracer(Tracer):
+    # 在进程内生成 span 树, 结束的 span 交给 export 处理
+    def span(
+        self,
+        name: str,
+        attributes: dict[str, object] | None = None,
+        parent: Span | None = None,
+    ) -> RecordingSpan:
+        if parent is None:
+            parent = _current_span.get()
+        if not isinstance(parent, RecordingSpan):
+            parent = None
+        return RecordingSpan(self, name, attributes, parent)
+
+    def export(self, span: RecordingSpan):
+        pass
+
+
+class InMemoryTracer(RecordingTracer):
+    def __init__(self, max_spans: int | None = 10000):
+        self.max_spans = max_spans
+        self.spans: list[RecordingSpan] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: RecordingSpan):
+        with self._lock:
+            self.spans.append(span)
+            if self.max_spans is not None and len(self.spans) > self.max_spans:
+                del self.spans[: len(self.spans) - self.max_spans]
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+class JSONLinesTracer(RecordingTracer):
+    # 每个结束的 span 写为一行 JSON, 子 span 先于父 span 写出
+    def __init__(self, file: str | IO[str]):
+        if isinstance(file, str):
+            self._file = open(file, "a", encoding="utf-8", buffering=1)
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+        self._lock = threading.Lock()
+
+    def export(self, span: RecordingSpan):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            if self._owns_file:
+                self._file.close()
+            else:
+                self._file.flush()
+
+
+class _OpenTelemetrySpan(Span):
+    def __init__(self, span: object):
+        self.span = span
+        self._token: object | None = None
+
+    def set_attribute(self, key: str, value: object):
+        self.span.set_attribute(key, _otel_value(value))
+
+    def add_event(self, name: str, attributes: dict[str, object] | None = None):
+        self.span.add_event(name, _otel_attributes(attributes))
+
+    def record_exception(self, error: BaseException):
+        from opentelemetry.trace import Status, StatusCode
+
+        self.span.record_exception(error)
+        self.span.set_status(Status(StatusCode.ERROR, str(error)))
+
+    def end(self):
+        self.span.end()
+
+    def __enter__(self) -> "_OpenTelemetrySpan":
+        from opentelemetry import context, trace
+
+        self._token = context.attach(trace.set_span_in_context(self.span))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        from opentelemetry import context
+
+        if self._token is not None:
+            context.detach(self._token)
+            self._token = None
+        super().__exit__(exc_type, exc_val, exc_tb)
+
+
+class OpenTelemetryTracer(Tracer):
+    # 将 span 转交给 OpenTelemetry, 导出方式由应用配置的 TracerProvider 决定
+    def __init__(self, tracer: object | None = None):
+        from opentelemetry import trace
+
+        self._tracer = tracer or trace.get_tracer("chick_agent")
+
+    def span(
+        self,
+        name: str,
+        attributes: dict[str, object] | None = None,
+        parent: Span | None = None,
+    ) -> _OpenTelemetrySpan:
+        from opentelemetry import trace
+
+        context = None
+        if isinstance(parent, _OpenTelemetrySpan):
+            context = trace.set_span_in_context(parent.span)
+        return _OpenTelemetrySpan(
+            self._tracer.start_span(
+                name, context=context, attributes=_otel_attributes(attributes)
+            )
+        )
+
+
+def _otel_value(value: object) -> object:
+    # OpenTelemetry 属性只接受基本类型
+    if value is None:
+        return ""
+    if isinstance(value, (str, bool, int, float)):
+        return value
+    return str(value)
+
+
+def _otel_attributes(attributes: dict[str, object] | None) -> dict[str, object]:
+    return {k: _otel_value(v) for k, v in (attributes or {}).items()}
+
+
+_tracer: Tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def set_tracer(tracer: Tracer | None):
+    global _tracer
+    _tracer = tracer or Tracer()
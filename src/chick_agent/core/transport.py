@@ -0,0 +1,202 @@
+import asyncio
+import atexit
+import importlib.util
+import threading
+import warnings
+
+from contextlib import suppress
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel, ConfigDict
+
+from chick_agent.core.config import Config
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class HTTPSettings(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    max_connections: int | None = 100
+    max_keepalive_connections: int | None = 20
+    keepalive_expiry: float | None = 5.0
+    http2: bool = False
+    trust_env: bool = True
+
+    @classmethod
+    def from_config(cls, config: Config) -> "HTTPSettings":
+        return cls(
+            max_connections=config.http_max_connections,
+            max_keepalive_connections=config.http_max_keepalive_connections,
+            keepalive_expiry=config.http_keepalive_expiry,
+            http2=config.http2,
+            trust_env=config.http_trust_env,
+        )
+
+    def client_kwargs(self) -> dict[str, object]:
+        import httpx
+
+        http2 = self.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            warnings.warn("未安装 h2 (httpx[http2]), 回退到 HTTP/1.1")
+            http2 = False
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "http2": http2,
+            "trust_env": self.trust_env,
+        }
+
+
+class _PoolEntry:
+    def __init__(self, origin: str):
+        self.origin = origin
+        self.client: "httpx.Client | httpx.AsyncClient | None" = None
+        self.requests = 0
+
+    def count_request(self, request: "httpx.Request"):
+        self.requests += 1
+
+    async def acount_request(self, request: "httpx.Request"):
+        self.requests += 1
+
+    def stats(self) -> dict[str, object]:
+        # httpx 没有公开连接池状态, 从底层 httpcore 连接池读取; 内部结构变化时只报告请求数
+        try:
+            pool = getattr(self.client._transport, "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+            idle = sum(1 for c in connections if c.is_idle())
+        except AttributeError:
+            pool, connections, idle = None, [], None
+        return {
+            "base_url": self.origin,
+            "async": self.client.__class__.__name__ == "AsyncClient",
+            "requests": self.requests,
+            "connections": len(connections),
+            "idle_connections": idle,
+            "max_connections": getattr(pool, "_max_connections", None),
+        }
+
+
+# 进程内共享的 HTTP 客户端, 同一服务地址(scheme://host:port)和连接设置的
+# 所有 LLM 实例复用同一个连接池; 异步客户端绑定事件循环, 按循环分别缓存
+_clients: dict[tuple[str, HTTPSettings], _PoolEntry] = {}
+_async_clients: dict[
+    tuple[str, HTTPSettings, asyncio.AbstractEventLoop], _PoolEntry
+] = {}
+_lock = threading.Lock()
+
+
+def _origin(base_url: str) -> str:
+    import httpx
+
+    url = httpx.URL(base_url)
+    return f"{url.scheme}://{url.host}:{url.port or (443 if url.scheme == 'https' else 80)}"
+
+
+def get_http_client(
+    base_url: str, settings: HTTPSettings | None = None
+) -> "httpx.Client":
+    import httpx
+
+    settings = settings or HTTPSettings()
+    key = (_origin(base_url), settings)
+    with _lock:
+        entry = _clients.get(key)
+        if entry is None or entry.client.is_closed:
+            entry = _PoolEntry(key[0])
+            entry.client = httpx.Client(
+                event_hooks={"request": [entry.count_request]},
+                **settings.client_kwargs(),
+            )
+            _clients[key] = entry
+        return entry.client
+
+
+def get_async_http_client(
+    base_url: str, settings: HTTPSettings | None = None
+) -> "httpx.AsyncClient | None":
+    import httpx
+
+    # 没有运行中的事件循环时无法确定归属, 由调用方自行创建客户端
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    settings = settings or HTTPSettings()
+    key = (_origin(base_url), settings, loop)
+    with _lock:
+        stale = [k for k in _async_clients if k[2].is_closed()]
+        stale_entries = [_async_clients.pop(k) for k in stale]
+        entry = _async_clients.get(key)
+        if entry is None or entry.client.is_closed:
+            entry = _PoolEntry(key[0])
+            entry.client = httpx.AsyncClient(
+                event_hooks={"request": [entry.acount_request]},
+                **settings.client_kwargs(),
+            )
+            _async_clients[key] = entry
+    for stale_key, stale_entry in zip(stale, stale_entries):
+        _close_async_entry(stale_entry, stale_key[2])
+    return entry.client
+
+
+def _close_async_entry(entry: _PoolEntry, loop: asyncio.AbstractEventLoop):
+    # 异步客户端只能在所属的事件循环上关闭
+    client = entry.client
+    if client.is_closed:
+        return
+    if loop.is_closed():
+        # 循环已结束, 无法再 aclose; 连接随客户端对象回收时关闭
+        if entry.stats()["connections"]:
+            warnings.warn(
+                f"{entry.origin} 的异步连接池所属事件循环已关闭, 未能显式关闭连接; "
+                "请在循环结束前调用 aclose_http_clients()",
+                ResourceWarning,
+            )
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        loop.create_task(client.aclose())
+    elif loop.is_running():
+        with suppress(Exception):
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(5)
+    elif running is None:
+        with suppress(Exception):
+            loop.run_until_complete(client.aclose())
+
+
+async def aclose_http_clients():
+    # 关闭绑定在当前事件循环上的共享异步客户端, 在循环结束前(如 asyncio.run 的主协程末尾)调用
+    loop = asyncio.get_running_loop()
+    with _lock:
+        keys = [k for k in _async_clients if k[2] is loop]
+        entries = [_async_clients.pop(k) for k in keys]
+    for entry in entries:
+        await entry.client.aclose()
+
+
+def http_pool_stats() -> list[dict[str, object]]:
+    with _lock:
+        entries = [*_clients.values(), *_async_clients.values()]
+    return [entry.stats() for entry in entries]
+
+
+@atexit.register
+def close_http_clients():
+    with _lock:
+        entries = list(_clients.values())
+        async_entries = list(_async_clients.items())
+        _clients.clear()
+        _async_clients.clear()
+    for entry in entries:
+        entry.client.close()
+    for key, entry in async_entries:
+        _close_async_entry(entry, key[2])
@@ -0,0 +1,191 @@
+import contextvars
+import sys
+import threading
+import time
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from pydantic import BaseModel
+
+
+class TokenUsage(BaseModel):
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    # 推理模型的思考 token 计入 completion_tokens, 命中提示词缓存的 token 计入 prompt_tokens
+    reasoning_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    # 请求耗时之和, 用于计算生成速度
+    duration: float = 0.0
+
+    @classmethod
+    def from_openai(cls, usage: object, duration: float = 0.0) -> "TokenUsage":
+        completion_details = getattr(usage, "completion_tokens_details", None)
+        prompt_details = getattr(usage, "prompt_tokens_details", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        return cls(
+            requests=1,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=getattr(usage, "total_tokens", 0)
+            or prompt_tokens + completion_tokens,
+            reasoning_tokens=getattr(completion_details, "reasoning_tokens", 0) or 0,
+            # DeepSeek 以 prompt_cache_hit_tokens 返回缓存命中数
+            cached_prompt_tokens=getattr(prompt_details, "cached_tokens", 0)
+            or getattr(usage, "prompt_cache_hit_tokens", 0)
+            or 0,
+            duration=duration,
+        )
+
+    def add(self, other: "TokenUsage"):
+        self.requests += other.requests
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.total_tokens += other.total_tokens
+        self.reasoning_tokens += other.reasoning_tokens
+        self.cached_prompt_tokens += other.cached_prompt_tokens
+        self.duration += other.duration
+
+    def __add__(self, other: "TokenUsage") -> "TokenUsage":
+        result = self.model_copy()
+        result.add(other)
+        return result
+
+    def __sub__(self, other: "TokenUsage") -> "TokenUsage":
+        return TokenUsage(
+            requests=self.requests - other.requests,
+            prompt_tokens=self.prompt_tokens - other.prompt_tokens,
+            completion_tokens=self.completion_tokens - other.completion_tokens,
+            total_tokens=self.total_tokens - other.total_tokens,
+            reasoning_tokens=self.reasoning_tokens - other.reasoning_tokens,
+            cached_prompt_tokens=self.cached_prompt_tokens - other.cached_prompt_tokens,
+            duration=self.duration - other.duration,
+        )
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.completion_tokens / self.duration if self.duration else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} 次请求, 提示词 {self.prompt_tokens} "
+            f"(缓存命中 {self.cached_prompt_tokens}), 生成 {self.completion_tokens} "
+            f"(推理 {self.reasoning_tokens}), {self.tokens_per_second:.1f} tokens/s"
+        )
+
+
+class UsageMeter:
+    # 线程安全的累计用量, 另按模型分别统计
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._total = TokenUsage()
+        self._by_model: dict[str, TokenUsage] = {}
+
+    def record(self, usage: TokenUsage, model: str | None = None):
+        with self._lock:
+            self._total.add(usage)
+            if model:
+                self._by_model.setdefault(model, TokenUsage()).add(usage)
+
+    @property
+    def total(self) -> TokenUsage:
+        with self._lock:
+            return self._total.model_copy()
+
+    @property
+    def by_model(self) -> dict[str, TokenUsage]:
+        with self._lock:
+            return {
+                model: usage.model_copy() for model, usage in self._by_model.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._total = TokenUsage()
+            self._by_model = {}
+
+
+# 当前上下文中打开的用量统计范围, 嵌套的范围都会累加同一次请求的用量
+_scopes: contextvars.ContextVar[tuple[TokenUsage, ...]] = contextvars.ContextVar(
+    "chick_agent_usage_scopes", default=()
+)
+_scope_lock = threading.Lock()
+
+
+@contextmanager
+def usage_scope() -> Iterator[TokenUsage]:
+    # 统计 with 块内(包括其中的工具线程和子协程)发出的全部 LLM 请求的用量
+    usage = TokenUsage()
+    token = _scopes.set((*_scopes.get(), usage))
+    try:
+        yield usage
+    finally:
+        _scopes.reset(token)
+
+
+def record_usage(usage: TokenUsage):
+    scopes = _scopes.get()
+    if not scopes:
+        return
+    with _scope_lock:
+        for scope in scopes:
+            scope.add(usage)
+
+
+def _print_report(window: TokenUsage, total: TokenUsage, seconds: float):
+    rate = window.total_tokens / seconds if seconds else 0.0
+    print(
+        f"[usage] 最近 {seconds:.0f}s: {window}, 合计 {rate:.1f} tokens/s; 累计: {total}",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+class UsageReporter:
+    # 后台线程按固定间隔汇报窗口内增量和累计用量
+    def __init__(
+        self,
+        meter: UsageMeter,
+        interval: float = 60.0,
+        report: Callable[[TokenUsage, TokenUsage, float], None] = _print_report,
+    ):
+        self.meter = meter
+        self.interval = interval
+        self.report = report
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "UsageReporter":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="chick-agent-usage", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def _run(self):
+        last = self.meter.total
+        last_time = time.monotonic()
+        while not self._stop.wait(self.interval):
+            total = self.meter.total
+            now = time.monotonic()
+            # 窗口内没有请求时不汇报
+            if total.requests != last.requests:
+                self.report(total - last, total, now - last_time)
+            last, last_time = total, now
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "UsageReporter":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
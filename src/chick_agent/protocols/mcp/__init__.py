@@ -1,3 +1,4 @@
 from chick_agent.protocols.mcp.client import MCPClient
+from chick_agent.protocols.mcp.pool import MCPSessionPool
 
-__all__ = ["MCPClient"]
+__all__ = ["MCPClient", "MCPSessionPool"]
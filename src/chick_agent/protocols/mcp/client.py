@@ -1,5 +1,8 @@
-from fastmcp import Client, FastMCP
-from fastmcp.client.transports import PythonStdioTransport, StdioTransport
+from typing import TYPE_CHECKING
+
+# fastmcp 导入耗时较长, 只在真正连接 MCP 服务时加载
+if TYPE_CHECKING:
+    from fastmcp import Client, FastMCP
 
 
 class MCPClient:
@@ -15,11 +18,13 @@ class MCPClient:
         self.transport_type = transport_type
         self.env = env or {}
         self.kwargs = kwargs
-        self.client: Client = None
+        self.client: "Client | None" = None
         self.server_source = self._prepare_server_source(server_source)
         self._context_manager = None
 
-    def _prepare_server_source(self, server_source: str | FastMCP):
+    def _prepare_server_source(self, server_source: "str | FastMCP"):
+        from fastmcp.client.transports import PythonStdioTransport, StdioTransport
+
         if isinstance(server_source, str):
             if server_source.endswith(".py"):
                 print(f"使用 PythonStdio 传输: {server_source}")
@@ -49,6 +54,8 @@ class MCPClient:
         return server_source
 
     async def __aenter__(self):
+        from fastmcp import Client
+
         self.client = Client(self.server_source)
         self._context_manager = self.client
         await self._context_manager.__aenter__()
@@ -60,6 +67,16 @@ class MCPClient:
             self.client = None
             self._context_manager = None
 
+    async def close(self):
+        # stdio 传输默认 keep_alive, 仅退出上下文不会结束子进程
+        if self.client:
+            await self.client.close()
+            self.client = None
+            self._context_manager = None
+
+    def is_connected(self) -> bool:
+        return self.client is not None and self.client.is_connected()
+
     async def list_tools(self) -> list[dict[str, object]]:
         if not self.client:
             raise RuntimeError(
@@ -83,6 +100,11 @@ class MCPClient:
                 "input_schema": tool.inputSchema
                 if hasattr(tool, "inputSchema")
                 else {},
+                "annotations": tool.annotations.model_dump(
+                    by_alias=True, exclude_none=True
+                )
+                if getattr(tool, "annotations", None)
+                else {},
             }
             for tool in tools
         ]
@@ -0,0 +1,241 @@
+import asyncio
+import atexit
+import time
+import weakref
+
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+
+from chick_agent.core.tracing import Tracer, get_tracer
+from chick_agent.protocols.mcp.client import MCPClient
+
+SessionKey = tuple[object, tuple[str, ...], tuple[tuple[str, str], ...]]
+
+
+class _PooledSession:
+    def __init__(self, client: MCPClient):
+        self.client = client
+        self.connecting: asyncio.Future | None = None
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+    def broken(self) -> bool:
+        if self.connecting is None or not self.connecting.done():
+            return False
+        if self.connecting.cancelled() or self.connecting.exception():
+            return True
+        return not self.client.is_connected()
+
+
+# 按 (server source, args, env) 复用已连接的 MCP 会话, 空闲超时或超出上限时按 LRU 关闭
+class MCPSessionPool:
+    def __init__(self, max_sessions: int = 8, idle_timeout: float | None = 300.0):
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be >= 1")
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: OrderedDict[SessionKey, _PooledSession] = OrderedDict()
+        self._closing: set[asyncio.Task] = set()
+        self._cond = asyncio.Condition()
+        self._reaper: asyncio.Task | None = None
+        self._closed = False
+        self._loop: asyncio.AbstractEventLoop | None = None
+        _live_pools.add(self)
+
+    @staticmethod
+    def make_key(
+        source: object,
+        server_args: list[str] | None = None,
+        env: dict[str, str] | None = None,
+    ) -> SessionKey:
+        if isinstance(source, str):
+            src = source
+        elif isinstance(source, (list, tuple)):
+            src = tuple(source)
+        else:
+            # FastMCP 实例等内存对象按身份区分
+            src = ("object", id(source))
+        return (src, tuple(server_args or ()), tuple(sorted((env or {}).items())))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop | None:
+        # fastmcp 会话绑定在创建它的事件循环上, 池在首次使用时绑定该循环
+        if self._loop is not None and self._loop.is_closed():
+            # 绑定的循环已结束, 其上的会话随之失效
+            self._sessions.clear()
+            self._closing.clear()
+            self._cond = asyncio.Condition()
+            self._reaper = None
+            self._loop = None
+        return self._loop
+
+    @asynccontextmanager
+    async def session(
+        self,
+        source: object,
+        server_args: list[str] | None = None,
+        env: dict[str, str] | None = None,
+        tracer: Tracer | None = None,
+    ) -> AsyncIterator[MCPClient]:
+        key = self.make_key(source, server_args, env)
+        entry = await self._acquire(key, source, server_args, env, tracer)
+        try:
+            yield entry.client
+        finally:
+            await self._release(key, entry)
+
+    async def _acquire(
+        self,
+        key: SessionKey,
+        source: object,
+        server_args: list[str] | None,
+        env: dict[str, str] | None,
+        tracer: Tracer | None = None,
+    ) -> _PooledSession:
+        running = asyncio.get_running_loop()
+        if self.loop is None:
+            self._loop = running
+        elif self._loop is not running:
+            raise RuntimeError("MCP session pool is bound to another event loop")
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("MCP session pool is closed")
+                entry = self._sessions.get(key)
+                if entry is not None:
+                    if entry.broken():
+                        self._drop(key, entry)
+                        continue
+                    break
+                self._sweep_idle()
+                if len(self._sessions) >= self.max_sessions and not self._evict_lru():
+                    await self._cond.wait()
+                    continue
+                entry = _PooledSession(MCPClient(source, server_args, env=env))
+                # 在锁外完成连接, 避免一个慢服务阻塞其他会话的获取
+                entry.connecting = asyncio.ensure_future(entry.client.__aenter__())
+                self._sessions[key] = entry
+                self._start_reaper()
+                break
+            self._sessions.move_to_end(key)
+            entry.in_use += 1
+        try:
+            if entry.connecting.done():
+                # 复用已连接的会话, 不产生 span
+                entry.connecting.result()
+            else:
+                # 新建会话或等待其他调用方正在建立的连接
+                with (tracer or get_tracer()).span(
+                    "mcp.connect", {"server": _describe_source(source)}
+                ):
+                    await asyncio.shield(entry.connecting)
+        except BaseException:
+            await self._release(key, entry)
+            raise
+        return entry
+
+    async def _release(self, key: SessionKey, entry: _PooledSession):
+        async with self._cond:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+            if entry.broken():
+                self._drop(key, entry)
+            self._cond.notify_all()
+
+    def _drop(self, key: SessionKey, entry: _PooledSession):
+        if self._sessions.get(key) is entry:
+            del self._sessions[key]
+        task = asyncio.ensure_future(self._close_session(entry))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close_session(self, entry: _PooledSession):
+        if entry.connecting is None:
+            return
+        if not entry.connecting.done():
+            entry.connecting.cancel()
+        with suppress(BaseException):
+            await entry.connecting
+        with suppress(BaseException):
+            await entry.client.close()
+
+    def _evict_lru(self) -> bool:
+        for key, entry in self._sessions.items():
+            if entry.in_use == 0:
+                self._drop(key, entry)
+                return True
+        return False
+
+    def _sweep_idle(self):
+        if self.idle_timeout is None:
+            return
+        deadline = time.monotonic() - self.idle_timeout
+        expired = [
+            (key, entry)
+            for key, entry in self._sessions.items()
+            if entry.in_use == 0 and entry.last_used < deadline
+        ]
+        for key, entry in expired:
+            self._drop(key, entry)
+
+    def _start_reaper(self):
+        if self.idle_timeout is None:
+            return
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.ensure_future(self._reap())
+
+    async def _reap(self):
+        while self._sessions:
+            await asyncio.sleep(self.idle_timeout / 2)
+            async with self._cond:
+                self._sweep_idle()
+                self._cond.notify_all()
+
+    async def aclose(self):
+        async with self._cond:
+            self._closed = True
+            if self._reaper is not None:
+                self._reaper.cancel()
+            for key, entry in list(self._sessions.items()):
+                self._drop(key, entry)
+            self._cond.notify_all()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def close(self):
+        loop = self.loop
+        if self._closed:
+            return
+        if loop is None or not loop.is_running():
+            self._closed = True
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.create_task(self.aclose())
+            return
+        with suppress(Exception):
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+
+
+def _describe_source(source: object) -> str:
+    if isinstance(source, str):
+        return source
+    if isinstance(source, (list, tuple)):
+        return " ".join(source)
+    return getattr(source, "name", None) or type(source).__name__
+
+
+_live_pools: "weakref.WeakSet[MCPSessionPool]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_all_pools():
+    for pool in list(_live_pools):
+        pool.close()
@@ -0,0 +1,519 @@
+import asyncio
+import json
+import time
+import uuid
+
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel, ValidationError
+
+from chick_agent.agent import ContentDelta, DoneEvent, ReasoningDelta, SimpleAgent
+from chick_agent.core.config import Config
+from chick_agent.core.exceptions import LLMException
+from chick_agent.core.llm import AsyncChickAgentLLM, ChickAgentLLM
+from chick_agent.core.message import Message
+from chick_agent.core.store import SessionStore
+from chick_agent.core.tracing import Tracer
+from chick_agent.core.usage import TokenUsage, UsageReporter
+from chick_agent.tools import Tool, ToolRegistry
+
+if TYPE_CHECKING:
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import Response
+
+# OpenAI 兼容的 HTTP 服务: 所有会话运行在同一个事件循环上, 共享 LLM 连接池和工具(MCP 会话);
+# starlette 和 uvicorn 由 server 可选依赖提供 (pip install chick-agent[server]), 在创建应用时才导入
+
+
+class ChatMessage(BaseModel):
+    role: str
+    # 兼容多模态格式的内容片段列表, 只取其中的文本
+    content: str | list[dict[str, object]] | None = None
+
+    @property
+    def text(self) -> str:
+        if isinstance(self.content, list):
+            return "".join(
+                str(part.get("text", ""))
+                for part in self.content
+                if part.get("type") == "text"
+            )
+        return self.content or ""
+
+
+class StreamOptions(BaseModel):
+    include_usage: bool = False
+
+
+class ChatCompletionRequest(BaseModel):
+    model: str | None = None
+    messages: list[ChatMessage]
+    stream: bool = False
+    stream_options: StreamOptions | None = None
+    temperature: float | None = None
+    max_tokens: int | None = None
+    max_completion_tokens: int | None = None
+    # 会话标识, 也可以通过 X-Session-Id 请求头传入; 不传时为无状态请求.
+    # OpenAI 的 user 字段只是终端用户标识, 可能被多个对话共用, 不作为会话标识
+    session_id: str | None = None
+    user: str | None = None
+
+
+class _Session:
+    def __init__(self, agent: SimpleAgent):
+        self.agent = agent
+        # 同一会话的请求依次执行, 不同会话之间并发
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class SessionManager:
+    # 按会话 ID 保存 agent 及其对话历史, 超过 max_sessions 或闲置超过 ttl 秒的会话被淘汰
+    def __init__(
+        self,
+        factory: Callable[[str | None, str | None], SimpleAgent],
+        max_sessions: int = 1000,
+        ttl: float | None = 3600.0,
+    ):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> _Session | None:
+        return self._sessions.get(session_id)
+
+    def acquire(
+        self,
+        session_id: str | None,
+        system_prompt: str | None = None,
+        messages: list[Message] | None = None,
+    ) -> _Session:
+        # 新会话以请求中的历史消息初始化; 已有会话(包括持久化存储中的)沿用服务端保存的历史.
+        # 没有会话 ID 时创建不保存的临时会话, 行为与无状态的 OpenAI 接口一致
+        self._evict_expired()
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None:
+            agent = self.factory(session_id, system_prompt)
+            if not agent.get_history():
+                for message in messages or ():
+                    agent.add_message(message)
+            session = _Session(agent)
+            if session_id:
+                self._sessions[session_id] = session
+                self._evict_overflow(session_id)
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_used = time.monotonic()
+        return session
+
+    def remove(self, session_id: str) -> bool:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.agent.clear_history()
+        _close_session(session)
+        return True
+
+    def _evict_expired(self):
+        if self.ttl is None:
+            return
+        deadline = time.monotonic() - self.ttl
+        # 按最近使用时间排序, 遇到第一个未过期的会话即可停止
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used > deadline or session.lock.locked():
+                return
+            del self._sessions[session_id]
+            _close_session(session)
+
+    def _evict_overflow(self, keep: str):
+        # 从最久未用的会话开始淘汰, 跳过正在处理请求的会话; 都在使用中时暂时超出上限
+        overflow = len(self._sessions) - self.max_sessions
+        if overflow <= 0:
+            return
+        evictable = [
+            session_id
+            for session_id, session in self._sessions.items()
+            if session_id != keep and not session.lock.locked()
+        ]
+        for session_id in evictable[:overflow]:
+            _close_session(self._sessions.pop(session_id))
+
+    def close(self):
+        for session in self._sessions.values():
+            _close_session(session)
+        self._sessions.clear()
+
+
+def _close_session(session: _Session):
+    # 工具注册表和会话存储为所有会话共享, 只释放会话自己的历史摘要线程
+    session.agent.history.close()
+
+
+class AgentServer:
+    def __init__(
+        self,
+        config: Config | None = None,
+        llm: ChickAgentLLM | None = None,
+        system_prompt: str | None = None,
+        tool_registry: ToolRegistry | None = None,
+        max_sessions: int = 1000,
+        session_ttl: float | None = 3600.0,
+        max_tool_iterations: int = 3,
+        tracer: Tracer | None = None,
+        session_store: SessionStore | None = None,
+    ):
+        self.config = config or Config()
+        # 所有会话共用一个异步 LLM 客户端, 请求复用同一个连接池, 用量计入同一个 meter
+        if llm is None:
+            llm = AsyncChickAgentLLM.from_config(self.config, tracer=tracer)
+        elif not isinstance(llm, AsyncChickAgentLLM):
+            llm = AsyncChickAgentLLM.from_llm(llm)
+        self.llm = llm
+        self.system_prompt = system_prompt
+        self.tool_registry = tool_registry or ToolRegistry()
+        self.max_tool_iterations = max_tool_iterations
+        self.tracer = tracer
+        # 持久化存储由所有会话共享, 服务重启后会话历史按需从中加载
+        self._owns_session_store = session_store is None
+        self.session_store = session_store or SessionStore.from_config(self.config)
+        # 用量汇报和会话存储由服务统一负责, 会话 agent 不再各自创建
+        self._agent_config = self.config.model_copy(
+            update={"usage_report_interval": None, "history_store": None}
+        )
+        self._usage_reporter: UsageReporter | None = None
+        self.sessions = SessionManager(self._create_agent, max_sessions, session_ttl)
+
+    def add_tool(self, tool: Tool, auto_expand: bool = True, pinned: bool = False):
+        self.tool_registry.register_tool(tool, auto_expand=auto_expand, pinned=pinned)
+
+    def add_tools(
+        self,
+        tools: list[Tool],
+        auto_expand: bool = True,
+        pinned: bool = False,
+        timeout: float | None = None,
+    ):
+        self.tool_registry.register_tools(
+            tools,
+            auto_expand=auto_expand,
+            pinned=pinned,
+            timeout=self.config.mcp_discovery_timeout if timeout is None else timeout,
+        )
+
+    def _create_agent(
+        self, session_id: str | None, system_prompt: str | None
+    ) -> SimpleAgent:
+        agent = SimpleAgent(
+            session_id or "ephemeral",
+            llm=self.llm,
+            system_prompt=system_prompt or self.system_prompt,
+            tool_registry=self.tool_registry,
+            config=self._agent_config,
+            tracer=self.tracer,
+            session_store=self.session_store if session_id else None,
+            session_id=session_id,
+        )
+        # 每轮按共享注册表判断: 启动时降级的 MCP 服务恢复后, 已有会话也能使用其工具
+        agent.enable_tool_calling = None
+        return agent
+
+    async def chat_completions(self, request: "Request") -> "Response":
+        from starlette.responses import JSONResponse, StreamingResponse
+
+        try:
+            body = ChatCompletionRequest.model_validate_json(await request.body())
+        except ValidationError as e:
+            return _error_response(400, str(e), "invalid_request_error")
+        if not body.messages or body.messages[-1].role != "user":
+            return _error_response(
+                400, "最后一条消息必须是用户消息", "invalid_request_error"
+            )
+        session_id = request.headers.get("x-session-id") or body.session_id
+        system_prompt = next(
+            (m.text for m in body.messages if m.role == "system"), None
+        )
+        history = [
+            Message(m.text, m.role)
+            for m in body.messages[:-1]
+            if m.role in ("user", "assistant")
+        ]
+        session = self.sessions.acquire(session_id, system_prompt, history)
+        kwargs = {}
+        if body.temperature is not None:
+            kwargs["temperature"] = body.temperature
+        if (max_tokens := body.max_completion_tokens or body.max_tokens) is not None:
+            kwargs["max_tokens"] = max_tokens
+        completion = _Completion(body.model or self.llm.model)
+        input_text = body.messages[-1].text
+        headers = {"X-Session-Id": session_id} if session_id else {}
+
+        if body.stream:
+            include_usage = bool(
+                body.stream_options and body.stream_options.include_usage
+            )
+            return StreamingResponse(
+                self._stream(session, input_text, completion, include_usage, kwargs),
+                media_type="text/event-stream",
+                headers={**headers, "Cache-Control": "no-cache"},
+            )
+
+        content, reasoning = [], []
+        usage = None
+        try:
+            async with session.lock:
+                async for event in session.agent.astream_events(
+                    input_text,
+                    stream=False,
+                    max_tool_iterations=self.max_tool_iterations,
+                    **kwargs,
+                ):
+                    if isinstance(event, ReasoningDelta):
+                        reasoning.append(event.text)
+                    elif isinstance(event, DoneEvent):
+                        content.append(event.response)
+                        usage = event.usage
+        except LLMException as e:
+            return _error_response(502, str(e), "upstream_error")
+        except Exception as e:
+            return _error_response(500, f"{type(e).__name__}: {e}", "server_error")
+        return JSONResponse(
+            completion.response("".join(content), "".join(reasoning), usage),
+            headers=headers,
+        )
+
+    async def _stream(
+        self,
+        session: _Session,
+        input_text: str,
+        completion: "_Completion",
+        include_usage: bool,
+        kwargs: dict[str, object],
+    ) -> AsyncIterator[str]:
+        # 客户端断开时 starlette 取消本生成器, astream_events 随之取消进行中的请求
+        async with session.lock:
+            yield _sse(completion.chunk({"role": "assistant", "content": ""}))
+            usage = None
+            try:
+                async for event in session.agent.astream_events(
+                    input_text, max_tool_iterations=self.max_tool_iterations, **kwargs
+                ):
+                    if isinstance(event, ContentDelta):
+                        yield _sse(completion.chunk({"content": event.text}))
+                    elif isinstance(event, ReasoningDelta):
+                        yield _sse(completion.chunk({"reasoning_content": event.text}))
+                    elif isinstance(event, DoneEvent):
+                        usage = event.usage
+            except Exception as e:
+                # 响应头已经发出, 以 OpenAI 流式错误的格式通知客户端
+                error_type = (
+                    "upstream_error" if isinstance(e, LLMException) else "server_error"
+                )
+                yield _sse({"error": {"message": str(e), "type": error_type}})
+                yield "data: [DONE]\n\n"
+                return
+            yield _sse(completion.chunk({}, finish_reason="stop"))
+            if include_usage:
+                yield _sse(completion.usage_chunk(usage))
+            yield "data: [DONE]\n\n"
+
+    async def list_models(self, request: "Request") -> "Response":
+        from starlette.responses import JSONResponse
+
+        return JSONResponse(
+            {
+                "object": "list",
+                "data": [
+                    {
+                        "id": self.llm.model,
+                        "object": "model",
+                        "created": 0,
+                        "owned_by": self.llm.provider,
+                    }
+                ],
+            }
+        )
+
+    async def get_session(self, request: "Request") -> "Response":
+        from starlette.responses import JSONResponse
+
+        session = self.sessions.get(request.path_params["session_id"])
+        if session is None:
+            return _error_response(404, "会话不存在", "not_found")
+        return JSONResponse(
+            {
+                "id": request.path_params["session_id"],
+                "messages": [
+                    {"role": m.role, "content": m.content}
+                    for m in session.agent.get_history()
+                ],
+                "usage": session.agent.session_usage.total.model_dump(),
+            }
+        )
+
+    async def delete_session(self, request: "Request") -> "Response":
+        from starlette.responses import JSONResponse
+
+        session_id = request.path_params["session_id"]
+        deleted = self.sessions.remove(session_id)
+        if self.session_store is not None:
+            deleted = self.session_store.delete(session_id) or deleted
+        if not deleted:
+            return _error_response(404, "会话不存在", "not_found")
+        return JSONResponse({"id": session_id, "deleted": True})
+
+    async def export_session(self, request: "Request") -> "Response":
+        from starlette.responses import StreamingResponse
+
+        if self.session_store is None:
+            return _error_response(404, "未配置会话存储", "not_found")
+        session_id = request.path_params["session_id"]
+        # 同步迭代器由 starlette 在线程池中推进, 逐条读取不阻塞事件循环
+        return StreamingResponse(
+            (
+                json.dumps(record, ensure_ascii=False) + "\n"
+                for record in self.session_store.iter_records(session_id)
+            ),
+            media_type="application/x-ndjson",
+        )
+
+    async def health(self, request: "Request") -> "Response":
+        from starlette.responses import JSONResponse
+
+        return JSONResponse(
+            {
+                "status": "ok",
+                "sessions": len(self.sessions),
+                "mcp_servers": self.tool_registry.server_status(),
+                "usage": self.llm.usage.total.model_dump(),
+            }
+        )
+
+    async def startup(self):
+        if self.config.usage_report_interval and self._usage_reporter is None:
+            self._usage_reporter = UsageReporter(
+                self.llm.usage, self.config.usage_report_interval
+            ).start()
+
+    async def shutdown(self):
+        if self._usage_reporter is not None:
+            self._usage_reporter.stop()
+            self._usage_reporter = None
+        self.sessions.close()
+        if self._owns_session_store and self.session_store is not None:
+            self.session_store.close()
+        await self.tool_registry.aclose()
+
+    def create_app(self) -> "Starlette":
+        from contextlib import asynccontextmanager
+
+        from starlette.applications import Starlette
+        from starlette.routing import Route
+
+        @asynccontextmanager
+        async def lifespan(app: Starlette):
+            await self.startup()
+            try:
+                yield
+            finally:
+                await self.shutdown()
+
+        return Starlette(
+            routes=[
+                Route("/v1/chat/completions", self.chat_completions, methods=["POST"]),
+                Route("/v1/models", self.list_models, methods=["GET"]),
+                Route("/v1/sessions/{session_id}", self.get_session, methods=["GET"]),
+                Route(
+                    "/v1/sessions/{session_id}",
+                    self.delete_session,
+                    methods=["DELETE"],
+                ),
+                Route(
+                    "/v1/sessions/{session_id}/export",
+                    self.export_session,
+                    methods=["GET"],
+                ),
+                Route("/health", self.health, methods=["GET"]),
+            ],
+            lifespan=lifespan,
+        )
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8000):
+        import uvicorn
+
+        uvicorn.run(self.create_app(), host=host, port=port, log_level="info")
+
+
+class _Completion:
+    # 一次补全的响应外壳, 流式数据块共享同一个 id 和创建时间
+    def __init__(self, model: str):
+        self.id = f"chatcmpl-{uuid.uuid4().hex}"
+        self.created = int(time.time())
+        self.model = model
+
+    def chunk(
+        self, delta: dict[str, str], finish_reason: str | None = None
+    ) -> dict[str, object]:
+        return {
+            "id": self.id,
+            "object": "chat.completion.chunk",
+            "created": self.created,
+            "model": self.model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    def usage_chunk(self, usage: TokenUsage | None) -> dict[str, object]:
+        return {
+            "id": self.id,
+            "object": "chat.completion.chunk",
+            "created": self.created,
+            "model": self.model,
+            "choices": [],
+            "usage": _usage_dict(usage),
+        }
+
+    def response(
+        self, content: str, reasoning: str, usage: TokenUsage | None
+    ) -> dict[str, object]:
+        message = {"role": "assistant", "content": content}
+        if reasoning:
+            message["reasoning_content"] = reasoning
+        return {
+            "id": self.id,
+            "object": "chat.completion",
+            "created": self.created,
+            "model": self.model,
+            "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+            "usage": _usage_dict(usage),
+        }
+
+
+def _usage_dict(usage: TokenUsage | None) -> dict[str, object]:
+    usage = usage or TokenUsage()
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "total_tokens": usage.total_tokens,
+        "prompt_tokens_details": {"cached_tokens": usage.cached_prompt_tokens},
+        "completion_tokens_details": {"reasoning_tokens": usage.reasoning_tokens},
+    }
+
+
+def _sse(data: dict[str, object]) -> str:
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _error_response(status: int, message: str, error_type: str) -> "Response":
+    from starlette.responses import JSONResponse
+
+    return JSONResponse(
+        {"error": {"message": message, "type": error_type, "code": None}},
+        status_code=status,
+    )
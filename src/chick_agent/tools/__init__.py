@@ -1,6 +1,17 @@
+from chick_agent.tools.arguments import ArgumentParser
+from chick_agent.tools.index import ToolIndex
 from chick_agent.tools.registry import ToolRegistry
 from chick_agent.tools.tool import Tool, ToolParameter
 from chick_agent.tools.mcp_tool import MCPTool
+from chick_agent.tools.result_cache import ToolResultCache
 
 
-__all__ = ["ToolRegistry", "Tool", "MCPTool", "ToolParameter"]
+__all__ = [
+    "ToolRegistry",
+    "Tool",
+    "MCPTool",
+    "ToolParameter",
+    "ToolResultCache",
+    "ToolIndex",
+    "ArgumentParser",
+]
@@ -0,0 +1,394 @@
+import copy
+import json
+import re
+
+from collections.abc import Callable
+
+from chick_agent.core.exceptions import ToolArgumentError
+
+# 工具参数的 JSON schema 在注册时编译为嵌套的转换函数, 调用时不再遍历 schema;
+# 转换函数接收 (值, 参数路径), 返回转换后的值, 无法转换时抛出 ToolArgumentError
+Coercer = Callable[[object, str], object]
+
+_TRUE = frozenset(("true", "1", "yes", "y", "on", "是"))
+_FALSE = frozenset(("false", "0", "no", "n", "off", "否"))
+_KEY_PATTERN = re.compile(r"[^\W\d][\w.-]*")
+_BRACKETS = {"[": "]", "{": "}", "(": ")"}
+_NESTING_PATTERN = re.compile(r"[\[{(\"']")
+
+
+class _TypeMismatch(ToolArgumentError):
+    # path 处的值类型不符; anyOf 中优先报告类型相符、只是内部字段有误的候选
+    def __init__(self, path: str, message: str):
+        super().__init__(message)
+        self.path = path
+
+
+def _shallow(error: ToolArgumentError | None, path: str) -> bool:
+    return isinstance(error, _TypeMismatch) and error.path == path
+
+
+def _label(path: str) -> str:
+    return f"参数 {path}" if path else "参数"
+
+
+def _identity(value: object, path: str) -> object:
+    return value
+
+
+def _string(value: object, path: str) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    raise _TypeMismatch(path, f"{_label(path)} 应为字符串, 实际为 {value!r}")
+
+
+def _integer(value: object, path: str) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            number = float(text)
+        except ValueError:
+            pass
+        else:
+            if number.is_integer():
+                return int(number)
+    raise _TypeMismatch(path, f"{_label(path)} 应为整数, 实际为 {value!r}")
+
+
+def _number(value: object, path: str) -> int | float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            return float(text)
+        except ValueError:
+            pass
+    raise _TypeMismatch(path, f"{_label(path)} 应为数字, 实际为 {value!r}")
+
+
+def _boolean(value: object, path: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+    raise _TypeMismatch(path, f"{_label(path)} 应为布尔值, 实际为 {value!r}")
+
+
+def _null(value: object, path: str) -> None:
+    if value is None or (isinstance(value, str) and value.strip() in ("", "null")):
+        return None
+    raise _TypeMismatch(path, f"{_label(path)} 应为 null, 实际为 {value!r}")
+
+
+_SCALARS: dict[str, Coercer] = {
+    "string": _string,
+    "integer": _integer,
+    "number": _number,
+    "boolean": _boolean,
+    "null": _null,
+}
+
+
+def _any_of(coercers: list[Coercer]) -> Coercer:
+    # 依次尝试各候选 schema, 使用第一个转换成功的结果
+    def coerce(value: object, path: str) -> object:
+        error = None
+        for candidate in coercers:
+            try:
+                return candidate(value, path)
+            except ToolArgumentError as e:
+                if error is None or _shallow(error, path):
+                    error = e
+        raise error or ToolArgumentError(f"{_label(path)} 无效: {value!r}")
+
+    return coerce
+
+
+def _enum(inner: Coercer, options: list[object]) -> Coercer:
+    def coerce(value: object, path: str) -> object:
+        value = inner(value, path)
+        if value in options:
+            return value
+        # 无类型声明的枚举, 文本参数按字面匹配
+        if isinstance(value, str):
+            for option in options:
+                if _string(option, path) == value:
+                    return option
+        raise ToolArgumentError(
+            f"{_label(path)} 应为 {', '.join(map(repr, options))} 之一, 实际为 {value!r}"
+        )
+
+    return coerce
+
+
+def _loads(value: str, path: str, kind: type) -> object:
+    try:
+        loaded = json.loads(value)
+    except json.JSONDecodeError:
+        loaded = None
+    if not isinstance(loaded, kind):
+        expected = "对象" if kind is dict else "数组"
+        raise _TypeMismatch(path, f"{_label(path)} 应为{expected}, 实际为 {value!r}")
+    return loaded
+
+
+class _Compiler:
+    def __init__(self, root: dict[str, object]):
+        self.root = root
+        self._refs: dict[str, Coercer | None] = {}
+
+    def compile(self, schema: object) -> Coercer:
+        if not isinstance(schema, dict):
+            return _identity
+        if "$ref" in schema:
+            return self._ref(schema["$ref"])
+        for key in ("anyOf", "oneOf"):
+            if key in schema:
+                return _any_of([self.compile(s) for s in schema[key]])
+        if "allOf" in schema:
+            merged = {k: v for k, v in schema.items() if k != "allOf"}
+            for part in schema["allOf"]:
+                if isinstance(part, dict):
+                    merged = {**self._deref(part), **merged}
+            return self.compile(merged)
+        kind = schema.get("type")
+        if isinstance(kind, list):
+            return _any_of([self.compile({**schema, "type": t}) for t in kind])
+        if kind == "object" or (kind is None and "properties" in schema):
+            coerce = self._object(schema)
+        elif kind == "array":
+            coerce = self._array(schema)
+        else:
+            coerce = _SCALARS.get(kind, _identity)
+        if "enum" in schema:
+            coerce = _enum(coerce, list(schema["enum"]))
+        elif "const" in schema:
+            coerce = _enum(coerce, [schema["const"]])
+        return coerce
+
+    def _deref(self, schema: dict[str, object]) -> dict[str, object]:
+        if "$ref" in schema:
+            return self._resolve(schema["$ref"]) or {}
+        return schema
+
+    def _resolve(self, ref: str) -> dict[str, object] | None:
+        # 只支持同一文档内的 JSON 指针, 如 #/$defs/Item
+        if not ref.startswith("#"):
+            return None
+        node: object = self.root
+        for part in ref[1:].split("/"):
+            if not part:
+                continue
+            part = part.replace("~1", "/").replace("~0", "~")
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        return node if isinstance(node, dict) else None
+
+    def _ref(self, ref: str) -> Coercer:
+        if ref not in self._refs:
+            self._refs[ref] = None
+            self._refs[ref] = self.compile(self._resolve(ref))
+        compiled = self._refs[ref]
+        if compiled is None:
+            # 递归定义: 编译完成前引用自身, 调用时再取已编译的函数
+            return lambda value, path: self._refs[ref](value, path)
+        return compiled
+
+    def _object(self, schema: dict[str, object]) -> Coercer:
+        raw_properties = schema.get("properties") or {}
+        properties = {name: self.compile(s) for name, s in raw_properties.items()}
+        defaults = {
+            name: s["default"]
+            for name, s in raw_properties.items()
+            if isinstance(s, dict) and "default" in s
+        }
+        required = tuple(schema.get("required") or ())
+        additional = schema.get("additionalProperties", True)
+        extra = self.compile(additional) if isinstance(additional, dict) else None
+
+        def coerce(value: object, path: str) -> dict[str, object]:
+            if isinstance(value, str):
+                value = _loads(value, path, dict)
+            if not isinstance(value, dict):
+                raise _TypeMismatch(path, f"{_label(path)} 应为对象, 实际为 {value!r}")
+            result = {}
+            for key, item in value.items():
+                # 可选参数传入 null 视为未传, 由默认值或工具自身处理
+                if item is None and key not in required:
+                    continue
+                item_path = f"{path}.{key}" if path else key
+                inner = properties.get(key, extra)
+                if inner is not None:
+                    result[key] = inner(item, item_path)
+                elif additional is False:
+                    raise ToolArgumentError(f"未知参数 {item_path}")
+                else:
+                    result[key] = item
+            for key, default in defaults.items():
+                if key not in result:
+                    result[key] = copy.deepcopy(default)
+            missing = [key for key in required if key not in result]
+            if missing:
+                prefix = f"{path}." if path else ""
+                raise ToolArgumentError(
+                    f"缺少必需参数: {', '.join(prefix + key for key in missing)}"
+                )
+            return result
+
+        return coerce
+
+    def _array(self, schema: dict[str, object]) -> Coercer:
+        items = self.compile(schema.get("items"))
+
+        def coerce(value: object, path: str) -> list[object]:
+            if isinstance(value, str):
+                value = _parse_array_text(value)
+            elif isinstance(value, tuple):
+                value = list(value)
+            elif not isinstance(value, list):
+                value = [value]
+            return [items(item, f"{path}[{i}]") for i, item in enumerate(value)]
+
+        return coerce
+
+
+def _parse_array_text(text: str) -> list[object]:
+    # 优先按 JSON 解析, 否则按逗号切分, 如 [a, b] 或 a,b
+    text = text.strip()
+    if text.startswith("["):
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            text = text[1:-1] if text.endswith("]") else text[1:]
+        else:
+            if isinstance(value, list):
+                return value
+    return [
+        _unquote(part.strip()) for part in split_top_level(text, ",") if part.strip()
+    ]
+
+
+def split_top_level(text: str, separator: str) -> list[str]:
+    # 按分隔符切分, 引号和括号内的分隔符不切分
+    if not _NESTING_PATTERN.search(text):
+        return text.split(separator)
+    parts, start, depth, quote = [], 0, [], None
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == "\\":
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char in _BRACKETS:
+            depth.append(_BRACKETS[char])
+        elif depth and char == depth[-1]:
+            depth.pop()
+        elif char == separator and not depth:
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        if value[0] == '"':
+            try:
+                return json.loads(value)
+            except json.JSONDecodeError:
+                pass
+        return value[1:-1]
+    return value
+
+
+def parse_argument_text(
+    text: str,
+    names: frozenset[str] = frozenset(),
+    text_names: frozenset[str] = frozenset(),
+) -> dict[str, object]:
+    # 解析 JSON 对象或 key=value 列表; text_names 为字符串类型的参数,
+    # 其值中未加引号的逗号只要后面不是已知参数名加 "=", 就视为值的一部分
+    text = text.strip()
+    if not text:
+        return {}
+    if text.startswith("{"):
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            pass
+        else:
+            if isinstance(value, dict):
+                return value
+    params: dict[str, str] = {}
+    key = None
+    for segment in split_top_level(text, ","):
+        name, sep, value = segment.partition("=")
+        name = name.strip()
+        starts = key is None or key not in text_names or name in names
+        if sep and starts and _KEY_PATTERN.fullmatch(name):
+            key = name
+            params[key] = value
+        elif key is not None:
+            params[key] += "," + segment
+    return {key: _unquote(value.strip()) for key, value in params.items()}
+
+
+class ArgumentParser:
+    # 工具参数的解析与校验, 由工具的 input schema 编译而成, 注册工具时构造一次
+    def __init__(self, schema: dict[str, object] | None = None):
+        schema = dict(schema or {})
+        schema.setdefault("type", "object")
+        self.schema = schema
+        properties = schema.get("properties") or {}
+        self.names = frozenset(properties)
+        self.text_names = frozenset(
+            name
+            for name, s in properties.items()
+            if isinstance(s, dict) and s.get("type") == "string"
+        )
+        self._coerce = _Compiler(schema).compile(schema)
+
+    def parse(self, arguments: str | dict[str, object] | None) -> dict[str, object]:
+        if arguments is None:
+            arguments = {}
+        elif isinstance(arguments, str):
+            arguments = self.parse_text(arguments)
+        return self._coerce(arguments, "")
+
+    def parse_text(self, text: str) -> dict[str, object]:
+        params = parse_argument_text(text, self.names, self.text_names)
+        # 只有一个参数的工具允许省略参数名
+        if not params and len(self.names) == 1 and "=" not in text and text.strip():
+            params = {next(iter(self.names)): _unquote(text.strip())}
+        return params
@@ -0,0 +1,112 @@
+import heapq
+import math
+import re
+import threading
+
+from collections import Counter
+
+from chick_agent.tools.tool import Tool
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+|[㐀-鿿豈-﫿]+")
+_CJK_PATTERN = re.compile(r"[㐀-鿿豈-﫿]")
+# 拆分 camelCase, 如 readFile -> read File
+_CAMEL_PATTERN = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def tokenize(text: str) -> list[str]:
+    # 不依赖分词器: 英文按单词切分, 中文取单字和相邻二字组合
+    tokens = []
+    text = _CAMEL_PATTERN.sub(" ", text).lower()
+    for word in _WORD_PATTERN.findall(text):
+        if not _CJK_PATTERN.match(word):
+            tokens.append(word)
+            continue
+        tokens.extend(word)
+        tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def _tool_text(tool: Tool) -> str:
+    parts = [tool.name, tool.description or ""]
+    try:
+        parameters = tool.get_parameters()
+    except Exception:
+        parameters = []
+    for param in parameters:
+        parts.append(param.name)
+        parts.append(param.description or "")
+    return " ".join(parts)
+
+
+class ToolIndex:
+    # 工具名称、描述和参数说明的 BM25 倒排索引, 注册工具时增量更新
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lengths: dict[str, int] = {}
+        self._terms: dict[str, Counter[str]] = {}
+        self._postings: dict[str, dict[str, int]] = {}
+        self._total_length = 0
+        # 各工具的 BM25 长度归一化因子, 索引变化后在下次检索时重算
+        self._norms: dict[str, float] | None = None
+        # MCP 服务的工具列表可能在后台线程中更新
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, tool: Tool):
+        terms = Counter(tokenize(_tool_text(tool)))
+        with self._lock:
+            self._remove(tool.name)
+            self._terms[tool.name] = terms
+            self._lengths[tool.name] = sum(terms.values())
+            self._total_length += self._lengths[tool.name]
+            self._norms = None
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[tool.name] = count
+
+    def remove(self, name: str):
+        with self._lock:
+            self._remove(name)
+
+    def _remove(self, name: str):
+        terms = self._terms.pop(name, None)
+        if terms is None:
+            return
+        self._total_length -= self._lengths.pop(name)
+        self._norms = None
+        for term in terms:
+            postings = self._postings[term]
+            del postings[name]
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        # 返回得分最高的 k 个 (工具名, 得分), 不含与查询没有共同词项的工具
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._lengths)
+            if not count or not terms:
+                return []
+            norms = self._norms
+            if norms is None:
+                average = self._total_length / count or 1.0
+                norms = self._norms = {
+                    name: self.k1 * (1 - self.b + self.b * length / average)
+                    for name, length in self._lengths.items()
+                }
+            scores: dict[str, float] = {}
+            boost = self.k1 + 1
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(
+                    1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                for name, tf in postings.items():
+                    scores[name] = scores.get(name, 0.0) + idf * tf * boost / (
+                        tf + norms[name]
+                    )
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
@@ -1,10 +1,15 @@
 import asyncio
 
+from collections.abc import Callable, Coroutine, Iterable
 from concurrent import futures
-from typing import override
+from typing import Literal, override
 
+from chick_agent.core.loop import run_sync, submit
+from chick_agent.core.tracing import Tracer, get_tracer
+from chick_agent.tools.result_cache import ResultKey, ToolResultCache
+from chick_agent.tools.schema_cache import ToolSchemaCache
 from chick_agent.tools.tool import Tool, ToolParameter
-from chick_agent.protocols.mcp import MCPClient
+from chick_agent.protocols.mcp import MCPSessionPool
 
 
 class MCPTool(Tool):
@@ -17,6 +22,15 @@ class MCPTool(Tool):
         server: object | None = None,
         auto_expand: bool = True,
         env: dict[str, str] | None = None,
+        session_pool: MCPSessionPool | None = None,
+        cacheable_tools: list[str] | None = None,
+        cache_annotated_tools: bool = True,
+        cache_ttl: float | None = None,
+        result_cache: ToolResultCache | None = None,
+        cache_schema: bool = True,
+        schema_cache: ToolSchemaCache | None = None,
+        tracer: Tracer | None = None,
+        discovery_timeout: float | None = None,
     ):
         self.name = name
         self.server_command = server_command
@@ -27,51 +41,147 @@ class MCPTool(Tool):
         self._client = None
         self._available_tools = []
         self.env = env
+        # 未传入会话池时独占一个, close 时一并关闭; 共享的池由调用方负责关闭
+        self._owns_pool = session_pool is None
+        self.session_pool = session_pool or MCPSessionPool()
+        # 结果缓存只对幂等工具生效: 注册时显式声明, 或由服务端标注 readOnlyHint/idempotentHint
+        self.cacheable_tools = set(cacheable_tools or [])
+        self.cache_annotated_tools = cache_annotated_tools
+        self.cache_ttl = cache_ttl
+        self.result_cache = result_cache or ToolResultCache()
+        self._annotated_cacheable: set[str] = set()
+        # 工具列表优先从本地缓存读取, 服务进程在首次调用或后台校验时才启动
+        self.schema_cache = (
+            (schema_cache or ToolSchemaCache.default()) if cache_schema else None
+        )
+        self.schema_revalidation: futures.Future | None = None
+        self.on_tools_changed: list[Callable[[list[Tool]], None]] = []
+        # 工具列表发现状态: pending 未发现, ready 已获取, degraded 服务启动超时或失败;
+        # degraded 时后台继续等待连接, 成功后经 on_tools_changed 通知注册表展开
+        self.discovery_timeout = discovery_timeout
+        self.status: Literal["pending", "ready", "degraded"] = "pending"
+        self.discovery_error: str | None = None
+        # 未指定时使用全局 tracer (默认不记录)
+        self.tracer = tracer
         super().__init__(name=name, description=description)
 
     def auto_expand_tools(self) -> list[Tool] | None:
         if not self.auto_expand:
             return None
-        self._discover_tools()
-        tools = []
-        for mcp_tool in self._available_tools:
-            tool = MCPInnerTool(
-                self,
-                mcp_tool,
-            )
-            tools.append(tool)
-        return tools
+        if self.status == "pending":
+            self._discover_tools()
+        return self._inner_tools()
+
+    def _inner_tools(self) -> list[Tool]:
+        return [MCPInnerTool(self, mcp_tool) for mcp_tool in self._available_tools]
+
+    def _schema_key(self) -> str | None:
+        if self.schema_cache is None:
+            return None
+        source = self.server if self.server else self.server_command
+        return self.schema_cache.make_key(source, self.server_args, self.env)
 
     def _discover_tools(self):
+        run_sync(self.discover_tools(self.discovery_timeout))
+
+    async def discover_tools(self, timeout: float | None = None) -> bool:
+        # 获取工具列表, 返回是否就绪; 超时只放弃等待, 连接在会话池中继续建立
+        key = self._schema_key()
+        cached = self.schema_cache.get(key) if key else None
+        if cached is not None:
+            self._set_available_tools(cached)
+            self.status = "ready"
+            self.schema_revalidation = submit(
+                self._on_pool_loop(self._revalidate_schema(key))
+            )
+            return True
         try:
+            tools = await asyncio.wait_for(
+                self._on_pool_loop(self._list_server_tools()), timeout
+            )
+        except Exception as e:
+            self.status = "degraded"
+            self.discovery_error = str(e) or type(e).__name__
+            self._set_available_tools([])
+            self.schema_revalidation = submit(
+                self._on_pool_loop(self._revalidate_schema(key))
+            )
+            return False
+        self._set_available_tools(tools)
+        self.status = "ready"
+        if key and tools:
+            self.schema_cache.put(key, tools)
+        return True
 
-            async def discover():
-                source = self.server if self.server else self.server_command
-                async with MCPClient(
-                    source, server_args=self.server_args, env=self.env
-                ) as client:
-                    tools = await client.list_tools()
-                    return tools
+    async def _revalidate_schema(self, key: str | None) -> bool:
+        # 后台连接服务核对工具列表, 有变化时更新缓存并通知注册表重新展开
+        try:
+            tools = await self._list_server_tools()
+        except Exception:
+            return False
+        self.status = "ready"
+        self.discovery_error = None
+        if tools == self._available_tools:
+            return False
+        if key:
+            self.schema_cache.put(key, tools)
+        self._set_available_tools(tools)
+        expanded = self._inner_tools()
+        for callback in list(self.on_tools_changed):
+            callback(expanded)
+        return True
 
-            try:
-                _ = asyncio.get_running_loop()
+    def _set_available_tools(self, tools: list[dict[str, object]]):
+        self._available_tools = tools
+        self._annotated_cacheable = {
+            tool["name"]
+            for tool in tools
+            if _is_idempotent(tool.get("annotations") or {})
+        }
 
-                def run_in_thread():
-                    new_loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(new_loop)
-                    try:
-                        return new_loop.run_until_complete(discover())
-                    finally:
-                        new_loop.close()
+    def is_cacheable(self, tool_name: str) -> bool:
+        return tool_name in self.cacheable_tools or (
+            self.cache_annotated_tools and tool_name in self._annotated_cacheable
+        )
 
-                with futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(run_in_thread)
-                    self._available_tools = future.result()
-            except RuntimeError:
-                self._available_tools = asyncio.run(discover())
+    def invalidate_cache(self, tool_name: str | None = None):
+        self.result_cache.invalidate(self.name, tool_name)
 
-        except Exception as e:
-            self._available_tools = []
+    def _result_key(
+        self, tool_name: str | None, arguments: dict[str, object]
+    ) -> ResultKey | None:
+        if not tool_name or not self.is_cacheable(tool_name):
+            return None
+        return self.result_cache.make_key(self.name, tool_name, arguments)
+
+    def _cached_result(self, parameters: dict[str, object]) -> str | None:
+        if str(parameters.get("action", "")).lower() != "call_tool":
+            return None
+        key = self._result_key(
+            parameters.get("tool_name"), parameters.get("arguments") or {}
+        )
+        return self.result_cache.get(key) if key else None
+
+    async def _list_server_tools(self) -> list[dict[str, object]]:
+        async with self._session() as client:
+            with self._get_tracer().span("mcp.list_tools", {"server": self.name}):
+                return await client.list_tools()
+
+    async def _on_pool_loop[T](self, coro: Coroutine[object, object, T]) -> T:
+        # 会话池已绑定在其他事件循环上时(例如同步调用使用的共享后台循环), 转交给该循环执行
+        loop = self.session_pool.loop
+        if loop is None or loop is asyncio.get_running_loop():
+            return await coro
+        return await asyncio.wrap_future(submit(coro, loop))
+
+    def _get_tracer(self) -> Tracer:
+        return self.tracer or get_tracer()
+
+    def _session(self):
+        source = self.server if self.server else self.server_command
+        return self.session_pool.session(
+            source, self.server_args, self.env, tracer=self._get_tracer()
+        )
 
     @override
     def get_parameters(self) -> list[ToolParameter]:
@@ -116,60 +226,69 @@ class MCPTool(Tool):
 
     @override
     def run(self, parameters: dict[str, object]) -> str:
+        # 缓存命中时直接返回, 不经过后台事件循环
+        cached = self._cached_result(parameters)
+        if cached is not None:
+            return cached
+        return run_sync(self._arun(parameters))
+
+    @override
+    async def arun(self, parameters: dict[str, object]) -> str:
+        cached = self._cached_result(parameters)
+        if cached is not None:
+            return cached
+        return await self._arun(parameters)
+
+    async def _arun(self, parameters: dict[str, object]) -> str:
         action = parameters.get("action", "").lower()
 
         if not action:
             return "错误：必须指定 action 参数或 tool_name 参数"
         try:
+            return await self._on_pool_loop(self._run_action(action, parameters))
+        except Exception as e:
+            return f"MCP操作失败: {e}"
 
-            async def run_mcp_tool():
-                if self.server:
-                    client_source = self.server
+    async def _run_action(self, action: str, parameters: dict[str, object]) -> str:
+        async with self._session() as client:
+            if action == "list_tools":
+                with self._get_tracer().span("mcp.list_tools", {"server": self.name}):
+                    tools = await client.list_tools()
+                if not tools:
+                    return "没有找到可用工具"
+                result = f"找到 {len(tools)} 个工具:\n"
+                for tool in tools:
+                    result += f"- {tool.get('name')}: {tool.get('description')}\n"
+                return result
+            elif action == "call_tool":
+                tool_name: str = parameters.get("tool_name")
+                if not tool_name:
+                    return "错误: 没有指定tool_name"
+                arguments = parameters.get("arguments") or {}
+                key = self._result_key(tool_name, arguments)
+                with self._get_tracer().span(
+                    "mcp.call_tool", {"server": self.name, "tool": tool_name}
+                ):
+                    result = await client.call_tool(tool_name, arguments)
+                text = f"工具 {tool_name} 执行结果: \n{result}"
+                if key:
+                    self.result_cache.put(key, text, self.cache_ttl)
                 else:
-                    client_source = self.server_command
-
-                async with MCPClient(
-                    client_source, self.server_args, env=self.env
-                ) as client:
-                    if action == "list_tools":
-                        tools = await client.list_tools()
-                        if not tools:
-                            return "没有找到可用工具"
-                        result = f"找到 {len(tools)} 个工具:\n"
-                        for tool in tools:
-                            result += (
-                                f"- {tool.get('name')}: {tool.get('description')}\n"
-                            )
-                        return result
-                    elif action == "call_tool":
-                        tool_name: str = parameters.get("tool_name")
-                        if not tool_name:
-                            return "错误: 没有指定tool_name"
-                        arguments = parameters.get("arguments", {})
-                        result = await client.call_tool(tool_name, arguments)
-                        return f"工具 {tool_name} 执行结果: \n{result}"
-                    else:
-                        return "错误: 不支持的操作: {action}"
-
-            try:
-                _ = asyncio.get_running_loop()
-
-                def run_in_thread():
-                    new_loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(new_loop)
-                    try:
-                        return new_loop.run_until_complete(run_mcp_tool())
-                    finally:
-                        new_loop.close()
-
-                with futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(run_in_thread)
-                    return future.result()
-            except RuntimeError:
-                return asyncio.run(run_mcp_tool())
+                    # 可能有副作用的调用会让同一服务上缓存的读结果过期
+                    self.invalidate_cache()
+                return text
+            else:
+                return f"错误: 不支持的操作: {action}"
 
-        except Exception as e:
-            return f"MCP操作失败: {e}"
+    @override
+    def close(self):
+        if self._owns_pool:
+            self.session_pool.close()
+
+    @override
+    async def aclose(self):
+        if self._owns_pool:
+            await self._on_pool_loop(self.session_pool.aclose())
 
 
 class MCPInnerTool(Tool):
@@ -210,10 +329,57 @@ class MCPInnerTool(Tool):
         return self._parameters
 
     @override
-    def run(self, params: dict[str, object]) -> str:
-        mcp_params = {
+    def input_schema(self) -> dict[str, object]:
+        # 直接使用 MCP 服务声明的 input_schema, 保留嵌套对象、数组、枚举等信息
+        parameters = dict(self.tool_info.get("input_schema") or {})
+        parameters.setdefault("type", "object")
+        parameters.setdefault("properties", {})
+        return parameters
+
+    def _mcp_params(self, params: dict[str, object]) -> dict[str, object]:
+        return {
             "action": "call_tool",
             "tool_name": self.mcp_tool_name,
             "arguments": params,
         }
-        return self.mcp_tool.run(mcp_params)
+
+    def invalidate_cache(self):
+        self.mcp_tool.invalidate_cache(self.mcp_tool_name)
+
+    @override
+    def run(self, params: dict[str, object]) -> str:
+        return self.mcp_tool.run(self._mcp_params(params))
+
+    @override
+    async def arun(self, params: dict[str, object]) -> str:
+        return await self.mcp_tool.arun(self._mcp_params(params))
+
+    @override
+    def close(self):
+        self.mcp_tool.close()
+
+    @override
+    async def aclose(self):
+        await self.mcp_tool.aclose()
+
+
+async def discover_all(tools: Iterable[Tool], timeout: float | None = None):
+    # 并发发现多个 MCP 服务的工具列表, 总耗时取决于最慢的服务;
+    # 服务自身的 discovery_timeout 优先于 timeout
+    pending = [
+        tool
+        for tool in tools
+        if isinstance(tool, MCPTool) and tool.auto_expand and tool.status == "pending"
+    ]
+    await asyncio.gather(
+        *(
+            tool.discover_tools(
+                timeout if tool.discovery_timeout is None else tool.discovery_timeout
+            )
+            for tool in pending
+        )
+    )
+
+
+def _is_idempotent(annotations: dict[str, object]) -> bool:
+    return bool(annotations.get("readOnlyHint") or annotations.get("idempotentHint"))
@@ -1,27 +1,218 @@
+import threading
+import weakref
+
+from collections.abc import Callable, Iterable
+
+from chick_agent.tools.arguments import ArgumentParser
+from chick_agent.tools.index import ToolIndex
 from chick_agent.tools.tool import Tool
-from chick_agent.tools.mcp_tool import MCPTool
+from chick_agent.core.loop import run_sync
+from chick_agent.tools.mcp_tool import MCPInnerTool, MCPTool, discover_all
 
 
 class ToolRegistry:
     def __init__(self):
         self._tools: dict[str, Tool] = {}
         self._functions: dict[str, dict[str, object]] = {}
+        # 每次注册变更递增, 依赖工具列表的渲染结果据此失效
+        self.version = 0
+        self._descriptions: tuple[int, str] | None = None
+        self._openai_tools: tuple[int, list[dict[str, object]]] | None = None
+        # 展开后的工具名, 用于在 MCP 服务工具列表变化时替换
+        self._expanded: dict[str, list[str]] = {}
+        # 按相关性选择工具用的检索索引, 以及无论是否相关都始终提供的工具
+        self.index = ToolIndex()
+        self.pinned: set[str] = set()
+        self._tool_schemas: tuple[int, dict[str, dict[str, object]]] = (0, {})
+        # 注册时由各工具的参数 schema 编译的解析器
+        self._parsers: dict[str, ArgumentParser] = {}
+        self._servers: dict[str, MCPTool] = {}
+        # 注册和 MCP 服务工具列表更新(后台线程)的写入互斥
+        self._lock = threading.RLock()
 
-    def register_tool(self, tool: Tool, auto_expand: bool = True):
-        if auto_expand:
-            if hasattr(tool, "auto_expand") and tool.auto_expand:
+    def register_tool(self, tool: Tool, auto_expand: bool = True, pinned: bool = False):
+        # pinned 的 MCP 工具展开后, 展开出的所有工具都始终提供
+        if pinned:
+            self.pinned.add(tool.name)
+        # 发现工具列表可能等待后台事件循环, 不能持有锁, 否则与该循环上的回调互相等待
+        expanded_tools = None
+        if auto_expand and getattr(tool, "auto_expand", False):
+            expanded_tools = tool.auto_expand_tools()
+        degraded = isinstance(tool, MCPTool) and tool.status == "degraded"
+        # MCP 服务即使暂时没有工具(降级或就绪但列表为空)也订阅变更, 工具上线后自动补上
+        if expanded_tools or (expanded_tools is not None and isinstance(tool, MCPTool)):
+            if isinstance(tool, MCPTool):
+                with self._lock:
+                    # 同一服务重复注册时只订阅一次
+                    if self._servers.get(tool.name) is not tool:
+                        self._servers[tool.name] = tool
+                        tool.on_tools_changed.append(self._expansion_callback(tool))
+                # 订阅后再取一次, 不错过订阅前已在后台完成的发现
                 expanded_tools = tool.auto_expand_tools()
-                if expanded_tools:
-                    for t in expanded_tools:
-                        self._tools[t.name] = t
-                    print(f"{tool.name} 展开为: {len(expanded_tools)} 个工具")
-                    return
-
-    def get_tool_descriptions(self) -> str:
-        descriptions = []
-        for tool in self._tools.values():
-            descriptions.append(f"- {tool.name}: {tool.description}")
-        return "\n".join(descriptions) if descriptions else "无可用工具"
+            self._replace_expanded(tool, expanded_tools)
+            if degraded and not expanded_tools:
+                print(f"{tool.name} 暂不可用, 降级注册: {tool.discovery_error}")
+            else:
+                print(f"{tool.name} 展开为: {len(expanded_tools)} 个工具")
+            return
+        parser = ArgumentParser(tool.input_schema())
+        with self._lock:
+            self._parsers = {**self._parsers, tool.name: parser}
+            self.index.add(tool)
+            self._tools = {**self._tools, tool.name: tool}
+            self.version += 1
+
+    def _expansion_callback(self, tool: MCPTool) -> Callable[[list[Tool]], None]:
+        # 只弱引用注册表: 共享的 MCPTool 不会让已废弃的注册表无法回收
+        registry = weakref.ref(self)
+
+        def on_tools_changed(expanded_tools: list[Tool]):
+            target = registry()
+            if target is None:
+                tool.on_tools_changed.remove(on_tools_changed)
+                return
+            target._replace_expanded(tool, expanded_tools)
+
+        return on_tools_changed
+
+    def register_tools(
+        self,
+        tools: list[Tool],
+        auto_expand: bool = True,
+        pinned: bool = False,
+        timeout: float | None = None,
+    ):
+        # 批量注册: 先并发发现所有 MCP 服务的工具列表, 超时的服务降级注册, 不阻塞其他服务
+        if auto_expand:
+            run_sync(discover_all(tools, timeout))
+        for tool in tools:
+            self.register_tool(tool, auto_expand=auto_expand, pinned=pinned)
+
+    async def aregister_tools(
+        self,
+        tools: list[Tool],
+        auto_expand: bool = True,
+        pinned: bool = False,
+        timeout: float | None = None,
+    ):
+        if auto_expand:
+            await discover_all(tools, timeout)
+        for tool in tools:
+            self.register_tool(tool, auto_expand=auto_expand, pinned=pinned)
+
+    def server_status(self) -> dict[str, str]:
+        # 已注册 MCP 服务的发现状态: ready 或 degraded
+        return {name: server.status for name, server in self._servers.items()}
+
+    def _replace_expanded(self, parent: Tool, expanded_tools: list[Tool]):
+        # 可能在后台线程中调用; 与 register_tool 互斥, 构造新字典后整体替换, 读取方无需加锁
+        parsers = {t.name: ArgumentParser(t.input_schema()) for t in expanded_tools}
+        with self._lock:
+            stale = set(self._expanded.get(parent.name, ()))
+            tools = {name: t for name, t in self._tools.items() if name not in stale}
+            for t in expanded_tools:
+                tools[t.name] = t
+            parsers = {
+                **{n: p for n, p in self._parsers.items() if n not in stale},
+                **parsers,
+            }
+            for name in stale - tools.keys():
+                self.index.remove(name)
+            for t in expanded_tools:
+                self.index.add(t)
+            self._expanded[parent.name] = [t.name for t in expanded_tools]
+            self._parsers = parsers
+            self._tools = tools
+            self.version += 1
+
+    def _pinned_names(self, extra: Iterable[str]) -> set[str]:
+        names = self.pinned | set(extra)
+        for parent in list(names):
+            names.update(self._expanded.get(parent, ()))
+        return names
+
+    def select_tools(
+        self, query: str, k: int, pinned: list[str] | tuple[str, ...] = ()
+    ) -> list[Tool] | None:
+        # 固定工具加上与 query 最相关的至多 k 个工具, 按注册顺序返回以保持提示词稳定;
+        # 工具总数不超过该规模时返回 None, 表示使用全部工具
+        tools = self._tools
+        always = self._pinned_names(pinned) & tools.keys()
+        if len(tools) <= len(always) + k:
+            return None
+        chosen = set(always)
+        for name, _ in self.index.search(query, k + len(always)):
+            if len(chosen) >= len(always) + k:
+                break
+            if name in tools:
+                chosen.add(name)
+        return [tool for name, tool in tools.items() if name in chosen]
+
+    def get_tool_descriptions(self, tools: list[Tool] | None = None) -> str:
+        # tools 为 select_tools 选出的子集, 为 None 时描述全部工具
+        if tools is not None:
+            return _describe(tools)
+        if self._descriptions is None or self._descriptions[0] != self.version:
+            self._descriptions = (self.version, _describe(self._tools.values()))
+        return self._descriptions[1]
+
+    def get_openai_tools(
+        self, tools: list[Tool] | None = None
+    ) -> list[dict[str, object]]:
+        if tools is not None:
+            return [self._openai_tool(tool) for tool in tools]
+        if self._openai_tools is None or self._openai_tools[0] != self.version:
+            tools = [self._openai_tool(tool) for tool in self._tools.values()]
+            self._openai_tools = (self.version, tools)
+        return self._openai_tools[1]
+
+    def _openai_tool(self, tool: Tool) -> dict[str, object]:
+        # 每个工具的 schema 只构造一次, 不同子集之间共享
+        version, schemas = self._tool_schemas
+        if version != self.version:
+            schemas = {}
+            self._tool_schemas = (self.version, schemas)
+        schema = schemas.get(tool.name)
+        if schema is None:
+            schema = schemas[tool.name] = tool.to_openai_tool()
+        return schema
 
     def get_tool(self, name: str) -> Tool | None:
         return self._tools.get(name)
+
+    def parse_arguments(
+        self, name: str, arguments: str | dict[str, object] | None
+    ) -> dict[str, object]:
+        # 按工具的参数 schema 解析 JSON 或 key=value 参数并转换类型, 无效时抛出 ToolArgumentError
+        parser = self._parsers.get(name)
+        if parser is None:
+            parser = _GENERIC_PARSER
+        return parser.parse(arguments)
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def _owned_resources(self) -> list[Tool]:
+        # 每个 MCP 服务只关闭一次(包括没有展开出工具的降级服务), 展开出的工具由所属服务负责
+        resources = {id(server): server for server in self._servers.values()}
+        for tool in self._tools.values():
+            if isinstance(tool, MCPInnerTool) and id(tool.mcp_tool) in resources:
+                continue
+            resources.setdefault(id(tool), tool)
+        return list(resources.values())
+
+    def close(self):
+        for tool in self._owned_resources():
+            tool.close()
+
+    async def aclose(self):
+        for tool in self._owned_resources():
+            await tool.aclose()
+
+
+_GENERIC_PARSER = ArgumentParser()
+
+
+def _describe(tools: Iterable[Tool]) -> str:
+    descriptions = [f"- {tool.name}: {tool.description}" for tool in tools]
+    return "\n".join(descriptions) if descriptions else "无可用工具"
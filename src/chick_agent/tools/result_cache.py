@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+
+from collections import OrderedDict
+
+ResultKey = tuple[str, str, str]
+
+
+class ToolResultCache:
+    # 幂等工具的结果缓存: 按 (命名空间, 工具名, 规范化参数) 索引, 超出 TTL 即失效,
+    # 总大小超出 max_bytes 时按 LRU 淘汰
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, ttl: float | None = 300.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[ResultKey, tuple[float, int, str]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        namespace: str, tool_name: str, arguments: dict[str, object]
+    ) -> ResultKey:
+        canonical = json.dumps(
+            arguments, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+        )
+        return namespace, tool_name, canonical
+
+    def get(self, key: ResultKey) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: ResultKey, value: str, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else float("inf")
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (expires, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: ResultKey):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def invalidate(
+        self,
+        namespace: str | None = None,
+        tool_name: str | None = None,
+        arguments: dict[str, object] | None = None,
+    ):
+        # 参数留空表示匹配全部, 例如 invalidate("fs") 清除该服务的所有缓存结果
+        with self._lock:
+            if namespace and tool_name and arguments is not None:
+                self._remove(self.make_key(namespace, tool_name, arguments))
+                return
+            for key in list(self._entries):
+                if (namespace is None or key[0] == namespace) and (
+                    tool_name is None or key[1] == tool_name
+                ):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, object]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
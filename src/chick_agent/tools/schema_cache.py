@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+_DEFAULT_CACHE: "ToolSchemaCache | None" = None
+_default_lock = threading.Lock()
+
+
+def _default_path() -> str:
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "chick_agent", "mcp_tools.json")
+
+
+def _file_mtimes(parts: list[str]) -> list[tuple[str, int]]:
+    # 命令本身按 PATH 解析, 参数中存在的文件(如脚本)一并计入, 任何一个更新都会使缓存失效
+    mtimes = []
+    for i, part in enumerate(parts):
+        path = shutil.which(part) if i == 0 else None
+        if path is None and os.path.isfile(part):
+            path = part
+        if path is not None:
+            mtimes.append((part, os.stat(path).st_mtime_ns))
+    return mtimes
+
+
+class ToolSchemaCache:
+    # MCP 服务工具列表的本地持久缓存, 以启动命令、参数、环境变量和可执行文件的 mtime 为键
+    def __init__(self, path: str | None = None):
+        self.path = path or _default_path()
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, object]] | None = None
+        self._mtime: int | None = None
+
+    @classmethod
+    def default(cls) -> "ToolSchemaCache":
+        global _DEFAULT_CACHE
+        with _default_lock:
+            if _DEFAULT_CACHE is None:
+                _DEFAULT_CACHE = cls()
+            return _DEFAULT_CACHE
+
+    @staticmethod
+    def make_key(
+        source: object,
+        server_args: list[str] | None = None,
+        env: dict[str, str] | None = None,
+    ) -> str | None:
+        if isinstance(source, str):
+            command = [source]
+        elif isinstance(source, (list, tuple)):
+            command = list(source)
+        else:
+            # 内存中的 FastMCP 实例无需缓存
+            return None
+        command += server_args or []
+        try:
+            mtimes = _file_mtimes(command)
+        except OSError:
+            return None
+        payload = json.dumps(
+            [command, sorted((env or {}).items()), mtimes], ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load_entries(self) -> dict[str, dict[str, object]]:
+        # 文件被其他进程更新后重新读取
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._entries is None or mtime != self._mtime:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+            self._mtime = mtime
+        return self._entries
+
+    def get(self, key: str) -> list[dict[str, object]] | None:
+        with self._lock:
+            entry = self._load_entries().get(key)
+        return entry["tools"] if entry else None
+
+    def put(self, key: str, tools: list[dict[str, object]]):
+        with self._lock:
+            entries = self._load_entries()
+            entries[key] = {"tools": tools, "updated": time.time()}
+            self._write(entries)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            entries = self._load_entries()
+            if entries.pop(key, None) is not None:
+                self._write(entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._write(self._entries)
+
+    def _write(self, entries: dict[str, dict[str, object]]):
+        # 先写临时文件再替换, 避免并发进程读到写了一半的文件
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._mtime = os.stat(self.path).st_mtime_ns
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
@@ -1,3 +1,5 @@
+import asyncio
+
 from abc import ABC, abstractmethod
 
 from pydantic import BaseModel
@@ -12,6 +14,9 @@ class ToolParameter(BaseModel):
 
 
 class Tool(ABC):
+    # 有副作用的工具应设为 False, 同一轮的多个工具调用中它会单独串行执行
+    allow_parallel: bool = True
+
     def __init__(self, name: str, description: str) -> None:
         self.name = name
         self.description = description
@@ -20,13 +25,46 @@ class Tool(ABC):
     def run(self, parameters: dict[str, object]) -> str:
         pass
 
+    async def arun(self, parameters: dict[str, object]) -> str:
+        # 同步工具放到线程中执行, 避免阻塞事件循环; 原生异步工具应覆盖此方法
+        return await asyncio.to_thread(self.run, parameters)
+
     @abstractmethod
     def get_parameters(self) -> list[ToolParameter]:
         pass
 
+    def close(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        self.close()
+
     def to_dict(self) -> dict[str, object]:
         return {
             "name": self.name,
             "description": self.description,
             "parameters": [param.model_dump() for param in self.get_parameters()],
         }
+
+    def input_schema(self) -> dict[str, object]:
+        # 参数的 JSON schema, 用于函数调用声明和编译参数解析器
+        properties = {}
+        required = []
+        for param in self.get_parameters():
+            schema = {"type": param.type, "description": param.description}
+            if param.default is not None:
+                schema["default"] = param.default
+            properties[param.name] = schema
+            if param.required:
+                required.append(param.name)
+        return {"type": "object", "properties": properties, "required": required}
+
+    def to_openai_tool(self) -> dict[str, object]:
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description or "",
+                "parameters": self.input_schema(),
+            },
+        }
@@ -0,0 +1,206 @@
+import pytest
+
+from chick_agent.agent.tool_call_parser import parse_tool_calls
+from chick_agent.core.exceptions import ToolArgumentError
+from chick_agent.tools.arguments import (
+    ArgumentParser,
+    parse_argument_text,
+    split_top_level,
+)
+
+SEARCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "query": {"type": "string"},
+        "limit": {"type": "integer", "default": 5},
+        "exact": {"type": "boolean"},
+        "score": {"type": "number"},
+        "mode": {"enum": ["fast", "slow", 1]},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "filter": {
+            "type": "object",
+            "properties": {"min": {"type": "number"}, "on": {"type": "boolean"}},
+            "required": ["min"],
+        },
+    },
+    "required": ["query"],
+}
+
+
+@pytest.fixture
+def parser() -> ArgumentParser:
+    return ArgumentParser(SEARCH_SCHEMA)
+
+
+def test_split_top_level_respects_quotes_and_brackets():
+    assert split_top_level('a=1,b="x,y",c=[1,2],d={"k":"v,w"}', ",") == [
+        "a=1",
+        'b="x,y"',
+        "c=[1,2]",
+        'd={"k":"v,w"}',
+    ]
+    assert split_top_level("a=1,b=2", ",") == ["a=1", "b=2"]
+
+
+def test_parse_argument_text_json_object():
+    assert parse_argument_text('{"a": 1, "b": [1, 2]}') == {"a": 1, "b": [1, 2]}
+
+
+def test_key_value_scalars_are_coerced(parser):
+    assert parser.parse("query=python, limit=3, exact=是, score=0.5") == {
+        "query": "python",
+        "limit": 3,
+        "exact": True,
+        "score": 0.5,
+    }
+
+
+def test_comma_inside_string_value(parser):
+    assert parser.parse("query=hello, world, limit=3") == {
+        "query": "hello, world",
+        "limit": 3,
+    }
+    assert parser.parse("query=a=b, c") == {"query": "a=b, c", "limit": 5}
+
+
+def test_quoted_values(parser):
+    assert parser.parse('query="a, limit=9", limit=2')["query"] == "a, limit=9"
+    assert parser.parse("query='单引号'")["query"] == "单引号"
+
+
+def test_defaults_and_null_optional(parser):
+    assert parser.parse({"query": "q", "exact": None}) == {"query": "q", "limit": 5}
+    assert parser.parse({"query": "q", "limit": 1})["limit"] == 1
+    assert ArgumentParser().parse(None) == {}
+
+
+def test_defaults_are_not_shared():
+    parser = ArgumentParser({"properties": {"items": {"type": "array", "default": []}}})
+    first = parser.parse({})
+    first["items"].append(1)
+    assert parser.parse({}) == {"items": []}
+
+
+def test_missing_required(parser):
+    with pytest.raises(ToolArgumentError, match="query"):
+        parser.parse("limit=3")
+
+
+def test_wrong_scalar_types(parser):
+    with pytest.raises(ToolArgumentError, match="limit"):
+        parser.parse("query=a, limit=many")
+    with pytest.raises(ToolArgumentError, match="exact"):
+        parser.parse("query=a, exact=maybe")
+    with pytest.raises(ToolArgumentError):
+        parser.parse({"query": "a", "limit": True})
+    assert parser.parse({"query": "a", "limit": 2.0})["limit"] == 2
+
+
+def test_enum_matches_text_form(parser):
+    assert parser.parse("query=a, mode=1")["mode"] == 1
+    assert parser.parse("query=a, mode=fast")["mode"] == "fast"
+    with pytest.raises(ToolArgumentError, match="mode"):
+        parser.parse("query=a, mode=medium")
+
+
+def test_arrays(parser):
+    assert parser.parse('query=a, tags=[x, "y,z"]')["tags"] == ["x", "y,z"]
+    assert parser.parse('query=a, tags=["p", "q"]')["tags"] == ["p", "q"]
+    assert parser.parse({"query": "a", "tags": "solo"})["tags"] == ["solo"]
+    assert parser.parse({"query": "a", "tags": 3})["tags"] == ["3"]
+
+
+def test_nested_object_from_text(parser):
+    result = parser.parse('query=a, filter={"min": "2.5", "on": "yes"}')
+    assert result["filter"] == {"min": 2.5, "on": True}
+    with pytest.raises(ToolArgumentError, match="filter.min"):
+        parser.parse({"query": "a", "filter": {"on": True}})
+    with pytest.raises(ToolArgumentError, match="filter"):
+        parser.parse({"query": "a", "filter": "not json"})
+
+
+def test_additional_properties():
+    closed = ArgumentParser(
+        {"properties": {"a": {"type": "integer"}}, "additionalProperties": False}
+    )
+    with pytest.raises(ToolArgumentError, match="b"):
+        closed.parse({"a": 1, "b": 2})
+    typed = ArgumentParser({"additionalProperties": {"type": "integer"}})
+    assert typed.parse({"x": "4"}) == {"x": 4}
+    assert ArgumentParser().parse("x=1, y=2") == {"x": "1", "y": "2"}
+
+
+def test_undeclared_key_after_non_string_value():
+    parser = ArgumentParser({"properties": {"a": {"type": "integer"}}})
+    assert parser.parse("a=1, b=2") == {"a": 1, "b": "2"}
+
+
+def test_single_parameter_bare_value():
+    parser = ArgumentParser({"properties": {"path": {"type": "string"}}})
+    assert parser.parse("/tmp/a,b") == {"path": "/tmp/a,b"}
+    assert parser.parse("") == {}
+
+
+def test_any_of_and_type_lists():
+    parser = ArgumentParser(
+        {
+            "properties": {
+                "v": {"anyOf": [{"type": "integer"}, {"type": "string"}]},
+                "w": {"type": ["null", "number"]},
+            }
+        }
+    )
+    assert parser.parse("v=3, w=1.5") == {"v": 3, "w": 1.5}
+    assert parser.parse("v=abc") == {"v": "abc"}
+    with pytest.raises(ToolArgumentError):
+        ArgumentParser({"properties": {"w": {"type": ["null", "number"]}}}).parse("w=x")
+
+
+def test_all_of_merges_parts():
+    parser = ArgumentParser(
+        {
+            "$defs": {"Base": {"properties": {"id": {"type": "integer"}}}},
+            "allOf": [
+                {"$ref": "#/$defs/Base"},
+                {"properties": {"id": {"type": "integer"}, "name": {"type": "string"}}},
+            ],
+            "required": ["id"],
+        }
+    )
+    assert parser.parse("id=7, name=x") == {"id": 7, "name": "x"}
+    with pytest.raises(ToolArgumentError, match="id"):
+        parser.parse("name=x")
+
+
+def test_recursive_ref():
+    parser = ArgumentParser(
+        {
+            "properties": {"node": {"$ref": "#/$defs/Node"}},
+            "$defs": {
+                "Node": {
+                    "type": "object",
+                    "properties": {
+                        "v": {"type": "integer"},
+                        "next": {"anyOf": [{"$ref": "#/$defs/Node"}, {"type": "null"}]},
+                    },
+                }
+            },
+        }
+    )
+    value = {"node": {"v": "1", "next": {"v": "2", "next": {"v": 3}}}}
+    assert parser.parse(value) == {"node": {"v": 1, "next": {"v": 2, "next": {"v": 3}}}}
+    with pytest.raises(ToolArgumentError, match=r"node\.next\.v"):
+        parser.parse({"node": {"v": 1, "next": {"v": "x"}}})
+
+
+def test_unknown_ref_accepts_any_value():
+    parser = ArgumentParser({"properties": {"x": {"$ref": "#/$defs/Missing"}}})
+    assert parser.parse({"x": [1]}) == {"x": [1]}
+
+
+def test_text_tool_call_with_brackets():
+    calls = parse_tool_calls("[TOOL_CALL:search:query=a, tags=[x,y]] [TOOL_CALL:t:a=1]")
+    assert [(c["tool_name"], c["parameters"]) for c in calls] == [
+        ("search", "query=a, tags=[x,y]"),
+        ("t", "a=1"),
+    ]
@@ -0,0 +1,63 @@
+import json
+
+from chick_agent.batch import BatchRunner
+from chick_agent.core.usage import UsageMeter
+
+
+class StubAgent:
+    # 只实现 BatchRunner 用到的接口; failing 中的输入返回异常
+    def __init__(self, failing: set[str] = frozenset()):
+        self.failing = failing
+        self.usage = UsageMeter()
+        self.seen: list[str] = []
+
+    async def abatch(self, inputs, concurrency=8, max_tool_iterations=3):
+        for index, text in enumerate(inputs):
+            self.seen.append(text)
+            if text in self.failing:
+                yield index, RuntimeError(f"{text} 失败")
+            else:
+                yield index, text.upper()
+
+
+def _write_inputs(path, count: int):
+    path.write_text(
+        "".join(json.dumps({"id": i, "input": f"r{i}"}) + "\n" for i in range(count)),
+        encoding="utf-8",
+    )
+
+
+def _entries(path) -> list[dict[str, object]]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_rerun_replaces_failed_entries(tmp_path):
+    inputs, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_inputs(inputs, 3)
+    stats = BatchRunner(StubAgent({"r1"}), report=None).run(str(inputs), str(output))
+    assert (stats.completed, stats.failed) == (2, 1)
+
+    agent = StubAgent()
+    stats = BatchRunner(agent, report=None).run(str(inputs), str(output))
+    assert agent.seen == ["r1"]
+    assert (stats.completed, stats.skipped) == (1, 2)
+    entries = _entries(output)
+    # 每个 id 只保留一行, 失败记录被重新运行的结果取代
+    assert sorted(e["id"] for e in entries) == [0, 1, 2]
+    assert all(e["error"] is None for e in entries)
+
+
+def test_corrupt_lines_are_skipped(tmp_path):
+    inputs, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_inputs(inputs, 3)
+    output.write_text(
+        json.dumps({"id": 0, "output": "R0", "error": None})
+        + "\n{broken\n"
+        + json.dumps({"id": 2, "output": "R2", "error": None})
+        + '\n{"id": 1, "out',
+        encoding="utf-8",
+    )
+    agent = StubAgent()
+    BatchRunner(agent, report=None).run(str(inputs), str(output))
+    assert agent.seen == ["r1"]
+    assert [e["id"] for e in _entries(output)] == [0, 2, 1]
@@ -0,0 +1,26 @@
+from chick_agent.core.config import Config
+
+
+def _write(tmp_path, body: str) -> str:
+    path = tmp_path / "config.toml"
+    path.write_text('[test]\nmodel = "m"\n' + body, encoding="utf-8")
+    return str(path)
+
+
+def test_from_toml_reads_response_cache_limits(tmp_path):
+    path = _write(
+        tmp_path,
+        "response_cache = true\n"
+        "response_cache_max_entries = 16\n"
+        "response_cache_max_bytes = 4096\n",
+    )
+    config = Config.from_toml(path, id="test")
+    assert config.response_cache
+    assert config.response_cache_max_entries == 16
+    assert config.response_cache_max_bytes == 4096
+
+
+def test_from_toml_response_cache_defaults(tmp_path):
+    config = Config.from_toml(_write(tmp_path, ""), id="test")
+    assert config.response_cache_max_entries == Config().response_cache_max_entries
+    assert config.response_cache_max_bytes == Config().response_cache_max_bytes
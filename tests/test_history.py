@@ -0,0 +1,142 @@
+import random
+import time
+import warnings
+
+from chick_agent.core.history import HistoryManager, estimate_tokens
+from chick_agent.core.message import Message
+from chick_agent.core.store import JSONLSessionStore
+
+
+def _turns(count: int) -> list[Message]:
+    messages = []
+    for i in range(count):
+        messages.append(Message(f"q{i}", "user"))
+        messages.append(Message(f"a{i}", "assistant"))
+    return messages
+
+
+def _history(**kwargs) -> HistoryManager:
+    kwargs.setdefault("max_messages", None)
+    return HistoryManager(token_counter=lambda text: 10, **kwargs)
+
+
+def _contents(prompt: list[dict[str, str]]) -> list[str]:
+    return [m["content"] for m in prompt]
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens("你好世界") > estimate_tokens("abcd")
+
+
+def test_window_fits_budget():
+    history = _history(max_tokens=100)
+    history.extend(_turns(4))
+    assert len(history.prompt_messages(10)) == 8
+    # 预算只够 5 条时, 窗口从一条用户消息开始
+    assert _contents(history.prompt_messages(50)) == ["q2", "a2", "q3", "a3"]
+
+
+def test_window_recovers_after_large_reservation():
+    history = _history(max_tokens=100)
+    history.extend(_turns(4))
+    assert len(history.prompt_messages(10)) == 8
+    assert history.prompt_messages(95) == []
+    assert len(history.prompt_messages(10)) == 8
+    # 内存中的消息不会因为某一轮的预算而被删除
+    assert len(history) == 8
+
+
+def test_window_matches_full_scan_as_budget_changes():
+    history = HistoryManager(max_messages=None, max_tokens=60, token_counter=len)
+    rng = random.Random(0)
+    for i in range(200):
+        history.append(Message("x" * rng.randint(1, 12), "user"))
+        history.append(Message("y" * rng.randint(1, 12), "assistant"))
+        reserved = rng.choice([0, 0, 5, 20, 55, 70])
+        budget = 60 - reserved
+        start = len(history.messages)
+        while start > 0 and sum(history._tokens[start - 1 :]) <= budget:
+            start -= 1
+        expected = history._wire[history._turn_boundary(start) :]
+        assert history.prompt_messages(reserved) == expected
+
+
+def test_window_follows_new_messages():
+    history = _history(max_tokens=40)
+    history.extend(_turns(4))
+    history.append(Message("q4", "user"))
+    assert _contents(history.prompt_messages()) == ["q3", "a3", "q4"]
+
+
+def test_max_messages_evicts_whole_turns():
+    history = _history(max_messages=5)
+    history.extend(_turns(4))
+    assert [m.content for m in history.messages] == ["q2", "a2", "q3", "a3"]
+
+
+def _wait(condition, timeout: float = 5.0) -> bool:
+    # 摘要在后台线程中完成, 轮询等待回调生效
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_summarizer_receives_evicted_messages():
+    def summarizer(summary: str, messages: list[Message]) -> str:
+        return summary + "".join(m.content for m in messages)
+
+    history = _history(max_tokens=40, summarizer=summarizer)
+    history.extend(_turns(4))
+    history.prompt_messages()
+    assert _wait(lambda: history.summary)
+    prompt = history.prompt_messages()
+    assert prompt[0]["role"] == "system"
+    assert "q0a0q1a1" in prompt[0]["content"]
+    history.close()
+
+
+def test_failed_summary_is_retried():
+    calls = []
+
+    def summarizer(summary: str, messages: list[Message]) -> str:
+        calls.append([m.content for m in messages])
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return "summary"
+
+    history = _history(max_tokens=40, summarizer=summarizer)
+    history.extend(_turns(4))
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        history.prompt_messages()
+        assert _wait(lambda: caught)
+    assert "boom" in str(caught[0].message)
+    assert [m.content for m in history._pending] == ["q0", "a0", "q1", "a1"]
+
+    history.prompt_messages()
+    assert _wait(lambda: history.summary == "summary")
+    assert calls[1] == ["q0", "a0", "q1", "a1"]
+    history.close()
+
+
+def test_clear_resets_window():
+    history = _history(max_tokens=100)
+    history.extend(_turns(2))
+    history.clear()
+    assert history.prompt_messages() == []
+    history.append(Message("again", "user"))
+    assert _contents(history.prompt_messages()) == ["again"]
+
+
+def test_loads_tail_from_store(tmp_path):
+    store = JSONLSessionStore(str(tmp_path), flush_interval=0)
+    store.append("s", [Message("stray", "assistant"), *_turns(3)])
+    history = _history(max_messages=5, store=store, session_id="s")
+    # 尾部 5 条以 assistant 消息开始, 加载时对齐到用户消息
+    assert _contents(history.prompt_messages()) == ["q1", "a1", "q2", "a2"]
+    history.append(Message("q3", "user"))
+    assert store.load_tail("s", 1)[0].content == "q3"
+    store.close()
@@ -0,0 +1,68 @@
+from chick_agent.tools.index import ToolIndex, tokenize
+from chick_agent.tools.tool import Tool, ToolParameter
+
+
+class DescribedTool(Tool):
+    def __init__(self, name: str, description: str, parameters: list[str] = ()):
+        super().__init__(name=name, description=description)
+        self._parameters = [
+            ToolParameter(name=p, type="string", description=f"{p} 参数")
+            for p in parameters
+        ]
+
+    def get_parameters(self) -> list[ToolParameter]:
+        return self._parameters
+
+    def run(self, parameters: dict[str, object]) -> str:
+        return ""
+
+
+def _names(results: list[tuple[str, float]]) -> list[str]:
+    return [name for name, _ in results]
+
+
+def test_tokenize_splits_identifiers_and_cjk():
+    assert tokenize("readFile git_log") == ["read", "file", "git", "log"]
+    assert tokenize("读取文件") == ["读", "取", "文", "件", "读取", "取文", "文件"]
+    assert tokenize("") == []
+
+
+def test_search_ranks_relevant_tool_first():
+    index = ToolIndex()
+    index.add(DescribedTool("read_file", "读取文件内容", ["path"]))
+    index.add(DescribedTool("git_log", "查看提交历史"))
+    index.add(DescribedTool("weather", "查询城市天气", ["city"]))
+    assert _names(index.search("帮我读取一个文件", 1)) == ["read_file"]
+    assert _names(index.search("show git log", 3))[0] == "git_log"
+
+
+def test_search_excludes_unrelated_and_respects_k():
+    index = ToolIndex()
+    for i in range(5):
+        index.add(DescribedTool(f"tool_{i}", f"工具 {i}"))
+    assert index.search("完全无关", 3) == []
+    assert len(index.search("tool", 3)) == 3
+    assert index.search("", 3) == []
+    assert ToolIndex().search("tool", 3) == []
+
+
+def test_rare_terms_weigh_more():
+    index = ToolIndex()
+    index.add(DescribedTool("a", "common common special"))
+    index.add(DescribedTool("b", "common common"))
+    index.add(DescribedTool("c", "common"))
+    assert _names(index.search("common special", 1)) == ["a"]
+
+
+def test_readd_and_remove_update_postings():
+    index = ToolIndex()
+    index.add(DescribedTool("t", "天气"))
+    index.add(DescribedTool("t", "股票行情"))
+    assert len(index) == 1
+    assert index.search("天气", 1) == []
+    assert _names(index.search("股票", 1)) == ["t"]
+    index.remove("t")
+    index.remove("missing")
+    assert len(index) == 0
+    assert index.search("股票", 1) == []
+    assert index._postings == {}
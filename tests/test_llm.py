@@ -0,0 +1,182 @@
+import asyncio
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from chick_agent.core.llm import AsyncChickAgentLLM
+from chick_agent.core.resilience import RetryPolicy
+from chick_agent.core.transport import (
+    _async_clients,
+    _PoolEntry,
+    aclose_http_clients,
+)
+
+
+def _completion(content: str) -> dict[str, object]:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "stub",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps(_completion("ok")).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    # 本地的 OpenAI 兼容服务, 只返回固定的补全结果
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def test_async_llm_survives_multiple_event_loops(upstream):
+    llm = AsyncChickAgentLLM(model="stub", api_key="key", base_url=upstream)
+    messages = [{"role": "user", "content": "hi"}]
+    assert asyncio.run(llm.invoke(messages)) == "ok"
+    # 第二次 asyncio.run 使用新的事件循环, 客户端按新循环重建
+    assert asyncio.run(llm.invoke(messages)) == "ok"
+
+    async def invoke_and_close():
+        try:
+            return await llm.invoke(messages)
+        finally:
+            await aclose_http_clients()
+
+    assert asyncio.run(invoke_and_close()) == "ok"
+    assert not [key for key in _async_clients if key[2].is_closed()]
+
+
+def test_pool_stats_tolerate_transport_changes():
+    entry = _PoolEntry("http://example.com")
+    entry.client = type("Client", (), {"_transport": object()})()
+    assert entry.stats()["connections"] == 0
+
+    class Broken:
+        @property
+        def _transport(self):
+            raise AttributeError("_transport")
+
+    entry.client = Broken()
+    assert entry.stats()["idle_connections"] is None
+
+
+def _endpoint(name: str, **kwargs) -> AsyncChickAgentLLM:
+    kwargs.setdefault("retry_policy", RetryPolicy(max_retries=2, base_delay=0))
+    return AsyncChickAgentLLM(
+        model=name, api_key="key", base_url=f"http://{name}.invalid", **kwargs
+    )
+
+
+class StubOpener:
+    # 按端点模型名决定行为: 抛出异常、延迟返回或立即返回; 记录每次调用的端点和时间
+    def __init__(self, behaviors: dict[str, object]):
+        self.behaviors = behaviors
+        self.calls: list[tuple[str, float]] = []
+        self.start = time.perf_counter()
+
+    async def __call__(self, endpoint: AsyncChickAgentLLM, request: dict[str, object]):
+        self.calls.append((endpoint.model, time.perf_counter() - self.start))
+        behavior = self.behaviors[endpoint.model]
+        if isinstance(behavior, Exception):
+            raise behavior
+        if isinstance(behavior, float):
+            await asyncio.sleep(behavior)
+        return endpoint.model
+
+    @property
+    def endpoints(self) -> list[str]:
+        return [model for model, _ in self.calls]
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_retryable_errors_are_retried_then_fall_back():
+    fallback = _endpoint("fallback")
+    primary = _endpoint("primary", fallbacks=[fallback])
+    opener = StubOpener({"primary": httpx.ConnectError("down"), "fallback": "ok"})
+    assert asyncio.run(primary._call("invoke", opener, MESSAGES)) == "fallback"
+    # 主端点共尝试 max_retries + 1 次
+    assert opener.endpoints == ["primary"] * 3 + ["fallback"]
+
+
+def test_fallbacks_are_tried_in_order():
+    second, third = _endpoint("second"), _endpoint("third")
+    primary = _endpoint("primary", fallbacks=[second, third])
+    opener = StubOpener(
+        {"primary": ValueError("bad"), "second": ValueError("bad"), "third": "ok"}
+    )
+    assert asyncio.run(primary._call("invoke", opener, MESSAGES)) == "third"
+    assert opener.endpoints == ["primary", "second", "third"]
+
+
+def test_non_retryable_error_is_raised_immediately():
+    llm = _endpoint("primary", retry_policy=RetryPolicy(max_retries=5, base_delay=10))
+    opener = StubOpener({"primary": ValueError("bad request")})
+    start = time.perf_counter()
+    with pytest.raises(ValueError, match="bad request"):
+        asyncio.run(llm._call("invoke", opener, MESSAGES))
+    assert opener.endpoints == ["primary"]
+    assert time.perf_counter() - start < 1
+
+
+def test_exhausted_retries_raise_last_error():
+    llm = _endpoint("primary", retry_policy=RetryPolicy(max_retries=1, base_delay=0))
+    opener = StubOpener({"primary": httpx.ReadTimeout("slow")})
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(llm._call("invoke", opener, MESSAGES))
+    assert opener.endpoints == ["primary", "primary"]
+
+
+def test_hedge_fires_after_p95_deadline():
+    backup = _endpoint("backup")
+    primary = _endpoint("primary", fallbacks=[backup], hedge_requests=True)
+    # 样本足够时以 p95 作为对冲时间, 而不是 hedge_delay
+    for _ in range(primary.latency.min_samples):
+        primary.latency.record("invoke", 0.1)
+    opener = StubOpener({"primary": 5.0, "backup": "ok"})
+    start = time.perf_counter()
+    assert asyncio.run(primary._call("invoke", opener, MESSAGES)) == "backup"
+    assert time.perf_counter() - start < 2
+    assert opener.endpoints == ["primary", "backup"]
+    assert opener.calls[1][1] >= 0.09
+
+
+def test_fast_primary_is_not_hedged():
+    backup = _endpoint("backup")
+    primary = _endpoint(
+        "primary", fallbacks=[backup], hedge_requests=True, hedge_delay=1.0
+    )
+    opener = StubOpener({"primary": "ok", "backup": "ok"})
+    assert asyncio.run(primary._call("invoke", opener, MESSAGES)) == "primary"
+    assert opener.endpoints == ["primary"]
@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from chick_agent.core.loop import run_sync
+from chick_agent.protocols.mcp import pool as pool_module
+from chick_agent.protocols.mcp.pool import MCPSessionPool
+from chick_agent.tools import MCPTool
+
+
+class StubClient:
+    # 代替 MCPClient, 不启动服务进程; 记录创建和关闭过的客户端
+    created: list["StubClient"] = []
+
+    def __init__(self, source, server_args=None, env=None):
+        self.source = source
+        self.server_args = server_args
+        self.env = env
+        self.connected = False
+        self.closed = False
+        StubClient.created.append(self)
+
+    async def __aenter__(self):
+        self.connected = True
+        return self
+
+    async def close(self):
+        self.connected = False
+        self.closed = True
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def list_tools(self) -> list[dict[str, object]]:
+        return [{"name": f"{self.source}_tool", "input_schema": {}}]
+
+
+@pytest.fixture(autouse=True)
+def stub_client(monkeypatch):
+    StubClient.created = []
+    monkeypatch.setattr(pool_module, "MCPClient", StubClient)
+
+
+async def _use(pool: MCPSessionPool, source: str, *args, **kwargs) -> StubClient:
+    async with pool.session(source, *args, **kwargs) as client:
+        return client
+
+
+def test_sessions_are_reused_per_key():
+    async def scenario():
+        pool = MCPSessionPool()
+        first = await _use(pool, "srv", ["--a"], {"K": "1"})
+        assert await _use(pool, "srv", ["--a"], {"K": "1"}) is first
+        assert await _use(pool, "srv", ["--b"], {"K": "1"}) is not first
+        assert await _use(pool, "srv", ["--a"], {"K": "2"}) is not first
+        assert len(pool) == 3
+        await pool.aclose()
+
+    asyncio.run(scenario())
+    assert len(StubClient.created) == 3
+
+
+def test_broken_session_is_replaced():
+    async def scenario():
+        pool = MCPSessionPool()
+        first = await _use(pool, "srv")
+        first.connected = False
+        second = await _use(pool, "srv")
+        assert second is not first
+        await asyncio.sleep(0)
+        assert first.closed
+        await pool.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_idle_sessions_are_reaped():
+    async def scenario():
+        pool = MCPSessionPool(idle_timeout=0.05)
+        client = await _use(pool, "srv")
+        for _ in range(50):
+            if not len(pool):
+                break
+            await asyncio.sleep(0.02)
+        assert len(pool) == 0
+        await asyncio.sleep(0)
+        assert client.closed
+        await pool.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_least_recently_used_session_is_evicted():
+    async def scenario():
+        pool = MCPSessionPool(max_sessions=2, idle_timeout=None)
+        a = await _use(pool, "a")
+        b = await _use(pool, "b")
+        await _use(pool, "a")
+        await _use(pool, "c")
+        assert len(pool) == 2
+        await asyncio.sleep(0)
+        assert b.closed and not a.closed
+        assert await _use(pool, "a") is a
+        await pool.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_sessions_in_use_are_not_evicted():
+    async def scenario():
+        pool = MCPSessionPool(max_sessions=1, idle_timeout=None)
+        async with pool.session("a") as a:
+            waiter = asyncio.ensure_future(_use(pool, "b"))
+            await asyncio.sleep(0.05)
+            # 上限已满且唯一的会话正在使用, 新的获取等待其释放
+            assert not waiter.done()
+            assert not a.closed
+        b = await waiter
+        assert b.source == "b"
+        await pool.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_close_shuts_down_sessions_and_rejects_new_ones():
+    async def scenario():
+        pool = MCPSessionPool()
+        clients = [await _use(pool, name) for name in ("a", "b")]
+        await pool.aclose()
+        assert all(client.closed for client in clients)
+        assert len(pool) == 0
+        with pytest.raises(RuntimeError, match="closed"):
+            await _use(pool, "a")
+
+    asyncio.run(scenario())
+
+
+def test_sync_close_from_another_thread():
+    pool = MCPSessionPool()
+    client = run_sync(_use(pool, "srv"))
+    pool.close()
+    assert client.closed
+    assert pool._closed
+
+
+def test_pool_binds_to_first_loop():
+    pool = MCPSessionPool()
+    # 首次在共享后台循环上使用, 池绑定该循环
+    run_sync(_use(pool, "srv"))
+    tool = MCPTool("srv", server="srv", session_pool=pool, cache_schema=False)
+
+    async def elsewhere():
+        # 其他循环上直接使用会被拒绝, 经 _on_pool_loop 转交则复用同一会话
+        with pytest.raises(RuntimeError, match="another event loop"):
+            await _use(pool, "srv")
+        return await tool._on_pool_loop(tool._list_server_tools())
+
+    assert asyncio.run(elsewhere()) == [{"name": "srv_tool", "input_schema": {}}]
+    assert len(StubClient.created) == 1
+    pool.close()
+
+
+def test_pool_rebinds_after_its_loop_closes():
+    pool = MCPSessionPool(idle_timeout=None)
+    first = asyncio.run(_use(pool, "srv"))
+    # 绑定的循环已结束, 其上的会话失效, 下一个循环重新绑定并新建会话
+    second = asyncio.run(_use(pool, "srv"))
+    assert second is not first
+    assert pool.loop is None
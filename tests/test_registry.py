@@ -0,0 +1,157 @@
+import asyncio
+import gc
+import threading
+
+from chick_agent.tools import MCPTool, Tool, ToolParameter, ToolRegistry
+
+
+class EchoTool(Tool):
+    def __init__(self, name: str, description: str = ""):
+        super().__init__(name=name, description=description or f"{name} 工具")
+
+    def get_parameters(self) -> list[ToolParameter]:
+        return [ToolParameter(name="text", type="string", description="文本")]
+
+    def run(self, parameters: dict[str, object]) -> str:
+        return str(parameters.get("text"))
+
+
+def _server(name: str, tools: list[str]) -> MCPTool:
+    # 不连接真实服务: 直接设置已发现的工具列表
+    tool = MCPTool(name, server=object(), cache_schema=False)
+    tool._set_available_tools([_tool_info(t) for t in tools])
+    tool.status = "ready"
+    return tool
+
+
+def _tool_info(name: str) -> dict[str, object]:
+    return {
+        "name": name,
+        "description": f"{name} 工具",
+        "input_schema": {"type": "object", "properties": {"x": {"type": "integer"}}},
+    }
+
+
+def _notify(server: MCPTool, tools: list[str]):
+    server._set_available_tools([_tool_info(t) for t in tools])
+    expanded = server._inner_tools()
+    for callback in list(server.on_tools_changed):
+        callback(expanded)
+
+
+def test_register_and_parse_arguments():
+    registry = ToolRegistry()
+    registry.register_tool(EchoTool("echo"))
+    assert registry.get_tool("echo") is not None
+    assert registry.parse_arguments("echo", "text=a, b") == {"text": "a, b"}
+    assert len(registry) == 1
+
+
+def test_server_expansion_replaced_on_change():
+    registry = ToolRegistry()
+    server = _server("srv", ["a", "b"])
+    registry.register_tool(server)
+    assert sorted(registry._tools) == ["a", "b"]
+    _notify(server, ["b", "c"])
+    assert sorted(registry._tools) == ["b", "c"]
+    assert registry.parse_arguments("c", "x=3") == {"x": 3}
+    assert "a" not in {name for name, _ in registry.index.search("a", 5)}
+
+
+def test_reregistering_server_subscribes_once():
+    registry = ToolRegistry()
+    server = _server("srv", ["a"])
+    registry.register_tool(server)
+    registry.register_tool(server)
+    assert len(server.on_tools_changed) == 1
+
+
+def test_discarded_registry_is_collectable():
+    server = _server("srv", ["a"])
+    registry = ToolRegistry()
+    registry.register_tool(server)
+    del registry
+    gc.collect()
+    _notify(server, ["b"])
+    assert server.on_tools_changed == []
+
+
+def test_register_during_background_update_keeps_tools():
+    registry = ToolRegistry()
+    server = _server("srv", ["a"])
+    registry.register_tool(server)
+    stop = threading.Event()
+
+    def churn():
+        i = 0
+        while not stop.is_set():
+            _notify(server, [f"m{i % 3}"])
+            i += 1
+
+    thread = threading.Thread(target=churn)
+    thread.start()
+    try:
+        for i in range(200):
+            registry.register_tool(EchoTool(f"local_{i}"), auto_expand=False)
+    finally:
+        stop.set()
+        thread.join()
+    assert all(registry.get_tool(f"local_{i}") for i in range(200))
+    assert all(f"local_{i}" in registry._parsers for i in range(200))
+
+
+def test_select_tools_keeps_pinned_and_registration_order():
+    registry = ToolRegistry()
+    for name, description in [
+        ("read_file", "读取文件内容"),
+        ("write_file", "写入文件"),
+        ("git_log", "查看 git 提交历史"),
+        ("weather", "查询天气"),
+    ]:
+        registry.register_tool(EchoTool(name, description), auto_expand=False)
+    registry.register_tool(EchoTool("always"), pinned=True)
+    selected = registry.select_tools("帮我读取文件", 1)
+    assert [tool.name for tool in selected] == ["read_file", "always"]
+    assert registry.select_tools("任意", 10) is None
+
+
+class ClosingTool(EchoTool):
+    def __init__(self, name: str, closed: list[str]):
+        super().__init__(name)
+        self.closed = closed
+
+    def close(self):
+        self.closed.append(self.name)
+
+
+def test_close_shuts_down_each_server_once():
+    closed = []
+    registry = ToolRegistry()
+    ready = _server("ready", ["a", "b"])
+    degraded = _server("degraded", [])
+    degraded.status = "degraded"
+    for server in (ready, degraded):
+        server.close = lambda server=server: closed.append(server.name)
+
+        async def aclose(server=server):
+            closed.append(server.name)
+
+        server.aclose = aclose
+        registry.register_tool(server)
+    registry.register_tool(ClosingTool("local", closed))
+    registry.close()
+    assert sorted(closed) == ["degraded", "local", "ready"]
+    closed.clear()
+    asyncio.run(registry.aclose())
+    assert sorted(closed) == ["degraded", "local", "ready"]
+
+
+def test_server_without_tools_picks_up_later_tools():
+    registry = ToolRegistry()
+    server = _server("srv", [])
+    registry.register_tool(server)
+    # 就绪但没有工具的服务不能作为单个通用工具注册
+    assert "srv" not in registry._tools
+    assert registry.server_status() == {"srv": "ready"}
+    _notify(server, ["late"])
+    assert list(registry._tools) == ["late"]
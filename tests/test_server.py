@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("starlette")
+
+from starlette.testclient import TestClient
+
+from chick_agent.core.config import Config
+from chick_agent.core.llm import AsyncChickAgentLLM
+from chick_agent.server import AgentServer, SessionManager
+
+
+class StubLLM(AsyncChickAgentLLM):
+    # 不发出网络请求: 回复 "echo:<最后一条用户消息>", 并记录每次收到的消息
+    def __init__(self):
+        super().__init__(model="stub", api_key="key", base_url="http://stub.invalid")
+        self.calls: list[list[dict[str, object]]] = []
+
+    def _reply(self, messages: list[dict[str, object]]) -> str:
+        self.calls.append(messages)
+        return f"echo:{messages[-1]['content']}"
+
+    async def think(self, messages, temperature=None, tools=None):
+        reply = self._reply(messages)
+        for i in range(0, len(reply), 4):
+            yield reply[i : i + 4]
+
+    async def invoke(self, messages, **kwargs) -> str:
+        return self._reply(messages)
+
+
+@pytest.fixture
+def app():
+    llm = StubLLM()
+    server = AgentServer(Config(), llm=llm, system_prompt="你是测试助手")
+    with TestClient(server.create_app()) as client:
+        yield client, llm, server
+
+
+def _chat(content: str, **extra) -> dict[str, object]:
+    return {"messages": [{"role": "user", "content": content}], **extra}
+
+
+def _sse_events(text: str) -> list[object]:
+    return [
+        line[len("data: ") :]
+        if line == "data: [DONE]"
+        else json.loads(line[len("data: ") :])
+        for line in text.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+def test_non_streaming_completion(app):
+    client, llm, server = app
+    response = client.post("/v1/chat/completions", json=_chat("你好"))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["object"] == "chat.completion"
+    assert body["choices"][0]["message"]["content"] == "echo:你好"
+    # 没有会话 ID 的请求不保存会话
+    assert "x-session-id" not in response.headers
+    assert len(server.sessions) == 0
+
+
+def test_streaming_completion(app):
+    client, llm, server = app
+    response = client.post(
+        "/v1/chat/completions",
+        json=_chat("stream", stream=True, stream_options={"include_usage": True}),
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(response.text)
+    assert events[-1] == "[DONE]"
+    chunks = [e for e in events[:-1] if e["choices"]]
+    text = "".join(c["choices"][0]["delta"].get("content") or "" for c in chunks)
+    assert text == "echo:stream"
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+    assert "usage" in events[-2]
+
+
+def test_session_reuse(app):
+    client, llm, server = app
+    headers = {"X-Session-Id": "s1"}
+    client.post("/v1/chat/completions", json=_chat("第一轮"), headers=headers)
+    response = client.post(
+        "/v1/chat/completions", json=_chat("第二轮"), headers=headers
+    )
+    assert response.headers["x-session-id"] == "s1"
+    # 第二轮的提示包含服务端保存的第一轮对话
+    contents = [m["content"] for m in llm.calls[-1]]
+    assert "第一轮" in contents and "echo:第一轮" in contents
+    history = client.get("/v1/sessions/s1").json()["messages"]
+    assert [m["content"] for m in history] == [
+        "第一轮",
+        "echo:第一轮",
+        "第二轮",
+        "echo:第二轮",
+    ]
+    # session_id 字段与请求头等价
+    client.post("/v1/chat/completions", json=_chat("第三轮", session_id="s1"))
+    assert len(client.get("/v1/sessions/s1").json()["messages"]) == 6
+    assert client.delete("/v1/sessions/s1").status_code == 200
+    assert client.get("/v1/sessions/s1").status_code == 404
+
+
+def test_user_field_does_not_create_session(app):
+    client, llm, server = app
+    client.post("/v1/chat/completions", json=_chat("a", user="alice"))
+    client.post("/v1/chat/completions", json=_chat("b", user="alice"))
+    assert len(server.sessions) == 0
+    assert "a" not in [m["content"] for m in llm.calls[-1]]
+
+
+def test_eviction_skips_busy_sessions():
+    server = AgentServer(Config(), llm=StubLLM())
+    sessions = SessionManager(server._create_agent, max_sessions=2, ttl=None)
+
+    async def scenario():
+        busy = sessions.acquire("busy")
+        sessions.acquire("idle")
+        async with busy.lock:
+            sessions.acquire("new")
+            assert sessions.get("busy") is busy
+            assert sessions.get("idle") is None
+            # 其余会话都在使用中时暂时超出上限
+            sessions.max_sessions = 1
+            sessions.acquire("newer")
+            assert sessions.get("busy") is busy
+            assert len(sessions) == 2
+
+    asyncio.run(scenario())
+    sessions.close()
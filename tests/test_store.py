@@ -0,0 +1,133 @@
+import io
+import json
+
+import pytest
+
+from chick_agent.core.message import Message
+from chick_agent.core.store import JSONLSessionStore, SessionStore, SQLiteSessionStore
+
+
+def _contents(messages: list[Message]) -> list[str]:
+    return [m.content for m in messages]
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def make_store(request, tmp_path):
+    stores = []
+
+    def make(**kwargs) -> SessionStore:
+        kwargs.setdefault("flush_interval", 0)
+        if request.param == "jsonl":
+            store = JSONLSessionStore(str(tmp_path / "sessions"), **kwargs)
+        else:
+            store = SQLiteSessionStore(str(tmp_path / "sessions.db"), **kwargs)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_append_and_load_tail(make_store):
+    store = make_store()
+    store.append("s", [Message(str(i), "user") for i in range(10)])
+    assert _contents(store.load_tail("s")) == [str(i) for i in range(10)]
+    assert _contents(store.load_tail("s", 3)) == ["7", "8", "9"]
+    assert store.load_tail("s", 0) == []
+    assert store.load_tail("missing", 5) == []
+
+
+def test_records_round_trip(make_store):
+    store = make_store()
+    message = Message("hi", "assistant", 1234, {"tool": "add"})
+    store.append("s", [message])
+    assert store.load_tail("s") == [message]
+
+
+def test_reopen_keeps_history(make_store):
+    store = make_store()
+    store.append("s", [Message("one", "user")])
+    store.close()
+    store = make_store()
+    store.append("s", [Message("two", "user")])
+    assert _contents(store.load_tail("s")) == ["one", "two"]
+
+
+def test_background_flush_on_close(make_store):
+    store = make_store(flush_interval=60)
+    store.append("s", [Message("buffered", "user")])
+    store.close()
+    assert _contents(make_store().load_tail("s")) == ["buffered"]
+
+
+def test_sessions_delete_and_export(make_store):
+    store = make_store()
+    store.append("a/b", [Message("x", "user")])
+    store.append("c", [Message("y", "user"), Message("z", "assistant")])
+    assert store.sessions() == ["a/b", "c"]
+    out = io.StringIO()
+    assert store.export("c", out) == 2
+    assert [json.loads(line)["content"] for line in out.getvalue().splitlines()] == [
+        "y",
+        "z",
+    ]
+    assert store.delete("a/b")
+    assert not store.delete("a/b")
+    assert store.sessions() == ["c"]
+
+
+def test_jsonl_tail_spans_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(JSONLSessionStore, "_BLOCK_SIZE", 64)
+    store = JSONLSessionStore(str(tmp_path), flush_interval=0)
+    store.append("s", [Message(f"message {i}", "user") for i in range(50)])
+    assert _contents(store.load_tail("s", 4)) == [f"message {i}" for i in range(46, 50)]
+    store.close()
+
+
+def test_jsonl_skips_torn_last_line(tmp_path):
+    store = JSONLSessionStore(str(tmp_path), flush_interval=0)
+    store.append("s", [Message("one", "user")])
+    with open(tmp_path / "s.jsonl", "ab") as f:
+        f.write(b'{"role": "user", "cont')
+    assert _contents(store.load_tail("s", 5)) == ["one"]
+    store.close()
+
+
+def test_jsonl_append_after_torn_write(tmp_path):
+    store = JSONLSessionStore(str(tmp_path), flush_interval=0)
+    store.append("s", [Message("one", "user")])
+    store.close()
+    with open(tmp_path / "s.jsonl", "ab") as f:
+        f.write(b'{"role": "user", "cont')
+
+    store = JSONLSessionStore(str(tmp_path), flush_interval=0)
+    store.append("s", [Message("two", "user"), Message("three", "user")])
+    assert _contents(store.load_tail("s")) == ["one", "two", "three"]
+    assert _contents(store.load_tail("s", 2)) == ["two", "three"]
+    store.close()
+    assert (tmp_path / "s.jsonl").read_bytes().endswith(b"\n")
+
+
+def test_jsonl_torn_file_without_newline(tmp_path):
+    (tmp_path / "s.jsonl").write_bytes(b'{"role": "us')
+    store = JSONLSessionStore(str(tmp_path), flush_interval=0)
+    store.append("s", [Message("one", "user")])
+    assert _contents(store.load_tail("s")) == ["one"]
+    store.close()
+
+
+def test_backend_must_implement_hooks():
+    class Incomplete(SessionStore):
+        def _write(self, records):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_closed_store_rejects_append(make_store):
+    store = make_store()
+    store.close()
+    with pytest.raises(RuntimeError):
+        store.append("s", [Message("late", "user")])